@@ -60,15 +60,15 @@ const Navbar = () => {
       console.log("🟢 Connected to Real-Time Notification Server");
     };
 
-    ws.onmessage = (event) => {
-      const data = JSON.parse(event.data);
-      console.log("📩 Real-Time Update Received:", data);
+    const handleEvent = (data) => {
+      // Every event carries the server's unread count (new notifications,
+      // reads from other tabs, periodic corrections)
+      if (typeof data.unread_count === "number") {
+        setUnreadCount(data.unread_count);
+      }
 
       if (data.type === "NEW_NOTIFICATION") {
-        // A. Increment Badge
-        setUnreadCount((prev) => prev + 1);
-
-        // B. Show Toast
+        // Show Toast
         setToast(data.notification);
 
         // Auto-hide toast after 5 seconds
@@ -76,6 +76,20 @@ const Navbar = () => {
       }
     };
 
+    ws.onmessage = (event) => {
+      const data = JSON.parse(event.data);
+      // Server heartbeat, nothing to do
+      if (data.type === "PING") return;
+      console.log("📩 Real-Time Update Received:", data);
+
+      // Bursts arrive as one BATCH frame, oldest event first
+      if (data.type === "BATCH") {
+        data.events.forEach(handleEvent);
+      } else {
+        handleEvent(data);
+      }
+    };
+
     ws.onclose = () => console.log("🔴 Disconnected from Notification Server");
     setSocket(ws);
 
@@ -61,35 +61,16 @@ const Analytics = () => {
   const fetchAnalyticsData = async () => {
     setLoading(true);
     try {
-      const [
-        overviewRes,
-        pipelineRes,
-        timeRes,
-        sourcesRes,
-        qualityRes,
-        recentRes,
-      ] = await Promise.all([
-        fetch(`${API_BASE}/analytics/overview`),
-        fetch(`${API_BASE}/analytics/pipeline`),
-        fetch(`${API_BASE}/analytics/time-to-hire`),
-        fetch(`${API_BASE}/analytics/source-effectiveness`),
-        fetch(`${API_BASE}/analytics/candidate-quality`),
-        fetch(`${API_BASE}/analytics/recent-applications`),
-      ]);
+      // One round trip: the backend builds all six panels from a shared pass
+      const res = await fetch(`${API_BASE}/analytics/dashboard`);
+      const data = await res.json();
 
-      const overviewData = await overviewRes.json();
-      const pipelineData = await pipelineRes.json();
-      const timeData = await timeRes.json();
-      const sourcesData = await sourcesRes.json();
-      const qualityData = await qualityRes.json();
-      const recentData = await recentRes.json();
-
-      setOverview(overviewData);
-      setPipeline(pipelineData.pipeline);
-      setTimeToHire(timeData.time_series);
-      setSources(sourcesData.sources);
-      setQuality(qualityData.distribution);
-      setRecentApps(recentData.applications);
+      setOverview(data.overview);
+      setPipeline(data.pipeline.pipeline);
+      setTimeToHire(data.time_to_hire.time_series);
+      setSources(data.source_effectiveness.sources);
+      setQuality(data.candidate_quality.distribution);
+      setRecentApps(data.recent_applications.applications);
     } catch (error) {
       console.error("Error fetching analytics:", error);
     } finally {
@@ -8,7 +8,6 @@ import React, {
 } from "react";
 import FilterPanel from "../components/FilterPanel";
 import JobCard from "../components/JobCard";
-import mockJobs from "../data/mockJobs.json";
 import {
   FiSearch,
   FiFilter,
@@ -20,6 +19,8 @@ import {
   FiChevronRight,
 } from "react-icons/fi";
 
+const API_BASE = import.meta.env.VITE_API_BASE_URL || "http://127.0.0.1:5000";
+
 const JobDashboard = () => {
   const [searchTerm, setSearchTerm] = useState("");
   const [isFilterOpen, setIsFilterOpen] = useState(false);
@@ -70,11 +71,6 @@ const JobDashboard = () => {
     window.scrollTo({ top: 0, behavior: "smooth" });
   }, [currentPage]);
 
-  // Reset to Page 1 if search/filters change
-  useEffect(() => {
-    setCurrentPage(1);
-  }, [searchTerm, filters, sortBy]);
-
   useEffect(() => {
     // Prevent background scroll when filters are open (mobile overlay)
     document.body.style.overflow = isFilterOpen ? "hidden" : "auto";
@@ -95,8 +91,6 @@ const JobDashboard = () => {
 
     try {
       // Using Gemini-powered backend endpoint
-      const API_BASE =
-        import.meta.env.VITE_API_BASE_URL || "http://127.0.0.1:5000";
       const res = await fetch(`${API_BASE}/api/parse-resume`, {
         method: "POST",
         body: formData,
@@ -124,110 +118,77 @@ const JobDashboard = () => {
     setResumeData(null);
   };
 
-  // --- 2. SMART MATCHING LOGIC (UPDATED) ---
-  const jobsWithScores = useMemo(() => {
-    // If no resume is uploaded, return jobs with default/zero scores and no missing skills
-    if (!resumeData)
-      return mockJobs.map((job) => ({
-        ...job,
-        matchScore: 0,
-        missingSkills: [],
-      }));
-
-    return mockJobs.map((job) => {
-      let score = 0;
-
-      // Normalize Skills
-      const jobSkills = (job.skills || []).map((s) => s.toLowerCase().trim());
-      const userSkills = (resumeData.skills || []).map((s) =>
-        s.toLowerCase().trim(),
-      );
-
-      // Calculate Overlap
-      // We check if a job skill exists in user skills (fuzzy string check)
-      const matchingSkills = jobSkills.filter((jobSkill) =>
-        userSkills.some(
-          (userSkill) =>
-            userSkill.includes(jobSkill) || jobSkill.includes(userSkill),
-        ),
-      );
-
-      // Identify Missing Skills
-      const missingSkills = jobSkills.filter(
-        (jobSkill) =>
-          !userSkills.some(
-            (userSkill) =>
-              userSkill.includes(jobSkill) || jobSkill.includes(userSkill),
-          ),
-      );
-
-      // Score Calculation (Weight: 70% Skills, 30% Experience/Base)
-      const skillMatchRatio =
-        jobSkills.length > 0 ? matchingSkills.length / jobSkills.length : 0;
-      score += skillMatchRatio * 70;
-
-      // Experience Boost (Simple logic: if user exp >= job exp req)
-      // Assuming mockJobs have numeric 'experience' and parsed data has 'experience' array or string
-      // Just adding a base boost for now to ensure good candidates get high scores
-      score += 20;
-
-      // Cap score at 99%
-      const finalScore = Math.min(
-        99,
-        Math.round(score + (skillMatchRatio > 0.8 ? 9 : 0)),
-      );
-
-      return {
-        ...job,
-        matchScore: finalScore,
-        missingSkills: missingSkills, // Pass this to the card!
-      };
-    });
-  }, [resumeData]);
-
-  // --- 3. FILTERING & SORTING ---
-  const filteredJobs = useMemo(() => {
-    return jobsWithScores
-      .filter((job) => {
-        const matchesSearch =
-          job.title.toLowerCase().includes(deferredSearchTerm.toLowerCase()) ||
-          job.company.toLowerCase().includes(deferredSearchTerm.toLowerCase());
-        const matchesLocation =
-          filters.locations.length === 0 ||
-          filters.locations.includes(job.location);
-        const matchesType =
-          filters.jobTypes.length === 0 || filters.jobTypes.includes(job.type);
-        const matchesExp = job.experience <= filters.experience;
-        const matchesSalary = job.salaryMax >= filters.salaryRange.min;
-        const matchesSkills =
-          filters.skills.length === 0 ||
-          job.skills.some((s) => filters.skills.includes(s));
-        return (
-          matchesSearch &&
-          matchesLocation &&
-          matchesType &&
-          matchesExp &&
-          matchesSalary &&
-          matchesSkills
-        );
+  // --- 2. SERVER-SIDE SEARCH ---
+  // Filtering, sorting and resume matching run on the backend's indexed catalog;
+  // only the current page is fetched.
+  const [jobs, setJobs] = useState([]);
+  const [totalJobs, setTotalJobs] = useState(0);
+  const [hasNextPage, setHasNextPage] = useState(false);
+  const [isLoading, setIsLoading] = useState(false);
+  const [searchError, setSearchError] = useState("");
+  // Cursor of every visited page for the current query (page 1 has none)
+  const pageCursorsRef = useRef({ query: null, cursors: [null] });
+
+  const searchParams = useMemo(() => {
+    const params = new URLSearchParams();
+    if (deferredSearchTerm.trim()) params.set("q", deferredSearchTerm.trim());
+    filters.locations.forEach((loc) => params.append("locations", loc));
+    filters.jobTypes.forEach((type) => params.append("types", type));
+    filters.skills.forEach((skill) => params.append("skills", skill));
+    params.set("max_experience", filters.experience);
+    params.set("min_salary", filters.salaryRange.min || 0);
+    (resumeData?.skills || []).forEach((skill) =>
+      params.append("user_skills", skill),
+    );
+    // "Smart Match" ranks by resume match; without a resume the catalog order is kept
+    params.set("sort", sortBy === "matchScore" ? "match" : sortBy);
+    params.set("limit", ITEMS_PER_PAGE);
+    return params.toString();
+  }, [deferredSearchTerm, filters, sortBy, resumeData]);
+
+  // --- 3. FETCH CURRENT PAGE ---
+  useEffect(() => {
+    let pages = pageCursorsRef.current;
+    if (pages.query !== searchParams) {
+      // New search/filters/sort: start over from page 1
+      pages = pageCursorsRef.current = { query: searchParams, cursors: [null] };
+      if (currentPage !== 1) {
+        setCurrentPage(1);
+        return;
+      }
+    }
+    const cursor = pages.cursors[currentPage - 1];
+    const params = new URLSearchParams(searchParams);
+    if (cursor) params.set("cursor", cursor);
+
+    const controller = new AbortController();
+    setIsLoading(true);
+    fetch(`${API_BASE}/api/jobs/search?${params}`, { signal: controller.signal })
+      .then(async (res) => {
+        const data = await res.json();
+        if (!res.ok) throw new Error(data.detail || data.error || "Search failed");
+        pages.cursors[currentPage] = data.next_cursor;
+        setJobs(data.jobs);
+        setTotalJobs(data.total);
+        setHasNextPage(Boolean(data.next_cursor));
+        setSearchError("");
       })
-      .sort((a, b) => {
-        if (sortBy === "matchScore") return b.matchScore - a.matchScore;
-        if (sortBy === "salary") return b.salary - a.salary;
-        if (sortBy === "date")
-          return new Date(b.postedDate) - new Date(a.postedDate);
-        return 0;
+      .catch((err) => {
+        if (err.name === "AbortError") return;
+        console.error(err);
+        setSearchError("Could not load jobs. Is backend running?");
+        setJobs([]);
+        setTotalJobs(0);
+        setHasNextPage(false);
+      })
+      .finally(() => {
+        if (!controller.signal.aborted) setIsLoading(false);
       });
-  }, [deferredSearchTerm, filters, sortBy, jobsWithScores]);
+    return () => controller.abort();
+  }, [searchParams, currentPage]);
 
   // --- 4. PAGINATION LOGIC ---
-  const totalPages = Math.ceil(filteredJobs.length / ITEMS_PER_PAGE);
-
-  const displayedJobs = useMemo(() => {
-    const startIndex = (currentPage - 1) * ITEMS_PER_PAGE;
-    const endIndex = startIndex + ITEMS_PER_PAGE;
-    return filteredJobs.slice(startIndex, endIndex);
-  }, [filteredJobs, currentPage]);
+  const totalPages = Math.ceil(totalJobs / ITEMS_PER_PAGE);
 
   return (
     <div className="job-dashboard-container">
@@ -344,7 +305,7 @@ const JobDashboard = () => {
           <div className="job-results-header">
             <p className="job-results-text">
               Found{" "}
-              <span className="job-results-count">{filteredJobs.length}</span>{" "}
+              <span className="job-results-count">{totalJobs}</span>{" "}
               opportunities
               {resumeData && (
                 <span className="job-results-badge">(AI Ranked & Parsed)</span>
@@ -360,8 +321,8 @@ const JobDashboard = () => {
                 : "job-list"
             }
           >
-            {displayedJobs.length > 0 ? (
-              displayedJobs.map((job) => (
+            {jobs.length > 0 ? (
+              jobs.map((job) => (
                 <JobCard
                   key={job.id}
                   job={job}
@@ -372,8 +333,8 @@ const JobDashboard = () => {
               ))
             ) : (
               <div className="job-no-results">
-                <h3>No jobs found</h3>
-                <p>Try adjusting your search or filters.</p>
+                <h3>{isLoading ? "Loading jobs..." : "No jobs found"}</h3>
+                <p>{searchError || "Try adjusting your search or filters."}</p>
                 <button
                   onClick={() =>
                     setFilters({
@@ -394,39 +355,27 @@ const JobDashboard = () => {
           </div>
 
           {/* --- PAGINATION CONTROLS --- */}
-          {filteredJobs.length > ITEMS_PER_PAGE && (
+          {totalJobs > ITEMS_PER_PAGE && (
             <div className="pagination-container">
               {/* Previous Arrow */}
               <button
                 onClick={() => setCurrentPage((p) => Math.max(1, p - 1))}
-                disabled={currentPage === 1}
+                disabled={currentPage === 1 || isLoading}
                 className="pagination-arrow"
                 aria-label="Previous Page"
               >
                 <FiChevronLeft />
               </button>
 
-              {/* Page Numbers */}
-              {Array.from({ length: totalPages }, (_, i) => i + 1).map(
-                (number) => (
-                  <button
-                    key={number}
-                    onClick={() => setCurrentPage(number)}
-                    className={`pagination-number ${
-                      currentPage === number ? "active" : ""
-                    }`}
-                  >
-                    {number}
-                  </button>
-                ),
-              )}
+              {/* Page Position (pages are fetched by cursor, one step at a time) */}
+              <span className="pagination-status">
+                Page {currentPage} of {totalPages}
+              </span>
 
               {/* Next Arrow */}
               <button
-                onClick={() =>
-                  setCurrentPage((p) => Math.min(totalPages, p + 1))
-                }
-                disabled={currentPage === totalPages}
+                onClick={() => setCurrentPage((p) => p + 1)}
+                disabled={!hasNextPage || isLoading}
                 className="pagination-arrow"
                 aria-label="Next Page"
               >
@@ -481,6 +430,12 @@ const JobDashboard = () => {
           border-color: #cbd5e0;
         }
 
+        .pagination-status {
+          color: #4a5568;
+          font-weight: 500;
+          padding: 0 8px;
+        }
+
         .pagination-number.active {
           background-color: #3b82f6;
           color: white;
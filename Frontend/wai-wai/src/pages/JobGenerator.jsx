@@ -69,18 +69,40 @@ const JobGenerator = () => {
     try {
       const API_BASE =
         import.meta.env.VITE_API_BASE_URL || "http://127.0.0.1:5000";
-      const response = await fetch(`${API_BASE}/api/generate-job`, {
+      const response = await fetch(`${API_BASE}/api/generate-job/stream`, {
         method: "POST",
         headers: { "Content-Type": "application/json" },
         body: JSON.stringify(formData),
       });
 
-      const data = await response.json();
-      if (data.success) {
-        setGeneratedJob(data.description);
-        setStep(4);
-      } else {
-        alert("Error generating job: " + data.error);
+      // Server-Sent Events over fetch: show tokens as they arrive
+      const reader = response.body.getReader();
+      const decoder = new TextDecoder();
+      let buffer = "";
+      let text = "";
+      let finished = false;
+      while (!finished) {
+        const { value, done } = await reader.read();
+        if (done) break;
+        buffer += decoder.decode(value, { stream: true });
+        const events = buffer.split("\n\n");
+        buffer = events.pop();
+        for (const raw of events) {
+          const event = raw.match(/^event: (.*)$/m)?.[1];
+          const data = JSON.parse(raw.match(/^data: (.*)$/m)?.[1] || "{}");
+          if (event === "token") {
+            if (!text) setStep(4);
+            text += data.text;
+            setGeneratedJob(text);
+          } else if (event === "done") {
+            setGeneratedJob(data.description);
+            setStep(4);
+            finished = true;
+          } else if (event === "error") {
+            alert("Error generating job: " + data.error);
+            finished = true;
+          }
+        }
       }
     } catch (error) {
       console.error("Connection error:", error);
@@ -1,5 +1,5 @@
 // frontend/wai-wai/src/pages/Notifications.jsx
-import React, { useState, useEffect } from "react";
+import React, { useState, useEffect, useRef } from "react";
 import { useAuth } from "../context/AuthContext";
 import {
   FiBell,
@@ -20,6 +20,10 @@ const Notifications = () => {
   const { user } = useAuth();
   const [notifications, setNotifications] = useState([]);
   const [loading, setLoading] = useState(true);
+  const [nextCursor, setNextCursor] = useState(null);
+  const [loadingMore, setLoadingMore] = useState(false);
+  // Newest notification we have; polled with ?since= so only new ones come back
+  const latestCursor = useRef(null);
   const [filter, setFilter] = useState("all");
   const [showSettings, setShowSettings] = useState(false);
 
@@ -46,6 +50,8 @@ const Notifications = () => {
         return <FiZap className="notif-icon skill" />;
       case "INTERVIEW_REMINDER":
         return <FiCalendar className="notif-icon interview" />;
+      case "DIGEST":
+        return <FiClock className="notif-icon default" />;
       default:
         return <FiBell className="notif-icon default" />;
     }
@@ -55,17 +61,21 @@ const Notifications = () => {
     if (user?.email) {
       fetchNotifications();
       fetchPreferences();
+      const timer = setInterval(fetchNew, 30000);
+      return () => clearInterval(timer);
     }
   }, [user]);
 
-  const fetchNotifications = async () => {
-    setLoading(true);
+  const API_BASE = import.meta.env.VITE_API_BASE_URL || "http://127.0.0.1:5000";
+
+  const fetchNotifications = async (showLoading = true) => {
+    if (showLoading) setLoading(true);
     try {
-      const API_BASE =
-        import.meta.env.VITE_API_BASE_URL || "http://127.0.0.1:5000";
       const res = await fetch(`${API_BASE}/notifications/user/${user.email}`);
       const data = await res.json();
-      setNotifications(data);
+      setNotifications(data.notifications || []);
+      setNextCursor(data.next_cursor);
+      latestCursor.current = data.latest_cursor;
     } catch (err) {
       console.error("Failed to fetch notifications", err);
     } finally {
@@ -73,6 +83,45 @@ const Notifications = () => {
     }
   };
 
+  // Older page, starting right after the last one we have
+  const loadMore = async () => {
+    if (!nextCursor) return;
+    setLoadingMore(true);
+    try {
+      const res = await fetch(
+        `${API_BASE}/notifications/user/${user.email}?cursor=${encodeURIComponent(nextCursor)}`,
+      );
+      const data = await res.json();
+      setNotifications((prev) => [...prev, ...(data.notifications || [])]);
+      setNextCursor(data.next_cursor);
+    } catch (err) {
+      console.error("Failed to load more notifications", err);
+    } finally {
+      setLoadingMore(false);
+    }
+  };
+
+  // Only what arrived since the newest one we have
+  const fetchNew = async () => {
+    if (!latestCursor.current) return fetchNotifications(false);
+    try {
+      let hasMore = true;
+      while (hasMore) {
+        const res = await fetch(
+          `${API_BASE}/notifications/user/${user.email}?since=${encodeURIComponent(latestCursor.current)}`,
+        );
+        const data = await res.json();
+        if (data.notifications?.length) {
+          setNotifications((prev) => [...data.notifications, ...prev]);
+        }
+        latestCursor.current = data.latest_cursor;
+        hasMore = data.has_more;
+      }
+    } catch (err) {
+      console.error("Failed to fetch new notifications", err);
+    }
+  };
+
   const fetchPreferences = async () => {
     try {
       const API_BASE =
@@ -228,6 +277,15 @@ const Notifications = () => {
               <p>We'll notify you when we find matching jobs.</p>
             </div>
           )}
+          {!loading && nextCursor && (
+            <button
+              className="load-more-btn"
+              onClick={loadMore}
+              disabled={loadingMore}
+            >
+              {loadingMore ? "Loading..." : "Load older notifications"}
+            </button>
+          )}
         </div>
       </div>
 
@@ -285,12 +343,24 @@ const Notifications = () => {
                       </div>
                     )}
 
-                    {/* Fallback for other types or generic data */}
-                    {selectedNotification.type !== "JOB_MATCH" && (
-                      <pre className="generic-data">
-                        {JSON.stringify(selectedNotification.data, null, 2)}
-                      </pre>
+                    {selectedNotification.type === "DIGEST" && (
+                      <ul className="digest-list">
+                        {selectedNotification.data.items.map((item, i) => (
+                          <li key={i} className="data-item">
+                            <span className="label">{item.title}</span>
+                            <span className="value">{item.message}</span>
+                          </li>
+                        ))}
+                      </ul>
                     )}
+
+                    {/* Fallback for other types or generic data */}
+                    {selectedNotification.type !== "JOB_MATCH" &&
+                      selectedNotification.type !== "DIGEST" && (
+                        <pre className="generic-data">
+                          {JSON.stringify(selectedNotification.data, null, 2)}
+                        </pre>
+                      )}
                   </div>
                 )}
 
@@ -371,6 +441,7 @@ const Notifications = () => {
                 className="freq-select"
               >
                 <option value="immediate">Immediate</option>
+                <option value="hourly">Hourly Digest</option>
                 <option value="daily">Daily Digest</option>
                 <option value="weekly">Weekly Summary</option>
               </select>
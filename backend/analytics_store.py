@@ -0,0 +1,601 @@
+# backend/analytics_store.py
+"""Columnar application store used by the /analytics/* endpoints.
+
+Rows are kept sorted by application_date with pre-parsed timestamps, so a date
+window is two binary searches instead of a scan that re-parses every ISO string.
+Status and source are stored as small categorical codes.
+
+ApplicationAnalytics layers per-day rollups on top of the store; they are
+updated on every ingested event so window reads cost O(days), not O(rows).
+"""
+from array import array
+from bisect import bisect_left, bisect_right
+from collections import Counter
+from datetime import date, datetime, timedelta
+from threading import RLock
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+PIPELINE_STAGES = ["Applied", "Screening", "Interview", "Offer", "Hired"]
+APPLICATION_STATUSES = PIPELINE_STAGES + ["Rejected"]
+APPLICATION_SOURCES = ["LinkedIn", "Naukri", "Indeed", "Referral", "Company Website", "Glassdoor"]
+# Column ranges: status/source codes are array('B'), quality and time to hire array('h')
+MAX_CODES = 256
+MAX_SMALL_INT = 32767
+QUALITY_BUCKETS = [("40-50", 40, 50), ("51-60", 51, 60), ("61-70", 61, 70),
+                   ("71-80", 71, 80), ("81-90", 81, 90), ("91-100", 91, 100)]
+RECENT_LIMIT = 20
+DASHBOARD_PANELS = ["overview", "pipeline", "time_to_hire", "source_effectiveness",
+                    "candidate_quality", "recent_applications"]
+
+
+class WindowStats:
+    """Aggregates for a set of applications, mergeable across windows."""
+
+    def __init__(self):
+        self.total = 0
+        self.status: Counter = Counter()
+        self.source: Counter = Counter()
+        self.source_hired: Counter = Counter()
+        self.source_quality: Counter = Counter()
+        self.quality: Counter = Counter()
+        self.jobs: Counter = Counter()
+        self.hired_tth_sum = 0
+        self.hired_tth_count = 0
+
+    def merge(self, other: "WindowStats"):
+        self.total += other.total
+        self.status.update(other.status)
+        self.source.update(other.source)
+        self.source_hired.update(other.source_hired)
+        self.source_quality.update(other.source_quality)
+        self.quality.update(other.quality)
+        self.jobs.update(other.jobs)
+        self.hired_tth_sum += other.hired_tth_sum
+        self.hired_tth_count += other.hired_tth_count
+        return self
+
+    def add_row(self, row: Dict[str, Any], sign: int = 1):
+        """Count (sign=1) or un-count (sign=-1) a single application."""
+        status, source, quality = row["status"], row["source"], row["quality_score"]
+        self.total += sign
+        self.status[status] += sign
+        self.source[source] += sign
+        self.source_quality[source] += quality * sign
+        self.quality[quality] += sign
+        self.jobs[row["job_id"]] += sign
+        if status == "Hired":
+            self.source_hired[source] += sign
+            if row.get("time_to_hire_days"):
+                self.hired_tth_sum += row["time_to_hire_days"] * sign
+                self.hired_tth_count += sign
+
+
+class ApplicationStore:
+    """Column arrays of applications, sorted by application timestamp."""
+
+    def __init__(self, rows: Iterable[Dict[str, Any]] = ()):
+        self.statuses: List[str] = []
+        self.sources: List[str] = []
+        self._status_codes: Dict[str, int] = {}
+        self._source_codes: Dict[str, int] = {}
+        self.load(rows)
+
+    def __len__(self):
+        return len(self._ts)
+
+    # --- Encoding helpers ---
+    def _code(self, value: str, codes: Dict[str, int], names: List[str]) -> int:
+        code = codes.get(value)
+        if code is None:
+            if len(names) >= MAX_CODES:
+                raise ValueError(f"Too many distinct values (max {MAX_CODES}): {value!r}")
+            code = codes[value] = len(names)
+            names.append(value)
+        return code
+
+    def status_code(self, status: str) -> int:
+        return self._code(status, self._status_codes, self.statuses)
+
+    def source_code(self, source: str) -> int:
+        return self._code(source, self._source_codes, self.sources)
+
+    # --- Loading & mutation ---
+    def load(self, rows: Iterable[Dict[str, Any]]):
+        """Replace the store contents with `rows` (dicts shaped like MOCK_APPLICATIONS)."""
+        parsed = sorted(
+            ((_parse_ts(r["application_date"]), r) for r in rows),
+            key=lambda x: x[0],
+        )
+        self._ts = array("d", (ts for ts, _ in parsed))
+        self._ids = array("q", (r["id"] for _, r in parsed))
+        self._jobs = array("l", (r["job_id"] for _, r in parsed))
+        self._status = array("B", (self.status_code(r["status"]) for _, r in parsed))
+        self._source = array("B", (self.source_code(r["source"]) for _, r in parsed))
+        self._quality = array("h", (r["quality_score"] for _, r in parsed))
+        # 0 encodes "no time to hire" (the handlers treat 0 and None alike)
+        self._tth = array("h", (r.get("time_to_hire_days") or 0 for _, r in parsed))
+        self._names: List[str] = [r["candidate_name"] for _, r in parsed]
+        self._id_ts: Dict[int, float] = {r["id"]: ts for ts, r in parsed}
+        # Highest id ever inserted; kept on insert so new ids don't need a scan
+        self._max_id = max(self._id_ts, default=0)
+        # Joint codes, so every window aggregate is a single C-level Counter pass
+        self._source_status = array("H", map(_joint8, self._source, self._status))
+        self._source_quality = array("L", map(_joint, self._source, self._quality))
+        hired = self._status_codes.get("Hired", -1)
+        self._hired_tth = array("h", (t if s == hired else 0 for s, t in zip(self._status, self._tth)))
+
+    def encode(self, row: Dict[str, Any]) -> Tuple:
+        """Column values for `row`; raises ValueError (without touching any column) if one doesn't fit."""
+        ts = _parse_ts(row["application_date"])
+        quality = row["quality_score"]
+        tth = row.get("time_to_hire_days") or 0
+        for name, value in (("quality_score", quality), ("time_to_hire_days", tth)):
+            if not 0 <= value <= MAX_SMALL_INT:
+                raise ValueError(f"{name} out of range (0-{MAX_SMALL_INT}): {value}")
+        array("q", [row["id"]])
+        array("l", [row["job_id"]])
+        if row["status"] not in self._status_codes and len(self.statuses) >= MAX_CODES:
+            raise ValueError(f"Too many distinct statuses (max {MAX_CODES})")
+        if row["source"] not in self._source_codes and len(self.sources) >= MAX_CODES:
+            raise ValueError(f"Too many distinct sources (max {MAX_CODES})")
+        return ts, row["id"], row["job_id"], row["status"], row["source"], quality, tth, row["candidate_name"]
+
+    def insert(self, row: Dict[str, Any]) -> int:
+        """Insert one application keeping date order; returns its position."""
+        ts, app_id, job_id, status, source, quality, tth, name = self.encode(row)
+        status, source = self.status_code(status), self.source_code(source)
+        pos = bisect_right(self._ts, ts)
+        self._ts.insert(pos, ts)
+        self._ids.insert(pos, app_id)
+        self._jobs.insert(pos, job_id)
+        self._status.insert(pos, status)
+        self._source.insert(pos, source)
+        self._quality.insert(pos, quality)
+        self._tth.insert(pos, tth)
+        self._names.insert(pos, name)
+        self._source_status.insert(pos, _joint8(source, status))
+        self._source_quality.insert(pos, _joint(source, quality))
+        is_hired = status == self._status_codes.get("Hired", -1)
+        self._hired_tth.insert(pos, tth if is_hired else 0)
+        self._id_ts[app_id] = ts
+        self._max_id = max(self._max_id, app_id)
+        return pos
+
+    def position_of(self, app_id: int) -> Optional[int]:
+        ts = self._id_ts.get(app_id)
+        if ts is None:
+            return None
+        pos = bisect_left(self._ts, ts)
+        while self._ids[pos] != app_id:
+            pos += 1
+        return pos
+
+    def remove(self, app_id: int) -> Optional[Dict[str, Any]]:
+        """Delete an application by id; returns the removed row (or None)."""
+        pos = self.position_of(app_id)
+        if pos is None:
+            return None
+        row = self.row(pos)
+        for column in (self._ts, self._ids, self._jobs, self._status, self._source, self._quality,
+                       self._tth, self._names, self._source_status, self._source_quality, self._hired_tth):
+            del column[pos]
+        del self._id_ts[app_id]
+        return row
+
+    def max_id(self) -> int:
+        return self._max_id
+
+    # --- Reads ---
+    def window(self, start: Optional[datetime] = None, end: Optional[datetime] = None) -> Tuple[int, int]:
+        """Row range [lo, hi) with start <= application_date < end."""
+        lo = bisect_left(self._ts, start.timestamp()) if start else 0
+        hi = bisect_left(self._ts, end.timestamp()) if end else len(self._ts)
+        return lo, max(lo, hi)
+
+    def last_ts(self) -> Optional[float]:
+        return self._ts[-1] if self._ts else None
+
+    def row(self, i: int) -> Dict[str, Any]:
+        tth = self._tth[i]
+        return {
+            "id": self._ids[i],
+            "job_id": self._jobs[i],
+            "candidate_name": self._names[i],
+            "source": self.sources[self._source[i]],
+            "status": self.statuses[self._status[i]],
+            "quality_score": self._quality[i],
+            "application_date": datetime.fromtimestamp(self._ts[i]).isoformat(),
+            "time_to_hire_days": tth or None,
+        }
+
+    def stats(self, lo: int, hi: int) -> WindowStats:
+        """Aggregate rows [lo, hi) into a WindowStats."""
+        out = WindowStats()
+        if hi <= lo:
+            return out
+        out.total = hi - lo
+        statuses, sources = self.statuses, self.sources
+        hired = self._status_codes.get("Hired", -1)
+        for code, n in Counter(self._source_status[lo:hi]).items():
+            src, status = code >> 8, code & 0xFF
+            out.source[sources[src]] += n
+            out.status[statuses[status]] += n
+            if status == hired:
+                out.source_hired[sources[src]] += n
+        for code, n in Counter(self._source_quality[lo:hi]).items():
+            src, quality = code >> 16, code & 0xFFFF
+            out.source_quality[sources[src]] += quality * n
+            out.quality[quality] += n
+        for tth, n in Counter(self._hired_tth[lo:hi]).items():
+            if tth:
+                out.hired_tth_sum += tth * n
+                out.hired_tth_count += n
+        out.jobs = Counter(self._jobs[lo:hi])
+        return out
+
+    def hired_weekly(self, lo: int, hi: int) -> Dict[str, List[int]]:
+        """[sum, count] of time-to-hire for hired rows in [lo, hi), keyed by "%Y-W%U" week.
+
+        Walks the range one calendar day at a time, so each day is a bisect plus a
+        C-level Counter over its slice rather than a per-row datetime conversion.
+        """
+        weekly: Dict[str, List[int]] = {}
+        if hi <= lo:
+            return weekly
+        day = datetime.fromtimestamp(self._ts[lo]).date()
+        start = lo
+        while start < hi:
+            next_day = day + timedelta(days=1)
+            end = min(hi, bisect_left(self._ts, datetime.combine(next_day, datetime.min.time()).timestamp(), start))
+            for tth, n in Counter(self._hired_tth[start:end]).items():
+                if tth:
+                    bucket = weekly.setdefault(day.strftime("%Y-W%U"), [0, 0])
+                    bucket[0] += tth * n
+                    bucket[1] += n
+            start, day = end, next_day
+        return weekly
+
+    def recent(self, lo: int, hi: int, limit: int = RECENT_LIMIT) -> List[int]:
+        """Positions of the newest `limit` rows in [lo, hi), newest first.
+
+        Rows sharing a timestamp keep insertion order, like a stable reverse sort.
+        """
+        out: List[int] = []
+        end = hi
+        while end > lo and len(out) < limit:
+            start = max(lo, bisect_left(self._ts, self._ts[end - 1]))
+            out.extend(range(start, end))
+            end = start
+        return out[:limit]
+
+    def job_rows(self, job_id: int) -> List[int]:
+        return [i for i, j in enumerate(self._jobs) if j == job_id]
+
+    def status_of(self, i: int) -> str:
+        return self.statuses[self._status[i]]
+
+    def quality_of(self, i: int) -> int:
+        return self._quality[i]
+
+    def tth_of(self, i: int) -> int:
+        return self._tth[i]
+
+
+def _joint8(high: int, low: int) -> int:
+    return (high << 8) | low
+
+
+def _joint(high: int, low: int) -> int:
+    return (high << 16) | (low & 0xFFFF)
+
+
+def _parse_ts(value) -> float:
+    if isinstance(value, datetime):
+        return value.timestamp()
+    return datetime.fromisoformat(value).timestamp()
+
+
+# ==========================================
+# Incremental daily rollups
+# ==========================================
+
+class ApplicationAnalytics:
+    """ApplicationStore plus per-day WindowStats kept current on every ingest.
+
+    A window read merges the rollups of the whole days it covers and only
+    touches raw rows for the two partial days at its edges.
+    """
+
+    def __init__(self, rows: Iterable[Dict[str, Any]] = ()):
+        self.store = ApplicationStore()
+        self._days: Dict[int, WindowStats] = {}
+        self._lock = RLock()
+        self.load(rows)
+
+    def load(self, rows: Iterable[Dict[str, Any]]):
+        rows = list(rows)
+        with self._lock:
+            self.store = ApplicationStore(rows)
+            self._days = {}
+            for row in rows:
+                self._roll(row, 1)
+
+    def _roll(self, row: Dict[str, Any], sign: int):
+        day = _parse_day(row["application_date"])
+        stats = self._days.get(day)
+        if stats is None:
+            stats = self._days[day] = WindowStats()
+        stats.add_row(row, sign)
+        if not stats.total:
+            del self._days[day]
+
+    def ingest(self, event: Dict[str, Any]) -> Tuple[Dict[str, Any], bool]:
+        """Append a new application or update an existing one (matched by id).
+
+        Returns (row, created). New rows need job_id, source, status and quality_score.
+        """
+        row, existing = self._apply(event)
+        return row, existing is None
+
+    def ingest_many(self, events: List[Dict[str, Any]]) -> List[Tuple[Dict[str, Any], bool]]:
+        """ingest() for a batch, all or nothing: if any event raises, the earlier ones are undone."""
+        with self._lock:
+            applied = []
+            max_id = self.store.max_id()
+            try:
+                for event in events:
+                    applied.append(self._apply(event))
+            except Exception:
+                for row, existing in reversed(applied):
+                    self.store.remove(row["id"])
+                    self._roll(row, -1)
+                    if existing is not None:
+                        self.store.insert(existing)
+                        self._roll(existing, 1)
+                self.store._max_id = max_id
+                raise
+            return [(row, existing is None) for row, existing in applied]
+
+    def _apply(self, event: Dict[str, Any]) -> Tuple[Dict[str, Any], Optional[Dict[str, Any]]]:
+        """Applies one event; returns the new row and the row it replaced (None if created)."""
+        fields = {k: v for k, v in event.items() if v is not None}
+        if isinstance(fields.get("application_date"), datetime):
+            fields["application_date"] = fields["application_date"].isoformat()
+        with self._lock:
+            app_id = fields.get("id")
+            pos = self.store.position_of(app_id) if app_id is not None else None
+            existing = self.store.row(pos) if pos is not None else None
+            if existing:
+                row = {**existing, **fields}
+            else:
+                missing = [k for k in ("job_id", "source", "status", "quality_score") if k not in fields]
+                if missing:
+                    raise ValueError(f"New application is missing fields: {', '.join(missing)}")
+                app_id = app_id if app_id is not None else self.store.max_id() + 1
+                row = {
+                    "id": app_id,
+                    "candidate_name": f"Candidate {app_id}",
+                    "application_date": datetime.now().isoformat(),
+                    "time_to_hire_days": None,
+                    **fields,
+                }
+            # Check every column value before removing the old row, so a bad event changes nothing
+            try:
+                self.store.encode(row)
+            except (OverflowError, TypeError) as e:
+                raise ValueError(f"Invalid application {app_id}: {e}")
+            if existing:
+                self.store.remove(app_id)
+                self._roll(existing, -1)
+            try:
+                self.store.insert(row)
+            except Exception:
+                if existing:
+                    self.store.insert(existing)
+                    self._roll(existing, 1)
+                raise
+            self._roll(row, 1)
+            return row, existing
+
+    def _split(self, start: datetime, end: Optional[datetime]):
+        """Split [start, end) into a leading partial day, whole days and a trailing partial day."""
+        first_full = start.date() + timedelta(days=1)
+        if end is None:
+            last_ts = self.store.last_ts()
+            last_full = datetime.fromtimestamp(last_ts).date() if last_ts else start.date()
+            tail = None
+        else:
+            last_full = end.date() - timedelta(days=1)
+            tail = (_midnight(end.date()), end)
+        head_end = _midnight(first_full)
+        if end is not None and end <= head_end:
+            return (start, end), [], None
+        days = range(first_full.toordinal(), last_full.toordinal() + 1)
+        return (start, head_end), days, tail
+
+    def window_stats(self, start: datetime, end: Optional[datetime] = None) -> WindowStats:
+        with self._lock:
+            head, days, tail = self._split(start, end)
+            out = self.store.stats(*self.store.window(*head))
+            for day in days:
+                stats = self._days.get(day)
+                if stats:
+                    out.merge(stats)
+            if tail:
+                out.merge(self.store.stats(*self.store.window(*tail)))
+            return out
+
+    def hired_weekly(self, start: datetime, end: Optional[datetime] = None) -> Dict[str, List[int]]:
+        with self._lock:
+            head, days, tail = self._split(start, end)
+            weekly = self.store.hired_weekly(*self.store.window(*head))
+            for day in days:
+                stats = self._days.get(day)
+                if stats and stats.hired_tth_count:
+                    bucket = weekly.setdefault(date.fromordinal(day).strftime("%Y-W%U"), [0, 0])
+                    bucket[0] += stats.hired_tth_sum
+                    bucket[1] += stats.hired_tth_count
+            if tail:
+                for week, (total, count) in self.store.hired_weekly(*self.store.window(*tail)).items():
+                    bucket = weekly.setdefault(week, [0, 0])
+                    bucket[0] += total
+                    bucket[1] += count
+            return weekly
+
+    def recent(self, start: datetime, limit: int = RECENT_LIMIT) -> List[Dict[str, Any]]:
+        with self._lock:
+            lo, hi = self.store.window(start)
+            return [self.store.row(i) for i in self.store.recent(lo, hi, limit)]
+
+    def job(self, job_id: int) -> Dict[str, Any]:
+        with self._lock:
+            return build_job_analytics(self.store, job_id)
+
+    def dashboard(self, panels: Optional[List[str]] = None, now: Optional[datetime] = None) -> Dict[str, Any]:
+        """Build the requested panels from one shared pass over each window.
+
+        The 30-day stats feed overview, pipeline, sources and quality alike, so
+        they are aggregated once instead of once per panel.
+        """
+        panels = panels or DASHBOARD_PANELS
+        bounds = window_bounds(now)
+        out: Dict[str, Any] = {}
+        with self._lock:
+            recent = None
+            if {"overview", "pipeline", "source_effectiveness", "candidate_quality"} & set(panels):
+                recent = self.window_stats(bounds["thirty_days_ago"])
+            if "overview" in panels:
+                previous = self.window_stats(bounds["sixty_days_ago"], bounds["thirty_days_ago"])
+                out["overview"] = build_overview(recent, previous)
+            if "pipeline" in panels:
+                out["pipeline"] = build_pipeline(recent)
+            if "time_to_hire" in panels:
+                out["time_to_hire"] = build_time_to_hire(self.hired_weekly(bounds["ninety_days_ago"]))
+            if "source_effectiveness" in panels:
+                out["source_effectiveness"] = build_source_effectiveness(recent)
+            if "candidate_quality" in panels:
+                out["candidate_quality"] = build_candidate_quality(recent)
+            if "recent_applications" in panels:
+                out["recent_applications"] = build_recent_applications(self.recent(bounds["thirty_days_ago"]))
+        return out
+
+
+def _midnight(day: date) -> datetime:
+    return datetime.combine(day, datetime.min.time())
+
+
+def _parse_day(value) -> int:
+    # Same local-time day the store's timestamps bisect against
+    return datetime.fromtimestamp(_parse_ts(value)).date().toordinal()
+
+
+# ==========================================
+# Panel builders (shared by the /analytics/* handlers)
+# ==========================================
+
+def build_overview(recent: WindowStats, previous: WindowStats) -> Dict[str, Any]:
+    total_recent = recent.total
+    total_previous = previous.total
+
+    applications_change = "+100%"
+    if total_previous > 0:
+        change = ((total_recent - total_previous) / total_previous) * 100
+        applications_change = f"{'+' if change >= 0 else ''}{int(change)}%"
+
+    active_jobs = sum(1 for n in recent.jobs.values() if n)
+    avg_time_to_hire = int(recent.hired_tth_sum / recent.hired_tth_count) if recent.hired_tth_count else 18
+
+    hired = recent.status.get("Hired", 0)
+    offers = recent.status.get("Offer", 0) + hired
+    offer_acceptance_rate = int((hired / offers) * 100) if offers else 75
+
+    source_counts = {k: v for k, v in recent.source.items() if v}
+    top_source = max(source_counts, key=source_counts.get) if source_counts else "LinkedIn"
+
+    return {
+        "period": "last_30_days",
+        "metrics": {
+            "total_applications": total_recent,
+            "applications_change": applications_change,
+            "active_jobs": active_jobs,
+            "avg_time_to_hire_days": avg_time_to_hire,
+            "offer_acceptance_rate": offer_acceptance_rate,
+            "top_source": top_source
+        }
+    }
+
+
+def build_pipeline(recent: WindowStats) -> Dict[str, Any]:
+    return {"pipeline": [{"stage": stage, "count": recent.status.get(stage, 0)} for stage in PIPELINE_STAGES]}
+
+
+def build_time_to_hire(weekly: Dict[str, List[int]]) -> Dict[str, Any]:
+    time_series = []
+    for week, (total, count) in sorted(weekly.items()):
+        avg_time = total / count
+        time_series.append({"week": week, "avg_days": round(avg_time, 1)})
+    return {"time_series": time_series}
+
+
+def build_source_effectiveness(recent: WindowStats) -> Dict[str, Any]:
+    sources = []
+    for source, applications in recent.source.items():
+        if not applications:
+            continue
+        hired = recent.source_hired.get(source, 0)
+        avg_quality = recent.source_quality.get(source, 0) / applications
+        conversion_rate = (hired / applications) * 100
+        sources.append({
+            "source": source, "applications": applications, "hired": hired,
+            "conversion_rate": round(conversion_rate, 1), "avg_quality_score": round(avg_quality, 1)
+        })
+    return {"sources": sorted(sources, key=lambda x: x["applications"], reverse=True)}
+
+
+def build_candidate_quality(recent: WindowStats) -> Dict[str, Any]:
+    buckets = {label: 0 for label, _, _ in QUALITY_BUCKETS}
+    for score, n in recent.quality.items():
+        for label, low, high in QUALITY_BUCKETS:
+            if low <= score <= high:
+                buckets[label] += n
+                break
+    return {"distribution": [{"range": k, "count": v} for k, v in buckets.items()]}
+
+
+def build_recent_applications(rows: List[Dict[str, Any]]) -> Dict[str, Any]:
+    formatted = []
+    for app in rows:
+        formatted.append({
+            "id": app["id"], "candidate": app["candidate_name"], "job_id": app["job_id"],
+            "source": app["source"], "status": app["status"], "quality_score": app["quality_score"],
+            "date": app["application_date"][:10]
+        })
+    return {"applications": formatted}
+
+
+def build_job_analytics(store: ApplicationStore, job_id: int) -> Dict[str, Any]:
+    positions = store.job_rows(job_id)
+    if not positions: return {"error": "Job not found"}
+
+    status_counts: Dict[str, int] = {}
+    for i in positions:
+        status = store.status_of(i)
+        status_counts[status] = status_counts.get(status, 0) + 1
+
+    hired_tth = [store.tth_of(i) for i in positions if store.status_of(i) == "Hired" and store.tth_of(i)]
+    avg_time_to_hire = int(sum(hired_tth) / len(hired_tth)) if hired_tth else 0
+    avg_quality = sum(store.quality_of(i) for i in positions) / len(positions)
+
+    return {
+        "job_id": job_id, "total_applications": len(positions), "status_breakdown": status_counts,
+        "avg_time_to_hire_days": avg_time_to_hire, "avg_quality_score": round(avg_quality, 1), "hired_count": len(hired_tth)
+    }
+
+
+def window_bounds(now: Optional[datetime] = None) -> Dict[str, datetime]:
+    now = now or datetime.now()
+    return {
+        "thirty_days_ago": now - timedelta(days=30),
+        "sixty_days_ago": now - timedelta(days=60),
+        "ninety_days_ago": now - timedelta(days=90),
+    }
@@ -0,0 +1,148 @@
+# backend/bench_analytics.py
+"""Benchmark: columnar store / daily rollups vs. the original list-of-dicts scans.
+
+Usage:  python bench_analytics.py [rows ...]     (default: 500 50000 500000)
+"""
+import random
+import sys
+import time
+from datetime import datetime, timedelta
+
+from analytics_store import (
+    ApplicationAnalytics, window_bounds, build_overview, build_pipeline, build_time_to_hire,
+    build_source_effectiveness, build_candidate_quality, build_recent_applications,
+)
+
+SOURCES = ["LinkedIn", "Naukri", "Indeed", "Referral", "Company Website", "Glassdoor"]
+STATUSES = ["Applied", "Screening", "Interview", "Offer", "Hired", "Rejected"]
+
+
+def generate(n):
+    base_date = datetime.now() - timedelta(days=90)
+    rows = []
+    for i in range(n):
+        status = random.choices(STATUSES, weights=[30, 25, 20, 10, 8, 7])[0]
+        rows.append({
+            "id": i + 1,
+            "job_id": random.randint(1, 10),
+            "candidate_name": f"Candidate {i + 1}",
+            "source": random.choice(SOURCES),
+            "status": status,
+            "quality_score": random.randint(45, 98),
+            "application_date": (base_date + timedelta(days=random.randint(0, 89), seconds=random.randint(0, 86399))).isoformat(),
+            "time_to_hire_days": random.randint(7, 35) if status == "Hired" else None,
+        })
+    return rows
+
+
+# --- Original handlers (list-of-dicts, fromisoformat per row per request) ---
+
+def legacy_overview(apps):
+    thirty_days_ago = datetime.now() - timedelta(days=30)
+    sixty_days_ago = datetime.now() - timedelta(days=60)
+    recent_apps = [app for app in apps if datetime.fromisoformat(app["application_date"]) >= thirty_days_ago]
+    previous_apps = [app for app in apps if sixty_days_ago <= datetime.fromisoformat(app["application_date"]) < thirty_days_ago]
+    hired_apps = [app for app in recent_apps if app["status"] == "Hired" and app["time_to_hire_days"]]
+    offers = [app for app in recent_apps if app["status"] in ["Offer", "Hired"]]
+    source_counts = {}
+    for app in recent_apps:
+        source_counts[app["source"]] = source_counts.get(app["source"], 0) + 1
+    return len(recent_apps), len(previous_apps), len(hired_apps), len(offers), len(set(app["job_id"] for app in recent_apps))
+
+
+def legacy_pipeline(apps):
+    thirty_days_ago = datetime.now() - timedelta(days=30)
+    pipeline = {}
+    for app in [app for app in apps if datetime.fromisoformat(app["application_date"]) >= thirty_days_ago]:
+        pipeline[app["status"]] = pipeline.get(app["status"], 0) + 1
+    return pipeline
+
+
+def legacy_time_to_hire(apps):
+    ninety_days_ago = datetime.now() - timedelta(days=90)
+    weekly_data = {}
+    for app in apps:
+        if app["status"] == "Hired" and app["time_to_hire_days"]:
+            app_date = datetime.fromisoformat(app["application_date"])
+            if app_date >= ninety_days_ago:
+                weekly_data.setdefault(app_date.strftime("%Y-W%U"), []).append(app["time_to_hire_days"])
+    return weekly_data
+
+
+def legacy_source_effectiveness(apps):
+    thirty_days_ago = datetime.now() - timedelta(days=30)
+    stats = {}
+    for app in [app for app in apps if datetime.fromisoformat(app["application_date"]) >= thirty_days_ago]:
+        s = stats.setdefault(app["source"], {"applications": 0, "hired": 0, "avg_quality": []})
+        s["applications"] += 1
+        if app["status"] == "Hired": s["hired"] += 1
+        s["avg_quality"].append(app["quality_score"])
+    return stats
+
+
+def legacy_candidate_quality(apps):
+    thirty_days_ago = datetime.now() - timedelta(days=30)
+    recent_apps = [app for app in apps if datetime.fromisoformat(app["application_date"]) >= thirty_days_ago]
+    return [app["quality_score"] for app in recent_apps]
+
+
+def legacy_recent(apps):
+    thirty_days_ago = datetime.now() - timedelta(days=30)
+    recent_apps = [app for app in apps if datetime.fromisoformat(app["application_date"]) >= thirty_days_ago]
+    return sorted(recent_apps, key=lambda x: x["application_date"], reverse=True)[:20]
+
+
+LEGACY = [legacy_overview, legacy_pipeline, legacy_time_to_hire,
+          legacy_source_effectiveness, legacy_candidate_quality, legacy_recent]
+
+
+def columnar_dashboard(store):
+    bounds = window_bounds()
+    recent_window = store.window(bounds["thirty_days_ago"])
+    recent = store.stats(*recent_window)
+    previous = store.stats(*store.window(bounds["sixty_days_ago"], bounds["thirty_days_ago"]))
+    build_overview(recent, previous)
+    build_pipeline(store.stats(*recent_window))
+    build_time_to_hire(store.hired_weekly(*store.window(bounds["ninety_days_ago"])))
+    build_source_effectiveness(store.stats(*recent_window))
+    build_candidate_quality(store.stats(*recent_window))
+    build_recent_applications([store.row(i) for i in store.recent(*recent_window)])
+
+
+def rollup_dashboard(analytics):
+    bounds = window_bounds()
+    build_overview(analytics.window_stats(bounds["thirty_days_ago"]),
+                   analytics.window_stats(bounds["sixty_days_ago"], bounds["thirty_days_ago"]))
+    build_pipeline(analytics.window_stats(bounds["thirty_days_ago"]))
+    build_time_to_hire(analytics.hired_weekly(bounds["ninety_days_ago"]))
+    build_source_effectiveness(analytics.window_stats(bounds["thirty_days_ago"]))
+    build_candidate_quality(analytics.window_stats(bounds["thirty_days_ago"]))
+    build_recent_applications(analytics.recent(bounds["thirty_days_ago"]))
+
+
+def timed(fn, repeat=3):
+    best = float("inf")
+    for _ in range(repeat):
+        t0 = time.perf_counter()
+        fn()
+        best = min(best, time.perf_counter() - t0)
+    return best
+
+
+def main():
+    sizes = [int(a) for a in sys.argv[1:]] or [500, 50_000, 500_000]
+    print(f"{'rows':>10} {'legacy':>11} {'columnar':>11} {'rollups':>11} {'speedup':>9} {'build':>8}")
+    for n in sizes:
+        rows = generate(n)
+        t0 = time.perf_counter()
+        analytics = ApplicationAnalytics(rows)
+        build = time.perf_counter() - t0
+        legacy = timed(lambda: [fn(rows) for fn in LEGACY])
+        columnar = timed(lambda: columnar_dashboard(analytics.store))
+        rollups = timed(lambda: rollup_dashboard(analytics))
+        print(f"{n:>10} {legacy * 1000:>9.1f}ms {columnar * 1000:>9.1f}ms {rollups * 1000:>9.1f}ms "
+              f"{legacy / rollups:>8.1f}x {build:>7.2f}s")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,155 @@
+# backend/bench_job_search.py
+"""Benchmark: indexed JobCatalog.search vs. filtering and sorting the full list per query
+(what JobDashboard.jsx did in the browser).
+
+Checks that paging through every result with the cursor returns exactly what the
+brute-force scan returns, then times both.
+
+Usage:  python bench_job_search.py [jobs ...]     (default: 20000 1000000)
+"""
+import random
+import re
+import sys
+import time
+from datetime import datetime, timedelta, timezone
+
+from job_search import JobCatalog, match_score, _timestamp
+
+LOCATIONS = ["Remote", "Bangalore, India", "Hyderabad, India", "Mumbai, India", "Pune, India", "Delhi, India"]
+TYPES = ["Full-time", "Part-time", "Contract", "Internship", "Remote", "Hybrid"]
+SKILLS = ["React", "JavaScript", "Tailwind CSS", "Python", "Django", "FastAPI", "Node.js", "AWS", "Docker",
+          "Kubernetes", "SQL", "PostgreSQL", "MongoDB", "TypeScript", "Java", "Spring Boot", "Go", "Redis",
+          "GraphQL", "Figma", "Machine Learning", "TensorFlow", "Flutter", "Kotlin", "Swift", "Rust"]
+TITLES = ["Frontend Developer", "Backend Engineer", "Full Stack Developer", "Data Scientist", "DevOps Engineer",
+          "Mobile Developer", "UI/UX Designer", "ML Engineer", "QA Engineer", "Product Analyst"]
+COMPANIES = ["TechCorp Solutions", "Innovate Labs", "DataWorks", "CloudNine Systems", "PixelPerfect", "Acme Inc"]
+WORDS = ["build", "scalable", "services", "team", "responsive", "applications", "pipelines", "customers",
+         "platform", "design", "secure", "APIs", "mentor", "ship", "features", "analytics", "cloud", "mobile"]
+SEARCHES = ["", "dev", "developer", "backend engineer", "data", "cloud", "techcorp", "full stack de", "zzz"]
+WORD_RE = re.compile(r"\w+")
+
+
+def generate(n, seed=7):
+    rng = random.Random(seed)
+    base = datetime(2023, 1, 1, tzinfo=timezone.utc)
+    jobs = []
+    for i in range(n):
+        salary = rng.randrange(300_000, 4_000_000, 50_000)
+        jobs.append({
+            "id": i + 1,
+            "title": rng.choice(TITLES),
+            "company": rng.choice(COMPANIES),
+            "location": rng.choice(LOCATIONS),
+            "salary": salary,
+            "salaryMax": salary + rng.randrange(0, 1_500_000, 50_000),
+            "experience": rng.randint(0, 12),
+            "skills": rng.sample(SKILLS, rng.randint(1, 6)),
+            "type": rng.choice(TYPES),
+            "postedDate": (base + timedelta(minutes=rng.randint(0, 600_000))).strftime("%Y-%m-%dT%H:%M:%SZ"),
+            "matchScore": 0,
+            "description": " ".join(rng.choices(WORDS, k=rng.randint(6, 14))) + f" ref{rng.randint(1, n)}",
+        })
+    return jobs
+
+
+def random_query(rng):
+    return {
+        "q": rng.choice(SEARCHES),
+        "locations": rng.sample(LOCATIONS, rng.choice([0, 0, 1, 2])),
+        "types": rng.sample(TYPES, rng.choice([0, 0, 1, 2])),
+        "skills": rng.sample(SKILLS, rng.choice([0, 0, 1, 3])),
+        "max_experience": rng.choice([None, 10, 3]),
+        "min_salary": rng.choice([None, 0, 1_500_000, 4_500_000]),
+        "posted_after": rng.choice([None, datetime(2023, 12, 1, tzinfo=timezone.utc)]),
+        "sort": rng.choice(["relevance", "match", "salary", "date"]),
+        "user_skills": rng.sample(SKILLS + ["js", "Spring"], rng.choice([0, 2, 5])),
+    }
+
+
+# --- Reference: scan and sort the whole list per query ---
+
+def brute_force(jobs, q="", locations=(), types=(), skills=(), max_experience=None, min_salary=None,
+                posted_after=None, sort="relevance", user_skills=()):
+    words = WORD_RE.findall(q.lower())
+    wanted_skills = {s.lower().strip() for s in skills}
+    user = [s for s in dict.fromkeys(s.lower().strip() for s in user_skills) if s]
+    after = posted_after.timestamp() if posted_after else None
+    out = []
+    for job in jobs:
+        if locations and job["location"] not in locations:
+            continue
+        if types and job["type"] not in types:
+            continue
+        job_skills = list(dict.fromkeys(s.lower().strip() for s in job["skills"]))
+        if wanted_skills and not wanted_skills.intersection(job_skills):
+            continue
+        if max_experience is not None and job["experience"] > max_experience:
+            continue
+        if min_salary is not None and job["salaryMax"] < min_salary:
+            continue
+        if after is not None and _timestamp(job["postedDate"]) < after:
+            continue
+        if words:
+            tokens = set(WORD_RE.findall(f"{job['title']} {job['company']} {job['description']}".lower()))
+            *exact, last = words
+            if not all(w in tokens for w in exact):
+                continue
+            if not (any(t.startswith(last) for t in tokens) if len(last) >= 2 else last in tokens):
+                continue
+        score = match_score(job_skills, user)[0] if user else 0
+        out.append((score, job))
+    if sort == "match" and user:
+        out.sort(key=lambda x: -x[0])
+    elif sort == "salary":
+        out.sort(key=lambda x: x[1]["salary"], reverse=True)
+    elif sort == "date":
+        out.sort(key=lambda x: _timestamp(x[1]["postedDate"]), reverse=True)
+    return [(job["id"], score) for score, job in out]
+
+
+def page_all(catalog, query, limit):
+    ids, cursor = [], None
+    while True:
+        page = catalog.search(**query, limit=limit, cursor=cursor)
+        ids += [(job["id"], job["matchScore"]) for job in page["jobs"]]
+        cursor = page["next_cursor"]
+        if not cursor:
+            return ids, page["total"]
+
+
+def main():
+    sizes = [int(a) for a in sys.argv[1:]] or [20_000, 1_000_000]
+    rng = random.Random(3)
+    for n in sizes:
+        jobs = generate(n)
+        t0 = time.perf_counter()
+        catalog = JobCatalog(jobs)
+        build = time.perf_counter() - t0
+
+        queries = [random_query(rng) for _ in range(40)]
+        if n <= 50_000:
+            for query in queries:
+                expected = brute_force(jobs, **query)
+                got, total = page_all(catalog, query, limit=rng.choice([7, 12, 50]))
+                assert total == len(expected) and got == expected, query
+            print(f"✅ {n} jobs: paged results identical to a full scan on {len(queries)} queries")
+
+        t0 = time.perf_counter()
+        for query in queries[:10]:
+            brute_force(jobs, **query)
+        scan = (time.perf_counter() - t0) / 10
+        timings = []
+        for query in queries:
+            t0 = time.perf_counter()
+            page = catalog.search(**query, limit=12)
+            if page["next_cursor"]:
+                catalog.search(**query, limit=12, cursor=page["next_cursor"])
+            timings.append((time.perf_counter() - t0) / 2)
+        timings.sort()
+        print(f"{n:>9} jobs  build {build:.1f}s  full scan {scan * 1000:.0f}ms/query  "
+              f"indexed p50 {timings[len(timings) // 2] * 1000:.1f}ms  p95 {timings[int(len(timings) * .95)] * 1000:.1f}ms "
+              f"max {timings[-1] * 1000:.1f}ms")
+
+
+if __name__ == "__main__":
+    main()
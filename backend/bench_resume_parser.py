@@ -0,0 +1,210 @@
+# backend/bench_resume_parser.py
+"""Benchmark: single-pass resume_parser.parse_resume_text vs. the original multi-scan version.
+
+Builds a synthetic corpus, checks both parsers return identical output for
+every resume, then reports throughput.
+
+Usage:  python bench_resume_parser.py [resumes]     (default: 10000)
+"""
+import random
+import re
+import sys
+import time
+from typing import Any, Dict, List
+
+from resume_parser import RESUME_SECTION_HEADERS, parse_resume_text
+
+FIRST = ["Aarav", "Priya", "Jane", "Rahul", "Li", "Carlos", "Fatima", "John", "Ananya", "Omar"]
+LAST = ["Sharma", "Doe", "Patel", "Chen", "Garcia", "Khan", "Smith", "Iyer", "Okafor", "Mehta"]
+SKILLS = ["Python", "FastAPI", "Django", "React", "Node.js", "Docker", "Kubernetes", "AWS", "SQL",
+          "TypeScript", "Java", "Spring", "Go", "Redis", "GraphQL", "Terraform", "ML", "Pandas"]
+COMPANIES = ["Acme Inc.", "Globex LLC", "Initech Pvt.", "Umbrella Technologies", "Hooli Solutions", "Stark Ltd."]
+BULLET = ["- ", "* ", "• ", ""]
+
+
+def synthetic_resume(rng: random.Random) -> str:
+    lines = []
+    if rng.random() < 0.3:
+        lines.append(rng.choice(["Resume", "Curriculum Vitae", "CV - Page 1"]))
+    lines.append(f"{rng.choice(FIRST)} {rng.choice(LAST)}")
+    lines.append(f"{rng.choice(FIRST).lower()}.{rng.randint(1, 99)}@example.com")
+    lines.append(rng.choice(["+91 98765 43210", "(555) 123-4567", "555.123.4567", "+1 555 123 4567"]))
+    lines.append("")
+    sections = [key for key, _ in RESUME_SECTION_HEADERS]
+    rng.shuffle(sections)
+    variants = dict(RESUME_SECTION_HEADERS)
+    for key in sections + ([rng.choice(sections)] if rng.random() < 0.1 else []):
+        header = rng.choice(variants[key])
+        lines.append(rng.choice([header.upper(), header.title() + ":", header]))
+        if key == "skills":
+            for _ in range(rng.randint(1, 4)):
+                picks = rng.sample(SKILLS, rng.randint(2, 6))
+                lines.append(rng.choice(BULLET) + rng.choice([", ", "; ", ","]).join(picks) + rng.choice(["", "."]))
+        elif key == "experience":
+            for _ in range(rng.randint(1, 6)):
+                lines.append(rng.choice([
+                    f"Software Engineer @ {rng.choice(COMPANIES)} ({rng.randint(2010, 2024)} - Present)",
+                    f"{rng.choice(BULLET)}Built {rng.choice(SKILLS)} services handling {rng.randint(1, 900)}k requests/day",
+                    f"Intern at {rng.choice(COMPANIES)}",
+                    "Team lead",
+                ]))
+        elif key == "education":
+            lines.append(rng.choice(["B.Tech Computer Science, IIT Delhi", "BSc Mathematics", "MS CS, Stanford"]))
+            lines.append(str(rng.randint(2008, 2022)))
+        else:
+            for _ in range(rng.randint(1, 4)):
+                lines.append(rng.choice(BULLET) + f"{rng.choice(SKILLS)} dashboard for {rng.choice(COMPANIES)}")
+        lines.append("")
+    return "\n".join(lines)
+
+
+# --- Original implementation (verbatim), kept for the identity check and baseline timing ---
+
+def legacy_parse_resume_text(text: str) -> Dict[str, Any]:
+    """Parse resume text to extract name/email/phone and sections.
+    Returns dict with keys: name, email, phone, education, skills, experience, projects.
+    """
+    data = {
+        "name": "Candidate",
+        "email": "",
+        "phone": "",
+        "education": "",
+        "skills": [],
+        "experience": [],
+        "projects": []
+    }
+
+    if not text:
+        return data
+
+    lines = [l.strip() for l in text.splitlines()]
+    lines = [l for l in lines if l]
+
+    # Name: first non-header reasonable line
+    for i in range(min(5, len(lines))):
+        l = lines[i]
+        if any(k in l.lower() for k in ["resume", "curriculum", "cv", "page"]):
+            continue
+        if 3 < len(l) < 60 and not any(c.isdigit() for c in l):
+            data["name"] = l
+            break
+
+    # Email and Phone
+    email_match = re.search(r'[A-Za-z0-9._%+-]+@[A-Za-z0-9.-]+\.[A-Za-z]{2,}', text)
+    if email_match:
+        data["email"] = email_match.group(0)
+    phone_match = re.search(r'(\+?\d{1,3}[\s.-]?)?\(?\d{3}\)?[\s.-]?\d{3}[\s.-]?\d{4}', text)
+    if phone_match:
+        data["phone"] = phone_match.group(0).strip()
+
+    # Section detection
+    sec_names = [
+        ("skills", ["skills", "technical skills", "skills & tools"]),
+        ("experience", ["experience", "work experience", "professional experience", "employment history"]),
+        ("education", ["education", "academic background"]),
+        ("projects", ["projects", "key projects", "personal projects"])
+    ]
+
+    indices = []
+    for idx, l in enumerate(lines):
+        low = l.lower().strip(':').strip()
+        for key, variants in sec_names:
+            if any(low.startswith(v) for v in variants):
+                indices.append((idx, key))
+                break
+
+    indices.sort(key=lambda x: x[0])
+    sections: Dict[str, List[str]] = {"skills": [], "experience": [], "education": [], "projects": []}
+
+    for i, (start_idx, key) in enumerate(indices):
+        end_idx = indices[i + 1][0] if i + 1 < len(indices) else len(lines)
+        content = lines[start_idx + 1:end_idx]
+        sections[key] = content
+
+    # Parse skills (comma/semicolon separated or bullet lines)
+    parsed_skills: List[str] = []
+    for l in sections["skills"]:
+        if not l:
+            continue
+        # bullets
+        if l.startswith(('-', '*', '•')):
+            l = l.lstrip('-*•').strip()
+        # split by comma/semicolon
+        parts = re.split(r"[,;]\s*", l)
+        for p in parts:
+            p = p.strip().strip('.')
+            if p and len(p) > 1 and not p.lower().startswith("experience"):
+                parsed_skills.append(p)
+    # dedupe
+    seen = set()
+    uniq_skills = []
+    for s in parsed_skills:
+        ns = s
+        if ns.lower() not in seen:
+            seen.add(ns.lower())
+            uniq_skills.append(ns)
+
+    data["skills"] = uniq_skills
+
+    # Parse experience (bullet lines or sentences)
+    exp_items: List[str] = []
+    for l in sections["experience"]:
+        if not l:
+            continue
+        # capture bullets or role-company-date patterns
+        if l.startswith(('-', '*', '•')):
+            item = l.lstrip('-*•').strip()
+            if item:
+                exp_items.append(item)
+        else:
+            # detect Role @ Company (Dates)
+            if re.search(r"@|\b(Inc\.|LLC|Ltd\.|Pvt\.|Technologies|Solutions)\b", l) or re.search(r"\b(\d{4})\b", l):
+                exp_items.append(l)
+            elif len(l) > 20:
+                exp_items.append(l)
+
+    # compact experience items
+    data["experience"] = [e.strip() for e in exp_items if e.strip()]
+
+    # Education: join lines until next section
+    if sections["education"]:
+        data["education"] = "; ".join(sections["education"]).strip()
+
+    # Projects
+    proj_items: List[str] = []
+    for l in sections["projects"]:
+        if not l:
+            continue
+        if l.startswith(('-', '*', '•')):
+            proj_items.append(l.lstrip('-*•').strip())
+        elif len(l) > 10:
+            proj_items.append(l.strip())
+    data["projects"] = proj_items
+
+    return data
+
+
+
+def main():
+    n = int(sys.argv[1]) if len(sys.argv) > 1 else 10_000
+    rng = random.Random(42)
+    corpus = [synthetic_resume(rng) for _ in range(n)]
+
+    mismatches = sum(1 for text in corpus if parse_resume_text(text) != legacy_parse_resume_text(text))
+    if mismatches:
+        print(f"❌ {mismatches} of {n} resumes parsed differently")
+        sys.exit(1)
+    print(f"✅ identical output on {n} resumes")
+
+    for label, fn in [("original", legacy_parse_resume_text), ("single-pass", parse_resume_text)]:
+        best = float("inf")
+        for _ in range(3):
+            t0 = time.perf_counter()
+            for text in corpus:
+                fn(text)
+            best = min(best, time.perf_counter() - t0)
+        print(f"{label:>12}: {best:.3f}s  ({n / best:,.0f} resumes/s)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,253 @@
+# backend/cache.py
+"""Small in-process and on-disk caches shared by the API handlers."""
+import json
+import os
+import shutil
+import tempfile
+import time
+from collections import OrderedDict
+from pathlib import Path
+from threading import Lock
+from typing import Any, Dict, Hashable, Optional
+
+_MISSING = object()
+
+
+class TTLCache:
+    """Thread-safe LRU cache whose entries also expire after `ttl` seconds.
+
+    Keeps hit/miss/eviction counters so endpoints can report cache effectiveness.
+    """
+
+    def __init__(self, maxsize: int = 1024, ttl: Optional[float] = 300, name: str = "cache"):
+        self.name = name
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self._data: "OrderedDict[Hashable, tuple]" = OrderedDict()
+        self._lock = Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def __len__(self):
+        return len(self._data)
+
+    def __contains__(self, key):
+        return self.get(key, _MISSING, count=False) is not _MISSING
+
+    def get(self, key: Hashable, default: Any = None, count: bool = True) -> Any:
+        with self._lock:
+            item = self._data.get(key)
+            if item is not None:
+                expires, value = item
+                if expires is None or expires > time.monotonic():
+                    self._data.move_to_end(key)
+                    if count:
+                        self.hits += 1
+                    return value
+                del self._data[key]
+            if count:
+                self.misses += 1
+            return default
+
+    def set(self, key: Hashable, value: Any, ttl: Optional[float] = _MISSING):
+        ttl = self.ttl if ttl is _MISSING else ttl
+        expires = time.monotonic() + ttl if ttl is not None else None
+        with self._lock:
+            self._data[key] = (expires, value)
+            self._data.move_to_end(key)
+            while len(self._data) > self.maxsize:
+                self._data.popitem(last=False)
+                self.evictions += 1
+
+    def pop(self, key: Hashable, default: Any = None) -> Any:
+        with self._lock:
+            item = self._data.pop(key, None)
+        return item[1] if item is not None else default
+
+    def clear(self):
+        with self._lock:
+            self._data.clear()
+
+    def stats(self) -> Dict[str, Any]:
+        lookups = self.hits + self.misses
+        return {
+            "name": self.name,
+            "size": len(self._data),
+            "maxsize": self.maxsize,
+            "ttl_seconds": self.ttl,
+            "hits": self.hits,
+            "misses": self.misses,
+            "evictions": self.evictions,
+            "hit_rate": round(self.hits / lookups, 3) if lookups else 0.0,
+        }
+
+
+class DiskCache:
+    """JSON-file cache keyed by hex digests; entries survive restarts.
+
+    Each value is one file under `directory`. Entries older than `ttl` seconds
+    (by mtime) are treated as missing; `ttl=None` keeps them forever. With
+    `max_entries` / `max_bytes` set, the oldest files are deleted once a write
+    takes the cache over either cap. The index behind that is built from a scan
+    of `directory` on first use, so it also covers files left by earlier runs.
+    """
+
+    def __init__(self, directory, ttl: Optional[float] = None, name: str = "disk",
+                 max_entries: Optional[int] = None, max_bytes: Optional[int] = None):
+        self.name = name
+        self.directory = Path(directory)
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        # path -> size in bytes, oldest write first; None until the first scan
+        self._index: "Optional[OrderedDict[Path, int]]" = None
+        self._bytes = 0
+        self._lock = Lock()
+        self.hits = 0
+        self.misses = 0
+        self.write_errors = 0
+        self.evictions = 0
+
+    @property
+    def bounded(self) -> bool:
+        return self.max_entries is not None or self.max_bytes is not None
+
+    def _scan(self):
+        """Builds the index from the files on disk, dropping expired ones. Caller holds the lock."""
+        entries = []
+        now = time.time()
+        for path in self.directory.glob("*/*.json"):
+            try:
+                st = path.stat()
+                if self.ttl is not None and now - st.st_mtime > self.ttl:
+                    path.unlink(missing_ok=True)
+                    continue
+            except OSError:
+                continue
+            entries.append((st.st_mtime, path, st.st_size))
+        entries.sort(key=lambda entry: entry[0])
+        self._index = OrderedDict((path, size) for _, path, size in entries)
+        self._bytes = sum(self._index.values())
+
+    def _track(self, path: Path, size: Optional[int]):
+        """Records a write (or, with size=None, a removal) and evicts past the caps."""
+        with self._lock:
+            if self._index is None:
+                self._scan()
+            self._bytes -= self._index.pop(path, 0)
+            if size is not None:
+                self._index[path] = size
+                self._bytes += size
+            while self._index and (
+                (self.max_entries is not None and len(self._index) > self.max_entries)
+                or (self.max_bytes is not None and self._bytes > self.max_bytes)
+            ):
+                oldest, oldest_size = self._index.popitem(last=False)
+                self._bytes -= oldest_size
+                oldest.unlink(missing_ok=True)
+                self.evictions += 1
+
+    def _path(self, key: str) -> Path:
+        safe = "".join(c for c in str(key) if c.isalnum() or c in "-_.")
+        return self.directory / safe[:2] / f"{safe}.json"
+
+    def get(self, key: str, default: Any = None) -> Any:
+        path = self._path(key)
+        try:
+            if self.ttl is not None and time.time() - path.stat().st_mtime > self.ttl:
+                path.unlink(missing_ok=True)
+                if self.bounded:
+                    self._track(path, None)
+                raise FileNotFoundError(path)
+            with open(path, "r", encoding="utf-8") as f:
+                value = json.load(f)
+        except (OSError, ValueError):
+            self.misses += 1
+            return default
+        self.hits += 1
+        return value
+
+    def set(self, key: str, value: Any):
+        path = self._path(key)
+        tmp = None
+        try:
+            path.parent.mkdir(parents=True, exist_ok=True)
+            # Write-then-rename so a crash never leaves a half-written entry
+            fd, tmp = tempfile.mkstemp(dir=path.parent, suffix=".tmp")
+            with os.fdopen(fd, "w", encoding="utf-8") as f:
+                json.dump(value, f)
+            os.replace(tmp, path)
+            if self.bounded:
+                self._track(path, path.stat().st_size)
+        except (OSError, TypeError, ValueError) as e:
+            if tmp is not None and os.path.exists(tmp):
+                os.unlink(tmp)
+            self.write_errors += 1
+            print(f"⚠️ Disk cache write failed ({self.name}): {e}")
+
+    def pop(self, key: str):
+        path = self._path(key)
+        path.unlink(missing_ok=True)
+        if self.bounded:
+            self._track(path, None)
+
+    def clear(self):
+        with self._lock:
+            shutil.rmtree(self.directory, ignore_errors=True)
+            self._index = None
+            self._bytes = 0
+
+    def stats(self) -> Dict[str, Any]:
+        lookups = self.hits + self.misses
+        return {
+            "name": self.name,
+            "directory": str(self.directory),
+            "ttl_seconds": self.ttl,
+            "entries": len(self._index) if self._index is not None else None,
+            "bytes": self._bytes if self._index is not None else None,
+            "max_entries": self.max_entries,
+            "max_bytes": self.max_bytes,
+            "hits": self.hits,
+            "misses": self.misses,
+            "evictions": self.evictions,
+            "write_errors": self.write_errors,
+            "hit_rate": round(self.hits / lookups, 3) if lookups else 0.0,
+        }
+
+
+class TieredCache:
+    """Memory TTLCache in front of a DiskCache; disk hits are promoted to memory."""
+
+    def __init__(self, memory: TTLCache, disk: Optional[DiskCache] = None):
+        self.memory = memory
+        self.disk = disk
+
+    def get(self, key: str, default: Any = None) -> Any:
+        value = self.memory.get(key, _MISSING)
+        if value is not _MISSING:
+            return value
+        if self.disk is not None:
+            value = self.disk.get(key, _MISSING)
+            if value is not _MISSING:
+                self.memory.set(key, value)
+                return value
+        return default
+
+    def set(self, key: str, value: Any):
+        self.memory.set(key, value)
+        if self.disk is not None:
+            self.disk.set(key, value)
+
+    def pop(self, key: str):
+        self.memory.pop(key)
+        if self.disk is not None:
+            self.disk.pop(key)
+
+    def clear(self):
+        self.memory.clear()
+        if self.disk is not None:
+            self.disk.clear()
+
+    def stats(self) -> Dict[str, Any]:
+        return {"memory": self.memory.stats(), "disk": self.disk.stats() if self.disk is not None else None}
@@ -0,0 +1,165 @@
+# backend/candidate_ranker.py
+"""Batch ranking of resume texts against a job description.
+
+ResumeCorpus keeps every resume tokenized once, as a sparse term -> {doc: tf}
+matrix (postings per term). Ranking a JD only tokenizes the JD and walks the
+postings of its keywords, accumulating BM25 and the keyword-overlap score used
+by calculate_job_relevancy for all candidates in the same pass.
+"""
+import hashlib
+import heapq
+import math
+import re
+from collections import Counter, OrderedDict
+from threading import RLock
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+WORD_RE = re.compile(r'\w+')
+# Same filter calculate_job_relevancy applies to JD words
+STOP_WORDS = {"and", "the", "to", "of", "in", "for", "with", "a", "an", "is"}
+
+BM25_K1 = 1.5
+BM25_B = 0.75
+
+
+def jd_keywords(job_description: str) -> Counter:
+    """JD keyword -> occurrences (keywords: non-stop words longer than 3 chars)."""
+    return Counter(w for w in WORD_RE.findall(job_description.lower()) if w not in STOP_WORDS and len(w) > 3)
+
+
+def keyword_overlap_score(matches: int, keywords: int) -> int:
+    """calculate_job_relevancy's 0-100 score from the number of JD keywords found."""
+    if not keywords:
+        return 0
+    return min(100, int((matches / keywords) * 100 * 1.5))
+
+
+class ResumeCorpus:
+    """Bounded, thread-safe store of tokenized resumes with a sparse term index.
+
+    Documents are keyed by caller-chosen ids; re-adding an id with unchanged
+    text is a no-op, so repeated rankings only pay for the JD side.
+    """
+
+    def __init__(self, maxsize: int = 50000):
+        self.maxsize = maxsize
+        self._docs: "OrderedDict[str, Dict[str, Any]]" = OrderedDict()
+        self._postings: Dict[str, Dict[str, int]] = {}
+        self._total_len = 0
+        self._lock = RLock()
+        self.tokenized = 0
+        self.reused = 0
+        self.evictions = 0
+
+    def __len__(self):
+        return len(self._docs)
+
+    def __contains__(self, doc_id):
+        return doc_id in self._docs
+
+    def add(self, doc_id: str, text: str, name: Optional[str] = None) -> bool:
+        """Index (or re-index) one resume; returns False when the text was already indexed."""
+        digest = hashlib.sha256(text.encode("utf-8", "ignore")).hexdigest()
+        with self._lock:
+            doc = self._docs.get(doc_id)
+            if doc is not None and doc["hash"] == digest:
+                self._docs.move_to_end(doc_id)
+                if name:
+                    doc["name"] = name
+                self.reused += 1
+                return False
+        # Tokenize outside the lock; it is the expensive part
+        tf = Counter(WORD_RE.findall(text.lower()))
+        length = sum(tf.values())
+        with self._lock:
+            self._remove(doc_id)
+            self._docs[doc_id] = {"hash": digest, "name": name, "len": length, "terms": tuple(tf)}
+            for term, count in tf.items():
+                self._postings.setdefault(term, {})[doc_id] = count
+            self._total_len += length
+            self.tokenized += 1
+            while len(self._docs) > self.maxsize:
+                self._remove(next(iter(self._docs)))
+                self.evictions += 1
+        return True
+
+    def add_many(self, items: Iterable[Tuple[str, str, Optional[str]]]) -> int:
+        """add() for (doc_id, text, name) tuples; returns how many needed tokenizing."""
+        return sum(self.add(doc_id, text, name) for doc_id, text, name in items)
+
+    def _remove(self, doc_id: str):
+        doc = self._docs.pop(doc_id, None)
+        if doc is None:
+            return
+        for term in doc["terms"]:
+            posting = self._postings.get(term)
+            if posting is not None:
+                posting.pop(doc_id, None)
+                if not posting:
+                    del self._postings[term]
+        self._total_len -= doc["len"]
+
+    def remove(self, doc_id: str):
+        with self._lock:
+            self._remove(doc_id)
+
+    def rank(self, job_description: str, doc_ids: Optional[Iterable[str]] = None,
+             top_k: int = 10) -> Dict[str, Any]:
+        """Score candidates against the JD in one pass over its keywords' postings.
+
+        Returns the top_k by BM25 (ties broken by keyword score), each with both scores.
+        """
+        keywords = jd_keywords(job_description)
+        with self._lock:
+            if doc_ids is None:
+                scope = None
+                candidates = list(self._docs)
+            else:
+                scope = {d for d in doc_ids if d in self._docs}
+                candidates = list(scope)
+            n = len(self._docs)
+            avg_len = self._total_len / n if n else 0.0
+            bm25: Dict[str, float] = {}
+            overlap: Dict[str, int] = {}
+            for term, query_tf in keywords.items():
+                posting = self._postings.get(term)
+                if not posting:
+                    continue
+                idf = math.log(1 + (n - len(posting) + 0.5) / (len(posting) + 0.5))
+                for doc_id, tf in posting.items():
+                    if scope is not None and doc_id not in scope:
+                        continue
+                    norm = BM25_K1 * (1 - BM25_B + BM25_B * self._docs[doc_id]["len"] / avg_len)
+                    bm25[doc_id] = bm25.get(doc_id, 0.0) + query_tf * idf * tf * (BM25_K1 + 1) / (tf + norm)
+                    overlap[doc_id] = overlap.get(doc_id, 0) + 1
+            names = {doc_id: self._docs[doc_id]["name"] for doc_id in candidates}
+
+        top = heapq.nlargest(
+            max(0, top_k), candidates,
+            key=lambda d: (bm25.get(d, 0.0), overlap.get(d, 0)),
+        )
+        return {
+            "keywords": len(keywords),
+            "candidates": len(candidates),
+            "ranked": [
+                {
+                    "rank": i + 1,
+                    "id": doc_id,
+                    "name": names[doc_id],
+                    "bm25": round(bm25.get(doc_id, 0.0), 4),
+                    "keyword_score": keyword_overlap_score(overlap.get(doc_id, 0), len(keywords)),
+                    "matched_keywords": overlap.get(doc_id, 0),
+                }
+                for i, doc_id in enumerate(top)
+            ],
+        }
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "documents": len(self._docs),
+            "maxsize": self.maxsize,
+            "terms": len(self._postings),
+            "tokenized": self.tokenized,
+            "reused": self.reused,
+            "evictions": self.evictions,
+        }
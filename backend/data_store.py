@@ -0,0 +1,348 @@
+# backend/data_store.py
+"""Async access to the resumes, notifications and notification_preferences tables.
+
+PostgrestStore talks to Supabase's PostgREST API over one pooled keep-alive
+httpx.AsyncClient per event loop, with per-call timeouts and bounded retries
+(full-jitter exponential backoff). Writes that aren't idempotent are only
+retried when the request cannot have reached the database (connect failures,
+429/503). MemoryStore keeps the same tables in dicts, with optional simulated
+latency, so the notification and profile endpoints can be load-tested offline.
+Both record per-operation call counts, errors, retries and latency.
+"""
+import asyncio
+import json
+import os
+import random
+import time
+import uuid
+from collections import defaultdict, deque
+from datetime import datetime, timezone
+from typing import Any, Dict, List, Optional, Tuple
+
+import httpx
+
+# ("lt" | "gt", created_at, id): rows strictly before / after that position in (created_at, id) order
+Keyset = Tuple[str, str, str]
+
+RETRY_STATUSES = {429, 500, 502, 503, 504}
+# Answered before the request reached the database, so even an INSERT can be resent
+SAFE_RETRY_STATUSES = {429, 503}
+_CONNECT_ERRORS = (httpx.ConnectError, httpx.ConnectTimeout, httpx.PoolTimeout)
+
+
+class DataStoreError(Exception):
+    def __init__(self, message: str, status: Optional[int] = None):
+        super().__init__(message)
+        self.status = status
+
+
+class StoreMetrics:
+    """Per-operation request counts, errors, retries and latency (last `window` calls for percentiles)."""
+
+    def __init__(self, window: int = 1000):
+        self._ops: Dict[str, Dict[str, Any]] = defaultdict(
+            lambda: {"calls": 0, "errors": 0, "retries": 0, "total_ms": 0.0, "max_ms": 0.0,
+                     "recent": deque(maxlen=window)})
+
+    def record(self, op: str, seconds: float, ok: bool, retries: int = 0):
+        entry = self._ops[op]
+        ms = seconds * 1000
+        entry["calls"] += 1
+        entry["errors"] += 0 if ok else 1
+        entry["retries"] += retries
+        entry["total_ms"] += ms
+        entry["max_ms"] = max(entry["max_ms"], ms)
+        entry["recent"].append(ms)
+
+    def stats(self) -> Dict[str, Dict[str, Any]]:
+        out = {}
+        for op, entry in sorted(self._ops.items()):
+            recent = sorted(entry["recent"])
+            out[op] = {
+                "calls": entry["calls"],
+                "errors": entry["errors"],
+                "retries": entry["retries"],
+                "avg_ms": round(entry["total_ms"] / entry["calls"], 2) if entry["calls"] else None,
+                "p50_ms": round(recent[len(recent) // 2], 2) if recent else None,
+                "p95_ms": round(recent[int(len(recent) * 0.95)], 2) if recent else None,
+                "max_ms": round(entry["max_ms"], 2),
+            }
+        return out
+
+
+def _quote(value: Any) -> str:
+    """A PostgREST filter value, double-quoted so commas, dots and parentheses are literal."""
+    return '"' + str(value).replace("\\", "\\\\").replace('"', '\\"') + '"'
+
+
+def _in(values: List[Any]) -> str:
+    return "in.(" + ",".join(_quote(v) for v in values) + ")"
+
+
+def _keyset_filter(keyset: Keyset) -> str:
+    op, created_at, row_id = keyset
+    created_at, row_id = _quote(created_at), _quote(row_id)
+    return f"(created_at.{op}.{created_at},and(created_at.eq.{created_at},id.{op}.{row_id}))"
+
+
+class PostgrestStore:
+    def __init__(self, url: str, key: str, max_connections: int = 8, timeout: float = 10.0,
+                 connect_timeout: float = 3.0, retries: int = 2, backoff: float = 0.2,
+                 max_backoff: float = 2.0, transport: Optional[httpx.AsyncBaseTransport] = None):
+        self.base_url = url.rstrip("/") + "/rest/v1"
+        self.headers = {"apikey": key, "Authorization": f"Bearer {key}"}
+        self.max_connections = max(1, max_connections)
+        self.timeout = httpx.Timeout(timeout, connect=connect_timeout, pool=timeout)
+        self.retries = retries
+        self.backoff = backoff
+        self.max_backoff = max_backoff
+        self.transport = transport
+        self.metrics = StoreMetrics()
+        # One pooled client per event loop (connections can't cross loops)
+        self._clients: Dict[asyncio.AbstractEventLoop, httpx.AsyncClient] = {}
+
+    def _http(self) -> httpx.AsyncClient:
+        """The pooled client for the running event loop."""
+        loop = asyncio.get_running_loop()
+        client = self._clients.get(loop)
+        if client is None:
+            client = self._clients[loop] = httpx.AsyncClient(
+                base_url=self.base_url,
+                headers=self.headers,
+                timeout=self.timeout,
+                limits=httpx.Limits(max_connections=self.max_connections,
+                                    max_keepalive_connections=self.max_connections,
+                                    keepalive_expiry=30.0),
+                transport=self.transport,
+            )
+        return client
+
+    async def _close_stale(self):
+        """Closes the clients of loops that have since closed (e.g. earlier test clients)."""
+        for loop in [loop for loop in self._clients if loop.is_closed()]:
+            await self._clients.pop(loop).aclose()
+
+    async def aclose(self):
+        """Closes every loop's client; one whose loop is still running elsewhere is closed on that loop."""
+        current = asyncio.get_running_loop()
+        clients, self._clients = self._clients, {}
+        for loop, client in clients.items():
+            if loop is not current and loop.is_running():
+                await asyncio.wrap_future(asyncio.run_coroutine_threadsafe(client.aclose(), loop))
+            else:
+                await client.aclose()
+
+    def _delay(self, attempt: int) -> float:
+        return random.uniform(0, min(self.max_backoff, self.backoff * 2 ** attempt))
+
+    async def _request(self, op: str, method: str, table: str, **kwargs) -> httpx.Response:
+        response, _ = await self._send(op, method, table, **kwargs)
+        return response
+
+    async def _send(self, op: str, method: str, table: str, idempotent: bool = True,
+                    params: Optional[Dict[str, str]] = None, json_body: Any = None,
+                    prefer: Optional[str] = None) -> Tuple[httpx.Response, int]:
+        """Sends with retries; returns the response and how many retries it took."""
+        headers = {"Prefer": prefer} if prefer else None
+        if asyncio.get_running_loop() not in self._clients:
+            await self._close_stale()
+        started = time.perf_counter()
+        attempt = 0
+        while True:
+            try:
+                response = await self._http().request(method, f"/{table}", params=params, json=json_body,
+                                                      headers=headers)
+                error = None
+                retryable = response.status_code in (RETRY_STATUSES if idempotent else SAFE_RETRY_STATUSES)
+                if response.status_code < 400:
+                    self.metrics.record(op, time.perf_counter() - started, True, attempt)
+                    return response, attempt
+            except httpx.TransportError as e:
+                error = e
+                retryable = idempotent or isinstance(e, _CONNECT_ERRORS)
+            if not retryable or attempt >= self.retries:
+                self.metrics.record(op, time.perf_counter() - started, False, attempt)
+                if error is not None:
+                    raise DataStoreError(f"{op}: {type(error).__name__}: {error}") from error
+                raise DataStoreError(f"{op}: HTTP {response.status_code}: {_error_message(response)}",
+                                     response.status_code)
+            await asyncio.sleep(self._delay(attempt))
+            attempt += 1
+
+    async def insert_resume(self, row: Dict[str, Any]) -> Dict[str, Any]:
+        response = await self._request("insert_resume", "POST", "resumes", idempotent=False,
+                                       json_body=row, prefer="return=representation")
+        return response.json()[0]
+
+    async def insert_notifications(self, rows: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+        """Inserts rows in one multi-row INSERT; returns them (with id, created_at) in request order."""
+        response = await self._request("insert_notifications", "POST", "notifications", idempotent=False,
+                                       json_body=rows, prefer="return=representation")
+        return response.json()
+
+    async def notification_page(self, user_id: str, limit: int, keyset: Optional[Keyset] = None,
+                                ascending: bool = False) -> List[Dict[str, Any]]:
+        direction = "asc" if ascending else "desc"
+        params = {"select": "*", "user_id": f"eq.{user_id}",
+                  "order": f"created_at.{direction},id.{direction}", "limit": str(limit)}
+        if keyset:
+            params["or"] = _keyset_filter(keyset)
+        response = await self._request("notification_page", "GET", "notifications", params=params)
+        return response.json()
+
+    async def count_unread(self, user_id: str) -> int:
+        params = {"select": "id", "user_id": f"eq.{user_id}", "read": "eq.false"}
+        response = await self._request("count_unread", "HEAD", "notifications", params=params,
+                                       prefer="count=exact")
+        # Content-Range: "*/42" (or "0-0/42")
+        total = response.headers.get("content-range", "*/0").rsplit("/", 1)[-1]
+        return int(total) if total.isdigit() else 0
+
+    async def mark_read(self, notification_ids: List[str]) -> Tuple[List[Dict[str, Any]], List[str]]:
+        """Marks notifications read.
+
+        Returns the rows that were unread (already-read ones don't match), and the
+        owners of any other requested rows when the PATCH had to be retried: an
+        earlier attempt may have flipped those rows and lost its response, so
+        whether their unread count changed is unknown.
+        """
+        params = {"id": _in(notification_ids), "read": "eq.false"}
+        response, retries = await self._send("mark_read", "PATCH", "notifications", params=params,
+                                             json_body={"read": True}, prefer="return=representation")
+        rows = response.json()
+        if not retries:
+            return rows, []
+        changed = {row["id"] for row in rows}
+        rest = [notification_id for notification_id in notification_ids if notification_id not in changed]
+        if not rest:
+            return rows, []
+        owners = await self._request("mark_read_owners", "GET", "notifications",
+                                     params={"select": "user_id", "id": _in(rest)})
+        return rows, sorted({row["user_id"] for row in owners.json()})
+
+    async def select_preferences(self, user_ids: List[str]) -> List[Dict[str, Any]]:
+        params = {"select": "*", "user_id": _in(user_ids)}
+        response = await self._request("select_preferences", "GET", "notification_preferences", params=params)
+        return response.json()
+
+    async def upsert_preferences(self, row: Dict[str, Any]) -> Optional[Dict[str, Any]]:
+        response = await self._request("upsert_preferences", "POST", "notification_preferences", json_body=row,
+                                       prefer="resolution=merge-duplicates,return=representation")
+        rows = response.json()
+        return rows[0] if rows else None
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "backend": "postgrest",
+            "max_connections": self.max_connections,
+            "timeout_seconds": self.timeout.read,
+            "retries": self.retries,
+            "operations": self.metrics.stats(),
+        }
+
+
+def _error_message(response: httpx.Response) -> str:
+    try:
+        body = response.json()
+        return body.get("message") or json.dumps(body)
+    except ValueError:
+        return response.text[:200]
+
+
+class MemoryStore:
+    """The same tables in process memory; `latency` seconds are awaited per call to mimic a round trip."""
+
+    def __init__(self, latency: float = 0.0):
+        self.latency = latency
+        self.metrics = StoreMetrics()
+        self.resumes: List[Dict[str, Any]] = []
+        self.notifications: Dict[str, Dict[str, Any]] = {}
+        self.preferences: Dict[str, Dict[str, Any]] = {}
+
+    async def aclose(self):
+        pass
+
+    async def _call(self, op: str):
+        started = time.perf_counter()
+        if self.latency:
+            await asyncio.sleep(self.latency)
+        self.metrics.record(op, time.perf_counter() - started, True)
+
+    @staticmethod
+    def _stamp(row: Dict[str, Any]) -> Dict[str, Any]:
+        return {**row, "id": str(uuid.uuid4()), "created_at": datetime.now(timezone.utc).isoformat()}
+
+    async def insert_resume(self, row: Dict[str, Any]) -> Dict[str, Any]:
+        await self._call("insert_resume")
+        row = self._stamp(row)
+        self.resumes.append(row)
+        return dict(row)
+
+    async def insert_notifications(self, rows: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+        await self._call("insert_notifications")
+        stored = [self._stamp(row) for row in rows]
+        for row in stored:
+            self.notifications[row["id"]] = row
+        return [dict(row) for row in stored]
+
+    async def notification_page(self, user_id: str, limit: int, keyset: Optional[Keyset] = None,
+                                ascending: bool = False) -> List[Dict[str, Any]]:
+        await self._call("notification_page")
+        rows = [row for row in self.notifications.values() if row["user_id"] == user_id]
+        if keyset:
+            op, created_at, row_id = keyset
+            position = (created_at, row_id)
+            rows = [row for row in rows
+                    if ((row["created_at"], row["id"]) < position) == (op == "lt")
+                    and (row["created_at"], row["id"]) != position]
+        rows.sort(key=lambda row: (row["created_at"], row["id"]), reverse=not ascending)
+        return [dict(row) for row in rows[:limit]]
+
+    async def count_unread(self, user_id: str) -> int:
+        await self._call("count_unread")
+        return sum(1 for row in self.notifications.values() if row["user_id"] == user_id and not row["read"])
+
+    async def mark_read(self, notification_ids: List[str]) -> Tuple[List[Dict[str, Any]], List[str]]:
+        await self._call("mark_read")
+        changed = []
+        for notification_id in notification_ids:
+            row = self.notifications.get(notification_id)
+            if row is not None and not row["read"]:
+                row["read"] = True
+                changed.append(dict(row))
+        return changed, []
+
+    async def select_preferences(self, user_ids: List[str]) -> List[Dict[str, Any]]:
+        await self._call("select_preferences")
+        return [dict(self.preferences[user_id]) for user_id in user_ids if user_id in self.preferences]
+
+    async def upsert_preferences(self, row: Dict[str, Any]) -> Optional[Dict[str, Any]]:
+        await self._call("upsert_preferences")
+        stored = self.preferences.setdefault(row["user_id"], {})
+        stored.update(row)
+        return dict(stored)
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "backend": "memory",
+            "latency_ms": self.latency * 1000,
+            "rows": {"resumes": len(self.resumes), "notifications": len(self.notifications),
+                     "notification_preferences": len(self.preferences)},
+            "operations": self.metrics.stats(),
+        }
+
+
+def store_from_env(url: Optional[str], key: Optional[str]):
+    """DATA_STORE=postgrest (default; None without SUPABASE_URL/KEY) or memory."""
+    backend = os.environ.get("DATA_STORE", "postgrest").lower()
+    if backend == "memory":
+        return MemoryStore(latency=float(os.environ.get("DATA_STORE_MEMORY_LATENCY_MS", "0")) / 1000)
+    if not (url and key):
+        return None
+    return PostgrestStore(
+        url, key,
+        max_connections=int(os.environ.get("SUPABASE_MAX_CONCURRENCY", "8")),
+        timeout=float(os.environ.get("DATA_STORE_TIMEOUT", "10")),
+        connect_timeout=float(os.environ.get("DATA_STORE_CONNECT_TIMEOUT", "3")),
+        retries=int(os.environ.get("DATA_STORE_RETRIES", "2")),
+    )
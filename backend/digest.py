@@ -0,0 +1,162 @@
+# backend/digest.py
+"""Digest scheduling for users whose notification `frequency` isn't "immediate".
+
+Their notifications are held in memory, one pending digest per user, until the
+end of the current window (top of the hour, midnight UTC, or Monday midnight
+UTC), then rendered into a single notification row. Pending digests sit in a
+heap keyed by flush time, so each tick only pops what is due. A digest keeps at
+most `max_items` notifications in full and counts the rest.
+"""
+import heapq
+import time
+from collections import Counter
+from datetime import datetime, timezone
+from threading import Lock
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+WINDOWS = {"hourly": 3600, "daily": 86400, "weekly": 7 * 86400}
+# 1970-01-01 was a Thursday; weekly windows start on Monday 00:00 UTC
+_WEEK_OFFSET = 4 * 86400
+_PRIORITY_ORDER = {"low": 0, "medium": 1, "high": 2}
+
+
+def window_end(frequency: str, now: float) -> float:
+    """Epoch seconds at which the window containing `now` closes."""
+    seconds = WINDOWS[frequency]
+    offset = _WEEK_OFFSET if frequency == "weekly" else 0
+    return ((now - offset) // seconds + 1) * seconds + offset
+
+
+def iso_timestamp(ts: float) -> str:
+    return datetime.fromtimestamp(ts, timezone.utc).isoformat()
+
+
+class DigestScheduler:
+    def __init__(self, max_items: int = 50, clock: Callable[[], float] = time.time):
+        self.max_items = max_items
+        self.clock = clock
+        # user_id -> {"frequency", "due", "count", "items"}
+        self._pending: Dict[str, Dict[str, Any]] = {}
+        # (due, user_id); entries whose due no longer matches _pending are skipped
+        self._heap: List[Tuple[float, str]] = []
+        self._lock = Lock()
+        self.buffered = 0
+        self.flushed = 0
+        self.flushed_items = 0
+        self.requeued = 0
+
+    def __len__(self):
+        return len(self._pending)
+
+    def __contains__(self, user_id: str) -> bool:
+        return user_id in self._pending
+
+    def add(self, user_id: str, frequency: str, item: Dict[str, Any]) -> float:
+        """Buffers one notification row for the user's next digest; returns when it will be sent."""
+        with self._lock:
+            now = self.clock()
+            entry = self._pending.get(user_id)
+            if entry is None:
+                due = window_end(frequency, now)
+                entry = self._pending[user_id] = {"frequency": frequency, "due": due, "count": 0, "items": []}
+                heapq.heappush(self._heap, (due, user_id))
+            entry["count"] += 1
+            if len(entry["items"]) < self.max_items:
+                entry["items"].append({"created_at": iso_timestamp(now), **item})
+            self.buffered += 1
+            return entry["due"]
+
+    def reschedule(self, user_id: str, frequency: Optional[str]):
+        """Moves a pending digest to the end of the new frequency's window (now if it isn't a digest frequency)."""
+        with self._lock:
+            entry = self._pending.get(user_id)
+            if entry is None or entry["frequency"] == frequency:
+                return
+            now = self.clock()
+            entry["due"] = window_end(frequency, now) if frequency in WINDOWS else now
+            if frequency in WINDOWS:
+                entry["frequency"] = frequency
+            heapq.heappush(self._heap, (entry["due"], user_id))
+
+    def due(self, limit: Optional[int] = None) -> List[Tuple[str, Dict[str, Any]]]:
+        """Removes and returns (user_id, digest) for every digest whose window has closed."""
+        now = self.clock()
+        batch = []
+        with self._lock:
+            while self._heap and self._heap[0][0] <= now and (limit is None or len(batch) < limit):
+                due, user_id = heapq.heappop(self._heap)
+                entry = self._pending.get(user_id)
+                if entry is None or entry["due"] != due:
+                    continue
+                batch.append((user_id, self._pending.pop(user_id)))
+        return batch
+
+    def drain(self) -> List[Tuple[str, Dict[str, Any]]]:
+        """Removes and returns every pending digest (on shutdown)."""
+        with self._lock:
+            batch = list(self._pending.items())
+            self._pending.clear()
+            self._heap.clear()
+        return batch
+
+    def requeue(self, user_id: str, digest: Dict[str, Any], due: float):
+        """Puts back a digest that couldn't be stored, merged ahead of anything buffered since."""
+        with self._lock:
+            self.requeued += 1
+            entry = self._pending.get(user_id)
+            if entry is not None:
+                digest["count"] += entry["count"]
+                digest["items"] = (digest["items"] + entry["items"])[:self.max_items]
+                due = min(due, entry["due"])
+            digest["due"] = due
+            self._pending[user_id] = digest
+            heapq.heappush(self._heap, (due, user_id))
+
+    def mark_flushed(self, digests: List[Dict[str, Any]]):
+        with self._lock:
+            self.flushed += len(digests)
+            self.flushed_items += sum(d["count"] for d in digests)
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            pending_items = sum(entry["count"] for entry in self._pending.values())
+            next_due = min((entry["due"] for entry in self._pending.values()), default=None)
+        return {
+            "pending_users": len(self._pending),
+            "pending_items": pending_items,
+            "next_flush_at": iso_timestamp(next_due) if next_due is not None else None,
+            "max_items": self.max_items,
+            "buffered": self.buffered,
+            "flushed_digests": self.flushed,
+            "flushed_items": self.flushed_items,
+            "requeued": self.requeued,
+        }
+
+
+def digest_row(user_id: str, digest: Dict[str, Any]) -> Dict[str, Any]:
+    """The notifications-table row summarizing one user's digest."""
+    items = digest["items"]
+    count = digest["count"]
+    frequency = digest["frequency"]
+    by_title = Counter(item["title"] for item in items)
+    parts = [f"{title} ×{n}" if n > 1 else title for title, n in by_title.most_common()]
+    if count > len(items):
+        parts.append(f"{count - len(items)} more")
+    priority = max((item.get("priority", "medium") for item in items), key=_PRIORITY_ORDER.get, default="low")
+    return {
+        "user_id": user_id,
+        "type": "DIGEST",
+        "title": f"Your {frequency} digest 📬",
+        "message": f"{count} new update{'s' if count != 1 else ''}: " + ", ".join(parts),
+        "data": {
+            "frequency": frequency,
+            "count": count,
+            "window_end": iso_timestamp(digest["due"]),
+            "items": [
+                {key: item.get(key) for key in ("type", "title", "message", "data", "priority", "created_at")}
+                for item in items
+            ],
+        },
+        "priority": priority,
+        "read": False,
+    }
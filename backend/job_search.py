@@ -0,0 +1,386 @@
+# backend/job_search.py
+"""Indexed job catalog behind GET /api/jobs/search.
+
+Filters are evaluated as bitmaps (Python ints, bit i = job at position i):
+- inverted indexes for location, type and skills, plus a token index over
+  title / company / description (rare tokens are kept as position arrays and
+  turned into bitmaps on demand),
+- sorted indexes for salary, salaryMax, experience and postedDate that answer
+  range filters with precomputed suffix bitmaps and drive sorted pagination.
+
+Intersections, counts and the resume match score (a bit-sliced counter over
+the matched skills) are whole-bitmap operations, so a query costs roughly the
+same on 50 jobs or 1M. Pages are fetched with an opaque cursor.
+"""
+import base64
+import bisect
+import hashlib
+import heapq
+import json
+import math
+import re
+from array import array
+from collections import defaultdict
+from datetime import datetime
+from functools import partial
+from typing import Any, Dict, Iterable, Iterator, List, Optional, Tuple
+
+from cache import TTLCache
+
+WORD_RE = re.compile(r"\w+")
+NONZERO_RE = re.compile(rb"[^\x00]")
+BIT_POSITIONS = [tuple(b for b in range(8) if byte >> b & 1) for byte in range(256)]
+
+SORTS = ("relevance", "match", "salary", "date")
+MAX_LIMIT = 100
+# Below this many matches a sorted page is picked from the matches themselves,
+# above it the global sort order is walked until the page is full
+SPARSE_MATCHES = 20000
+# Prefix search ORs at most this many vocabulary terms
+MAX_PREFIX_TERMS = 1000
+
+
+def bits_from_positions(positions: Iterable[int], size: int) -> int:
+    buf = bytearray((size + 7) >> 3)
+    for p in positions:
+        buf[p >> 3] |= 1 << (p & 7)
+    return int.from_bytes(buf, "little")
+
+
+def iter_bits(mask: int, size: int, start: int = 0) -> Iterator[int]:
+    """Set bit positions >= start, ascending. Zero bytes are skipped by the regex engine."""
+    if not mask:
+        return
+    data = mask.to_bytes((size + 7) >> 3, "little")
+    for m in NONZERO_RE.finditer(data, start >> 3):
+        i = m.start()
+        base = i << 3
+        for b in BIT_POSITIONS[data[i]]:
+            if base + b >= start:
+                yield base + b
+
+
+def _timestamp(value: Any) -> float:
+    if not value:
+        return 0.0
+    try:
+        return datetime.fromisoformat(str(value).replace("Z", "+00:00")).timestamp()
+    except ValueError:
+        return 0.0
+
+
+def _skill(value: str) -> str:
+    return str(value).lower().strip()
+
+
+def match_score(job_skills: List[str], user_skills: List[str]) -> Tuple[int, List[str]]:
+    """Resume match the job board shows: 70% skill overlap (substring either way) + 20 base,
+    +9 when over 80% of the skills match, capped at 99. Returns (score, missing skills)."""
+    missing = [s for s in job_skills if not any(u in s or s in u for u in user_skills)]
+    ratio = (len(job_skills) - len(missing)) / len(job_skills) if job_skills else 0
+    return _score(ratio), missing
+
+
+def _score(ratio: float) -> int:
+    # floor(x + .5) rounds halves up, like Math.round
+    return min(99, math.floor(ratio * 70 + 20 + (9 if ratio > 0.8 else 0) + 0.5))
+
+
+class SortedIndex:
+    """Jobs ordered by one numeric field.
+
+    Range filters bisect the ascending order and OR a precomputed suffix bitmap
+    with the few positions before the next block boundary. With `descending`,
+    also keeps the stable high-to-low order (and each job's rank in it) for sorting.
+    """
+
+    BLOCKS = 64
+
+    def __init__(self, values: List[float], descending: bool = False):
+        n = self.size = len(values)
+        perm = sorted(range(n), key=values.__getitem__)
+        self.perm = array("I", perm)
+        self.keys = array("d", (values[p] for p in perm))
+        self.block = max(1, -(-n // self.BLOCKS))
+        # suffix[b] = bitmap of perm[b * block:]
+        self.suffix: List[int] = []
+        buf = bytearray((n + 7) >> 3)
+        starts = list(range(0, n, self.block))
+        end = n
+        for start in reversed(starts):
+            for p in perm[start:end]:
+                buf[p >> 3] |= 1 << (p & 7)
+            self.suffix.append(int.from_bytes(buf, "little"))
+            end = start
+        self.suffix.reverse()
+        self.order = self.order_rank = None
+        if descending:
+            # reverse=True keeps ties in catalog order
+            self.order = array("I", sorted(range(n), key=values.__getitem__, reverse=True))
+            self.order_rank = array("I", bytes(4 * n))
+            for r, p in enumerate(self.order):
+                self.order_rank[p] = r
+
+    def _from_rank(self, i: int) -> int:
+        """Bitmap of jobs at ascending ranks >= i."""
+        if i >= self.size:
+            return 0
+        b = -(-i // self.block)
+        boundary = min(b * self.block, self.size)
+        mask = self.suffix[b] if b < len(self.suffix) else 0
+        if i < boundary:
+            mask |= bits_from_positions(self.perm[i:boundary], self.size)
+        return mask
+
+    def at_least(self, value: float) -> int:
+        return self._from_rank(bisect.bisect_left(self.keys, value))
+
+    def at_most(self, value: float, universe: int) -> int:
+        return universe ^ self._from_rank(bisect.bisect_right(self.keys, value))
+
+
+class JobCatalog:
+    """Read-only, indexed job postings (the records served as-is)."""
+
+    def __init__(self, jobs: List[Dict[str, Any]]):
+        self.jobs = jobs
+        n = self.size = len(jobs)
+        self.universe = (1 << n) - 1
+
+        positions = partial(array, "I")
+        locations: Dict[str, array] = defaultdict(positions)
+        types: Dict[str, array] = defaultdict(positions)
+        skills: Dict[str, array] = defaultdict(positions)
+        skill_counts: Dict[int, array] = defaultdict(positions)
+        tokens: Dict[str, array] = defaultdict(positions)
+        self._job_skills: List[List[str]] = []
+        findall = WORD_RE.findall
+        for p, job in enumerate(jobs):
+            get = job.get
+            locations[get("location") or ""].append(p)
+            types[get("type") or ""].append(p)
+            job_skills = list(dict.fromkeys([str(s).lower().strip() for s in get("skills") or ()]))
+            self._job_skills.append(job_skills)
+            for s in job_skills:
+                skills[s].append(p)
+            skill_counts[len(job_skills)].append(p)
+            for token in set(findall(f"{get('title', '')} {get('company', '')} {get('description', '')}".lower())):
+                tokens[token].append(p)
+
+        self.locations = {k: bits_from_positions(v, n) for k, v in locations.items()}
+        self.types = {k: bits_from_positions(v, n) for k, v in types.items()}
+        self.skills = {k: bits_from_positions(v, n) for k, v in skills.items()}
+        self.skill_counts = {k: bits_from_positions(v, n) for k, v in skill_counts.items()}
+        # Frequent tokens as bitmaps, rare ones stay as (much smaller) position arrays
+        frequent = max(64, n // 16)
+        self.tokens: Dict[str, Any] = {
+            k: bits_from_positions(v, n) if len(v) > frequent else v for k, v in tokens.items()
+        }
+        self.vocabulary = sorted(self.tokens)
+        self._token_masks = TTLCache(maxsize=512, ttl=None, name="job-search-terms")
+
+        self.salary = SortedIndex([float(job.get("salary") or 0) for job in jobs], descending=True)
+        self.salary_max = SortedIndex([float(job.get("salaryMax") or 0) for job in jobs])
+        self.experience = SortedIndex([float(job.get("experience") or 0) for job in jobs])
+        self.posted = SortedIndex([_timestamp(job.get("postedDate")) for job in jobs], descending=True)
+
+    def __len__(self):
+        return self.size
+
+    # --- filters ---
+
+    def _token_mask(self, token: str) -> int:
+        entry = self.tokens.get(token)
+        if entry is None or isinstance(entry, int):
+            return entry or 0
+        mask = self._token_masks.get(token)
+        if mask is None:
+            mask = bits_from_positions(entry, self.size)
+            self._token_masks.set(token, mask)
+        return mask
+
+    def _prefix_mask(self, prefix: str) -> int:
+        key = ("prefix", prefix)
+        mask = self._token_masks.get(key)
+        if mask is None:
+            mask = 0
+            i = bisect.bisect_left(self.vocabulary, prefix)
+            for token in self.vocabulary[i:i + MAX_PREFIX_TERMS]:
+                if not token.startswith(prefix):
+                    break
+                mask |= self._token_mask(token)
+            self._token_masks.set(key, mask)
+        return mask
+
+    def text_mask(self, query: str) -> int:
+        """Jobs containing every query word; the last word also matches as a prefix (search-as-you-type)."""
+        words = WORD_RE.findall(query.lower())
+        mask = self.universe
+        for i, word in enumerate(words):
+            last = i == len(words) - 1
+            mask &= self._prefix_mask(word) if last and len(word) >= 2 else self._token_mask(word)
+            if not mask:
+                break
+        return mask
+
+    def filter_mask(self, q: str = "", locations: Iterable[str] = (), types: Iterable[str] = (),
+                    skills: Iterable[str] = (), max_experience: Optional[float] = None,
+                    min_salary: Optional[float] = None, posted_after: Optional[datetime] = None) -> int:
+        mask = self.universe
+        if locations:
+            mask &= self._any_of(self.locations, locations)
+        if types and mask:
+            mask &= self._any_of(self.types, types)
+        if skills and mask:
+            mask &= self._any_of(self.skills, (_skill(s) for s in skills))
+        if max_experience is not None and mask:
+            mask &= self.experience.at_most(max_experience, self.universe)
+        if min_salary is not None and mask:
+            mask &= self.salary_max.at_least(min_salary)
+        if posted_after is not None and mask:
+            mask &= self.posted.at_least(posted_after.timestamp())
+        if q and q.strip() and mask:
+            mask &= self.text_mask(q)
+        return mask
+
+    @staticmethod
+    def _any_of(index: Dict[str, int], values: Iterable[str]) -> int:
+        mask = 0
+        for value in values:
+            mask |= index.get(value, 0)
+        return mask
+
+    # --- ordering ---
+
+    def _match_groups(self, mask: int, user_skills: List[str]) -> Dict[int, int]:
+        """Bitmap of jobs per match score, via a bit-sliced count of matched skills per job."""
+        planes: List[int] = []
+        for skill, bitmap in self.skills.items():
+            if not any(u in skill or skill in u for u in user_skills):
+                continue
+            carry = bitmap & mask
+            for i in range(len(planes)):
+                if not carry:
+                    break
+                planes[i], carry = planes[i] ^ carry, planes[i] & carry
+            if carry:
+                planes.append(carry)
+
+        groups: Dict[int, int] = {}
+        for total, with_total in self.skill_counts.items():
+            remaining = with_total & mask
+            for matched in range(total + 1):
+                if not remaining:
+                    break
+                exact = remaining
+                for bit, plane in enumerate(planes):
+                    exact &= plane if matched >> bit & 1 else ~plane
+                if matched >> len(planes):
+                    exact = 0
+                if exact:
+                    score = _score(matched / total if total else 0)
+                    groups[score] = groups.get(score, 0) | exact
+                    remaining ^= exact
+        return groups
+
+    def _page_by_rank(self, index: SortedIndex, mask: int, count: int, after: int,
+                      limit: int) -> List[Tuple[int, int]]:
+        """(rank, position) of the next `limit` matches in index.order after rank `after`."""
+        order, order_rank = index.order, index.order_rank
+        if count <= SPARSE_MATCHES:
+            ranks = (order_rank[p] for p in iter_bits(mask, self.size))
+            return [(r, order[r]) for r in heapq.nsmallest(limit, (r for r in ranks if r > after))]
+        data = mask.to_bytes((self.size + 7) >> 3, "little")
+        page = []
+        for r in range(after + 1, self.size):
+            p = order[r]
+            if data[p >> 3] >> (p & 7) & 1:
+                page.append((r, p))
+                if len(page) == limit:
+                    break
+        return page
+
+    # --- query ---
+
+    def search(self, q: str = "", locations: Iterable[str] = (), types: Iterable[str] = (),
+               skills: Iterable[str] = (), max_experience: Optional[float] = None,
+               min_salary: Optional[float] = None, posted_after: Optional[datetime] = None,
+               sort: str = "relevance", user_skills: Iterable[str] = (), limit: int = 12,
+               cursor: Optional[str] = None) -> Dict[str, Any]:
+        """One page of matching jobs plus the total count and the cursor for the next page.
+
+        Sorts: "relevance" (catalog order), "match" (resume match score, needs user_skills),
+        "salary" and "date" (highest / newest first). Raises ValueError on a bad sort or cursor.
+        """
+        if sort not in SORTS:
+            raise ValueError(f"sort must be one of {', '.join(SORTS)}")
+        limit = max(1, min(limit, MAX_LIMIT))
+        user = [s for s in dict.fromkeys(_skill(s) for s in user_skills) if s]
+        locations, types, skills = list(locations), list(types), list(skills)
+        if sort == "match" and not user:
+            sort = "relevance"
+        fingerprint = hashlib.sha256(json.dumps(
+            [q, sorted(locations), sorted(types), sorted(_skill(s) for s in skills), max_experience,
+             min_salary, posted_after.isoformat() if posted_after else None, sort, sorted(user), self.size],
+            default=str,
+        ).encode()).hexdigest()[:16]
+        after = self._decode_cursor(cursor, fingerprint) if cursor else None
+
+        mask = self.filter_mask(q, locations, types, skills, max_experience, min_salary, posted_after)
+        total = mask.bit_count()
+
+        # Fetch one extra item to know whether there is a next page
+        if sort == "match":
+            groups = self._match_groups(mask, user)
+            page = []
+            for score in sorted(groups, reverse=True):
+                if after is not None and score > after[0]:
+                    continue
+                start = after[1] + 1 if after is not None and score == after[0] else 0
+                for p in iter_bits(groups[score], self.size, start):
+                    page.append(([score, p], p))
+                    if len(page) > limit:
+                        break
+                if len(page) > limit:
+                    break
+        elif sort in ("salary", "date"):
+            index = self.salary if sort == "salary" else self.posted
+            page = self._page_by_rank(index, mask, total, -1 if after is None else after, limit + 1)
+        else:
+            page = []
+            for p in iter_bits(mask, self.size, 0 if after is None else after + 1):
+                page.append((p, p))
+                if len(page) > limit:
+                    break
+
+        next_cursor = self._encode_cursor(page[limit - 1][0], fingerprint) if len(page) > limit else None
+        results = []
+        for _, p in page[:limit]:
+            job = dict(self.jobs[p])
+            if user:
+                job["matchScore"], job["missingSkills"] = match_score(self._job_skills[p], user)
+            else:
+                job["matchScore"], job["missingSkills"] = 0, []
+            results.append(job)
+        return {"jobs": results, "total": total, "next_cursor": next_cursor, "sort": sort}
+
+    @staticmethod
+    def _encode_cursor(key: Any, fingerprint: str) -> str:
+        raw = json.dumps({"f": fingerprint, "k": key}, separators=(",", ":")).encode()
+        return base64.urlsafe_b64encode(raw).decode().rstrip("=")
+
+    @staticmethod
+    def _decode_cursor(cursor: str, fingerprint: str) -> Any:
+        try:
+            data = json.loads(base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4)))
+            key = data["k"]
+        except (ValueError, TypeError, KeyError):
+            raise ValueError("Invalid cursor")
+        if data.get("f") != fingerprint:
+            raise ValueError("Cursor does not belong to this query")
+        return key
+
+
+def load_jobs(path) -> List[Dict[str, Any]]:
+    with open(path, "r", encoding="utf-8") as f:
+        return json.load(f)
@@ -1,31 +1,59 @@
 # backend/main.py
 import os
+import sys
+import asyncio
 import json
 import io
 import re
 import time
 import base64
+import hashlib
+from collections import Counter
+from contextlib import asynccontextmanager
+from email.utils import formatdate, parsedate_to_datetime
 from pathlib import Path
 from datetime import datetime, timedelta
 import random
-from fastapi import FastAPI, UploadFile, File, Form, HTTPException, WebSocket, WebSocketDisconnect
+import inspect
+from fastapi import FastAPI, UploadFile, File, Form, HTTPException, WebSocket, WebSocketDisconnect, Request, Query
 from fastapi.middleware.cors import CORSMiddleware
-from fastapi.responses import JSONResponse, StreamingResponse
-from pydantic import BaseModel
-from typing import List, Optional, Dict, Any
+from fastapi.responses import JSONResponse, StreamingResponse, Response
+from pydantic import BaseModel, Field, ValidationError
+from typing import List, Optional, Dict, Any, Callable, Literal, Tuple
 from dotenv import load_dotenv
-from groq import Groq
+import anyio
+from groq import Groq, AsyncGroq
 from huggingface_hub import InferenceClient
-from supabase import create_client, Client
 import google.generativeai as genai
 from google.generativeai import types 
+import zipfile
+import zlib
 import pdfplumber
 import docx
-from reportlab.lib.pagesizes import letter
-from reportlab.platypus import SimpleDocTemplate, Paragraph, Spacer
-from reportlab.lib.styles import getSampleStyleSheet
+from docx.opc.exceptions import OpcError
+from pdfminer.psparser import PSException
 from enum import Enum
 
+# Sibling modules resolve whether uvicorn runs from backend/ or the repo root
+sys.path.insert(0, str(Path(__file__).resolve().parent))
+from analytics_store import (
+    ApplicationAnalytics, APPLICATION_SOURCES, APPLICATION_STATUSES, DASHBOARD_PANELS, MAX_SMALL_INT, window_bounds, build_overview, build_pipeline, build_time_to_hire,
+    build_source_effectiveness, build_candidate_quality, build_recent_applications,
+)
+from cache import TTLCache, DiskCache, TieredCache
+from resume_parser import RESUME_SECTION_HEADERS, parse_resume_text, section_key
+from skill_index import SkillIndex, TOKEN_RE
+from candidate_ranker import ResumeCorpus
+from job_search import JobCatalog, load_jobs
+from providers import GEMINI_POOL, GROQ_POOL, DOCUMENT_POOL, pool_stats
+from model_chain import ModelChain, ModelChainExhausted
+from roadmap_pdf import content_disposition, iter_chunks, render_roadmap_pdf, roadmap_filename, roadmap_key, zip_roadmaps
+from unread_counts import UnreadCounters
+from notify_bus import bus_from_env, hub_from_env
+from digest import DigestScheduler, WINDOWS as DIGEST_WINDOWS, digest_row, iso_timestamp
+from rate_limit import RateLimited, estimate_tokens, limiter_from_env
+from data_store import store_from_env
+
 # ==========================================
 # 0. ROBUST ENVIRONMENT LOADING
 # ==========================================
@@ -64,7 +92,46 @@ try:
 except Exception as e:
     print(f"❌ Error loading taxonomy: {e}")
 
-app = FastAPI()
+# Normalized name/alias lookup + in-text matcher, built once
+SKILL_INDEX = SkillIndex(SKILL_TAXONOMY.get("skills", {}))
+# analyze_gap skips the Gemini extraction call when the JD already names this many taxonomy skills
+SKILL_MATCH_SKIP_AI_MIN = int(os.environ.get("SKILL_MATCH_SKIP_AI_MIN", "8"))
+
+# Load + index the job catalog served by /api/jobs/search
+JOBS_DATA_PATH = Path(os.environ.get("JOBS_DATA_PATH") or BASE_DIR / "data" / "jobs.json")
+JOB_CATALOG = JobCatalog([])
+try:
+    if JOBS_DATA_PATH.exists():
+        _started = time.perf_counter()
+        JOB_CATALOG = JobCatalog(load_jobs(JOBS_DATA_PATH))
+        print(f"✅ Job catalog indexed ({len(JOB_CATALOG)} jobs, {time.perf_counter() - _started:.1f}s).")
+    else:
+        print(f"⚠️ Warning: {JOBS_DATA_PATH} not found. Job search is empty.")
+except Exception as e:
+    print(f"❌ Error loading job catalog: {e}")
+
+# Long-running loops (e.g. unread-count reconciliation), started with the app and
+# cancelled on shutdown. Register with @background_task.
+BACKGROUND_TASKS: List[Callable[[], Any]] = []
+
+def background_task(fn: Callable[[], Any]) -> Callable[[], Any]:
+    BACKGROUND_TASKS.append(fn)
+    return fn
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    tasks = [asyncio.create_task(fn()) for fn in BACKGROUND_TASKS]
+    try:
+        yield
+    finally:
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+        NOTIFY_BUS.close()
+        if db:
+            await db.aclose()
+
+app = FastAPI(lifespan=lifespan)
 
 app.add_middleware(
     CORSMiddleware,
@@ -80,6 +147,8 @@ app.add_middleware(
 
 # Groq Client
 groq_client = Groq(api_key=groq_key)
+# Native async client, used for token streaming
+async_groq_client = AsyncGroq(api_key=groq_key)
 
 # Hugging Face Client
 hf_client = InferenceClient(token=hf_token)
@@ -94,15 +163,35 @@ if gemini_key:
     except Exception as e:
         print(f"⚠️ Gemini Init Failed: {e}")
 
-# Supabase Client
-try:
-    if supabase_url and supabase_key:
-        supabase: Client = create_client(supabase_url, supabase_key)
-    else:
-        raise ValueError("Supabase keys are empty")
-except Exception as e:
-    print(f"⚠️ Supabase Init Failed: {e}")
-    supabase = None
+def gemini_generate(model_name: str, prompt):
+    return genai.GenerativeModel(model_name).generate_content(prompt)
+
+def parse_gemini_json(response):
+    return json.loads(response.text.strip().replace("```json", "").replace("```", ""))
+
+# Per-provider/model RPM and TPM buckets, shared by every worker on the host through
+# a locked state file. Callers wait up to RATE_LIMIT_MAX_WAIT seconds for quota,
+# otherwise they take their rule-based path instead of calling into a 429.
+RATE_LIMITER = limiter_from_env(BASE_DIR / ".cache" / "rate-limits.json")
+
+# Text prompts: gemini-2.5-flash, then gemini-flash-latest, within a per-request budget.
+# A model that answers with a quota / availability error is skipped for the cooldown.
+GEMINI_CHAIN = ModelChain(
+    "gemini",
+    ["gemini-2.5-flash", "gemini-flash-latest"],
+    gemini_generate,
+    GEMINI_POOL,
+    budget=float(os.environ.get("GEMINI_BUDGET_SECONDS", "20")),
+    cooldown=float(os.environ.get("GEMINI_BREAKER_COOLDOWN", "60")),
+    hedge_after=float(os.environ.get("GEMINI_HEDGE_AFTER", "0")) or None,
+    limiter=RATE_LIMITER,
+)
+
+# Supabase tables (resumes, notifications, notification_preferences): async PostgREST
+# client with pooled keep-alive connections, or DATA_STORE=memory for offline load tests
+db = store_from_env(supabase_url, supabase_key)
+if db is None:
+    print("⚠️ Supabase Init Failed: Supabase keys are empty")
 
 # ==========================================
 # 2. DATA MODELS
@@ -135,16 +224,41 @@ class GapAnalysisRequest(BaseModel):
     job_description: str
     experience_years: int = 1
 
+class CandidateText(BaseModel):
+    id: str
+    text: str
+    name: Optional[str] = None
+
+class RankCandidatesRequest(BaseModel):
+    job_description: str
+    resumes: List[CandidateText] = []
+    candidate_ids: Optional[List[str]] = None
+    top_k: int = 10
+
 class PDFRequest(BaseModel):
     roadmap_data: Dict[str, Any]
     candidate_name: str
 
+class PDFBatchRequest(BaseModel):
+    roadmaps: List[PDFRequest]
+
+class ApplicationEvent(BaseModel):
+    id: Optional[int] = Field(None, ge=1, le=2**63 - 1)
+    job_id: Optional[int] = Field(None, ge=0, le=2**31 - 1)
+    candidate_name: Optional[str] = None
+    source: Optional[Literal[tuple(APPLICATION_SOURCES)]] = None
+    status: Optional[Literal[tuple(APPLICATION_STATUSES)]] = None
+    quality_score: Optional[int] = Field(None, ge=0, le=100)
+    application_date: Optional[datetime] = None
+    time_to_hire_days: Optional[int] = Field(None, ge=0, le=MAX_SMALL_INT)
+
 class NotificationType(str, Enum):
     JOB_MATCH = "JOB_MATCH"
     APPLICATION_STATUS = "APPLICATION_STATUS"
     EMPLOYER_MESSAGE = "EMPLOYER_MESSAGE"
     SKILL_RECOMMENDATION = "SKILL_RECOMMENDATION"
     INTERVIEW_REMINDER = "INTERVIEW_REMINDER"
+    DIGEST = "DIGEST"
 
 class NotificationPriority(str, Enum):
     HIGH = "high"
@@ -157,6 +271,9 @@ class NotificationCreate(BaseModel):
     priority: NotificationPriority = NotificationPriority.MEDIUM
     data: Dict[str, Any] = {}
 
+class NotificationBatchRequest(BaseModel):
+    notifications: List[NotificationCreate]
+
 class NotificationResponse(BaseModel):
     id: str
     user_id: str
@@ -178,49 +295,63 @@ class PreferencesUpdate(BaseModel):
 # 3. HELPER FUNCTIONS
 # ==========================================
 
-def regex_fallback(text):
-    """Last resort regex extraction if AI fails completely"""
-    print("⚠️ Using Regex Fallback")
-    data = {
-        "name": "Candidate", "email": "", "phone": "",
-        "skills": [], "experience": [], "projects": []
-    }
-    
-    # Attempt to find name in first 5 lines (Smarter logic)
-    lines = [l.strip() for l in text.split('\n') if l.strip()]
-    for i in range(min(5, len(lines))):
-        line = lines[i]
-        # Skip header words
-        if any(k in line.lower() for k in ["resume", "cv", "curriculum", "page"]): continue
-        # Name usually has no numbers and is reasonably short
-        if 3 < len(line) < 50 and not any(c.isdigit() for c in line):
-            data["name"] = line
-            break
+# Extraction budgets: long portfolios / scanned CVs rarely add signal past these
+EXTRACT_MAX_PAGES = int(os.environ.get("EXTRACT_MAX_PAGES", "12"))
+EXTRACT_MAX_CHARS = int(os.environ.get("EXTRACT_MAX_CHARS", "60000"))
+# Pages still read after every section header has been seen (for the last section's body)
+EXTRACT_TAIL_PAGES = 1
 
-    # Email
-    email_match = re.search(r'[a-zA-Z0-9._%+-]+@[a-zA-Z0-9.-]+\.[a-zA-Z]{2,}', text)
-    if email_match: data["email"] = email_match.group(0)
-    
-    # Phone (Handles +91, spaces, dashes, brackets)
-    phone_match = re.search(r'(\+?\d{1,3}[\s.-]?)?\(?\d{3}\)?[\s.-]?\d{3}[\s.-]?\d{4}', text)
-    if phone_match: data["phone"] = phone_match.group(0).strip()
-    
-    return data
+def iter_document_text(file_bytes, filename):
+    """Yields the text of a PDF one page at a time (DOCX as a single chunk).
+
+    Pages are only parsed when the consumer asks for them, and each page's
+    cached layout objects are released once its text has been taken.
+    """
+    if filename.endswith(".pdf"):
+        with pdfplumber.open(io.BytesIO(file_bytes)) as pdf:
+            for page in pdf.pages:
+                try:
+                    yield page.extract_text() or ""
+                finally:
+                    page.close()
+    elif filename.endswith(".docx"):
+        doc = docx.Document(io.BytesIO(file_bytes))
+        yield "\n".join(para.text for para in doc.paragraphs)
+
+def _section_headers_in(text):
+    return {key for key in (section_key(line.strip()) for line in text.splitlines()) if key}
 
-def extract_text_fallback(file_bytes, filename):
-    """Basic text extraction for fallback relevancy check"""
-    text = ""
+def extract_text_fallback(file_bytes, filename, max_pages=None, max_chars=None, stop_when_sections_found=True):
+    """Basic text extraction for fallback parsing and relevancy checks.
+
+    Streams pages from iter_document_text and stops at the page/char budget, or
+    EXTRACT_TAIL_PAGES after all resume sections have been seen.
+    """
+    max_pages = EXTRACT_MAX_PAGES if max_pages is None else max_pages
+    max_chars = EXTRACT_MAX_CHARS if max_chars is None else max_chars
+    chunks = []
+    chars = 0
+    sections_seen = set()
+    tail_pages = None
     try:
-        if filename.endswith(".pdf"):
-            with pdfplumber.open(io.BytesIO(file_bytes)) as pdf:
-                for page in pdf.pages:
-                    text += (page.extract_text() or "") + "\n"
-        elif filename.endswith(".docx"):
-            doc = docx.Document(io.BytesIO(file_bytes))
-            for para in doc.paragraphs:
-                text += para.text + "\n"
-    except: pass
-    return text
+        for page_no, page_text in enumerate(iter_document_text(file_bytes, filename), start=1):
+            chunks.append(page_text + "\n")
+            chars += len(page_text) + 1
+            if page_no >= max_pages or chars >= max_chars:
+                break
+            if stop_when_sections_found:
+                if tail_pages is None:
+                    sections_seen |= _section_headers_in(page_text)
+                    if len(sections_seen) == len(RESUME_SECTION_HEADERS):
+                        tail_pages = EXTRACT_TAIL_PAGES
+                else:
+                    tail_pages -= 1
+                if tail_pages == 0:
+                    break
+    except (PSException, OpcError, zipfile.BadZipFile, KeyError, ValueError) as e:
+        # Corrupt / unsupported document: keep whatever pages were readable
+        print(f"⚠️ Text extraction stopped for {filename}: {type(e).__name__}: {e}")
+    return "".join(chunks)[:max_chars]
 
 def calculate_job_relevancy(resume_text, job_description):
     if not job_description or len(job_description.strip()) < 10: return 0
@@ -238,9 +369,21 @@ def normalize_skill(skill):
 
 # --- Fallback helpers when Gemini quota is exceeded ---
 def extract_skills_from_jd_simple(jd_text: str) -> List[str]:
-    """Simple keyword extractor for Job Description when AI is unavailable."""
+    """Simple keyword extractor for Job Description when AI is unavailable.
+
+    Taxonomy skills found by SKILL_INDEX come first; frequent other words fill the rest.
+    """
     if not jd_text:
         return []
+    counts = Counter()
+    covered = set()
+    for skill, start, end in SKILL_INDEX.scan(jd_text):
+        counts[skill] += 1
+        covered.update(t.lower() for t in TOKEN_RE.findall(jd_text[start:end]))
+    unique = sorted(counts, key=lambda skill: -counts[skill])[:15]
+    if len(unique) >= 15:
+        return unique
+
     text = jd_text.lower()
     stop = {
         "and","the","to","of","in","for","with","a","an","is","on","at","by",
@@ -256,17 +399,19 @@ def extract_skills_from_jd_simple(jd_text: str) -> List[str]:
         freq[t] = freq.get(t, 0) + 1
     # Sort by frequency then alphabetically for stability
     sorted_tokens = sorted(freq.items(), key=lambda x: (-x[1], x[0]))
-    unique = []
-    seen = set()
+    seen = {skill.lower() for skill in unique}
     for tok, _ in sorted_tokens:
         base = tok.strip('.').strip('-')
+        # Already reported as (part of) a taxonomy skill
+        if SKILL_INDEX.lookup(base) or covered.issuperset(t.lower() for t in TOKEN_RE.findall(base)):
+            continue
         if base not in seen:
             seen.add(base)
-            unique.append(base)
+            # Title-case for nicer display
+            unique.append(base.title())
         if len(unique) >= 15:
             break
-    # Title-case for nicer display
-    return [u.title() for u in unique]
+    return unique
 
 def build_ai_data_fallback(missing_skills_context: List[str]) -> Dict[str, Any]:
     """Constructs a deterministic fallback analysis when AI calls fail."""
@@ -323,138 +468,14 @@ def build_ai_data_fallback(missing_skills_context: List[str]) -> Dict[str, Any]:
         }
     }
 
-# --- Rule-based resume text parsing (sections: Skills, Experience, Education, Projects) ---
-def parse_resume_text(text: str) -> Dict[str, Any]:
-    """Parse resume text to extract name/email/phone and sections.
-    Returns dict with keys: name, email, phone, education, skills, experience, projects.
-    """
-    data = {
-        "name": "Candidate",
-        "email": "",
-        "phone": "",
-        "education": "",
-        "skills": [],
-        "experience": [],
-        "projects": []
-    }
-
-    if not text:
-        return data
-
-    lines = [l.strip() for l in text.splitlines()]
-    lines = [l for l in lines if l]
-
-    # Name: first non-header reasonable line
-    for i in range(min(5, len(lines))):
-        l = lines[i]
-        if any(k in l.lower() for k in ["resume", "curriculum", "cv", "page"]):
-            continue
-        if 3 < len(l) < 60 and not any(c.isdigit() for c in l):
-            data["name"] = l
-            break
-
-    # Email and Phone
-    email_match = re.search(r'[A-Za-z0-9._%+-]+@[A-Za-z0-9.-]+\.[A-Za-z]{2,}', text)
-    if email_match:
-        data["email"] = email_match.group(0)
-    phone_match = re.search(r'(\+?\d{1,3}[\s.-]?)?\(?\d{3}\)?[\s.-]?\d{3}[\s.-]?\d{4}', text)
-    if phone_match:
-        data["phone"] = phone_match.group(0).strip()
-
-    # Section detection
-    sec_names = [
-        ("skills", ["skills", "technical skills", "skills & tools"]),
-        ("experience", ["experience", "work experience", "professional experience", "employment history"]),
-        ("education", ["education", "academic background"]),
-        ("projects", ["projects", "key projects", "personal projects"])
-    ]
-
-    indices = []
-    for idx, l in enumerate(lines):
-        low = l.lower().strip(':').strip()
-        for key, variants in sec_names:
-            if any(low.startswith(v) for v in variants):
-                indices.append((idx, key))
-                break
-
-    indices.sort(key=lambda x: x[0])
-    sections: Dict[str, List[str]] = {"skills": [], "experience": [], "education": [], "projects": []}
-
-    for i, (start_idx, key) in enumerate(indices):
-        end_idx = indices[i + 1][0] if i + 1 < len(indices) else len(lines)
-        content = lines[start_idx + 1:end_idx]
-        sections[key] = content
-
-    # Parse skills (comma/semicolon separated or bullet lines)
-    parsed_skills: List[str] = []
-    for l in sections["skills"]:
-        if not l:
-            continue
-        # bullets
-        if l.startswith(('-', '*', '•')):
-            l = l.lstrip('-*•').strip()
-        # split by comma/semicolon
-        parts = re.split(r"[,;]\s*", l)
-        for p in parts:
-            p = p.strip().strip('.')
-            if p and len(p) > 1 and not p.lower().startswith("experience"):
-                parsed_skills.append(p)
-    # dedupe
-    seen = set()
-    uniq_skills = []
-    for s in parsed_skills:
-        ns = s
-        if ns.lower() not in seen:
-            seen.add(ns.lower())
-            uniq_skills.append(ns)
-
-    data["skills"] = uniq_skills
-
-    # Parse experience (bullet lines or sentences)
-    exp_items: List[str] = []
-    for l in sections["experience"]:
-        if not l:
-            continue
-        # capture bullets or role-company-date patterns
-        if l.startswith(('-', '*', '•')):
-            item = l.lstrip('-*•').strip()
-            if item:
-                exp_items.append(item)
-        else:
-            # detect Role @ Company (Dates)
-            if re.search(r"@|\b(Inc\.|LLC|Ltd\.|Pvt\.|Technologies|Solutions)\b", l) or re.search(r"\b(\d{4})\b", l):
-                exp_items.append(l)
-            elif len(l) > 20:
-                exp_items.append(l)
-
-    # compact experience items
-    data["experience"] = [e.strip() for e in exp_items if e.strip()]
-
-    # Education: join lines until next section
-    if sections["education"]:
-        data["education"] = "; ".join(sections["education"]).strip()
-
-    # Projects
-    proj_items: List[str] = []
-    for l in sections["projects"]:
-        if not l:
-            continue
-        if l.startswith(('-', '*', '•')):
-            proj_items.append(l.lstrip('-*•').strip())
-        elif len(l) > 10:
-            proj_items.append(l.strip())
-    data["projects"] = proj_items
-
-    return data
-
 # ==========================================
 # 4. MOCK ANALYTICS DATA (RESTORED)
 # ==========================================
 
 def generate_mock_analytics_data():
     """Generate comprehensive mock data for analytics dashboard"""
-    sources = ["LinkedIn", "Naukri", "Indeed", "Referral", "Company Website", "Glassdoor"]
-    statuses = ["Applied", "Screening", "Interview", "Offer", "Hired", "Rejected"]
+    sources = APPLICATION_SOURCES
+    statuses = APPLICATION_STATUSES
     
     applications = []
     base_date = datetime.now() - timedelta(days=90)
@@ -483,6 +504,8 @@ def generate_mock_analytics_data():
     return applications
 
 MOCK_APPLICATIONS = generate_mock_analytics_data()
+# Columnar store + incrementally maintained daily rollups, seeded with the mock data
+APPLICATION_ANALYTICS = ApplicationAnalytics(MOCK_APPLICATIONS)
 
 # ==========================================
 # 5. API ENDPOINTS
@@ -492,156 +515,155 @@ MOCK_APPLICATIONS = generate_mock_analytics_data()
 def health():
     return {"status": "FastAPI is running"}
 
+@app.get("/health/pools")
+def health_pools():
+    """Concurrency usage of the provider / document-parsing executors."""
+    return pool_stats()
+
+@app.get("/health/data-store")
+def health_data_store():
+    """Per-operation calls, errors, retries and latency of the Supabase table client."""
+    return db.stats() if db else {"backend": None}
+
+@app.get("/health/models")
+def health_models():
+    """Per-model calls, errors, hedges and circuit-breaker state of the model chains."""
+    return {"gemini": GEMINI_CHAIN.stats()}
+
+@app.get("/health/rate-limits")
+def health_rate_limits():
+    """Configured limits, per-model granted/throttled calls and current bucket levels."""
+    return RATE_LIMITER.stats()
+
 # --- ANALYTICS ENDPOINTS (RESTORED) ---
 
-@app.get("/analytics/overview")
-def get_analytics_overview():
-    thirty_days_ago = datetime.now() - timedelta(days=30)
-    sixty_days_ago = datetime.now() - timedelta(days=60)
-    
-    recent_apps = [app for app in MOCK_APPLICATIONS if datetime.fromisoformat(app["application_date"]) >= thirty_days_ago]
-    previous_apps = [app for app in MOCK_APPLICATIONS if sixty_days_ago <= datetime.fromisoformat(app["application_date"]) < thirty_days_ago]
-    
-    total_recent = len(recent_apps)
-    total_previous = len(previous_apps)
-    
-    applications_change = "+100%"
-    if total_previous > 0:
-        change = ((total_recent - total_previous) / total_previous) * 100
-        applications_change = f"{'+' if change >= 0 else ''}{int(change)}%"
-    
-    active_jobs = len(set(app["job_id"] for app in recent_apps))
-    
-    hired_apps = [app for app in recent_apps if app["status"] == "Hired" and app["time_to_hire_days"]]
-    avg_time_to_hire = int(sum(app["time_to_hire_days"] for app in hired_apps) / len(hired_apps)) if hired_apps else 18
-    
-    offers = [app for app in recent_apps if app["status"] in ["Offer", "Hired"]]
-    hired = [app for app in recent_apps if app["status"] == "Hired"]
-    offer_acceptance_rate = int((len(hired) / len(offers)) * 100) if offers else 75
-    
-    source_counts = {}
-    for app in recent_apps:
-        source_counts[app["source"]] = source_counts.get(app["source"], 0) + 1
-    top_source = max(source_counts, key=source_counts.get) if source_counts else "LinkedIn"
-    
-    return {
-        "period": "last_30_days",
-        "metrics": {
-            "total_applications": total_recent,
-            "applications_change": applications_change,
-            "active_jobs": active_jobs,
-            "avg_time_to_hire_days": avg_time_to_hire,
-            "offer_acceptance_rate": offer_acceptance_rate,
-            "top_source": top_source
+# Rendered GET /analytics/* bodies. Cleared whenever applications are ingested;
+# the TTL bounds staleness as the rolling 30/60/90-day windows move forward.
+ANALYTICS_CACHE = TTLCache(
+    maxsize=256, ttl=float(os.environ.get("ANALYTICS_CACHE_TTL", "60")), name="analytics"
+)
+ANALYTICS_NOT_MODIFIED = {"count": 0}
+
+def _not_modified(request: Request, entry: Dict[str, Any]) -> bool:
+    if_none_match = request.headers.get("if-none-match")
+    if if_none_match:
+        return entry["etag"] in [tag.strip() for tag in if_none_match.split(",")] or if_none_match.strip() == "*"
+    if_modified_since = request.headers.get("if-modified-since")
+    if if_modified_since:
+        try:
+            return int(entry["modified_at"]) <= parsedate_to_datetime(if_modified_since).timestamp()
+        except (TypeError, ValueError):
+            return False
+    return False
+
+@app.middleware("http")
+async def analytics_cache_middleware(request: Request, call_next):
+    """Serves GET /analytics/* from ANALYTICS_CACHE with ETag / Last-Modified revalidation.
+
+    A fresh entry is answered without calling the handler; a matching
+    If-None-Match / If-Modified-Since gets a bodiless 304.
+    """
+    path = request.url.path
+    if request.method != "GET" or not path.startswith("/analytics/") or path == "/analytics/cache-stats":
+        return await call_next(request)
+
+    key = (path, tuple(sorted(request.query_params.multi_items())))
+    entry = ANALYTICS_CACHE.get(key)
+    cache_status = "HIT"
+    if entry is None:
+        cache_status = "MISS"
+        response = await call_next(request)
+        if response.status_code != 200:
+            return response
+        body = b"".join([chunk async for chunk in response.body_iterator])
+        modified_at = time.time()
+        entry = {
+            "body": body,
+            "media_type": response.headers.get("content-type", "application/json"),
+            "etag": f'"{hashlib.sha256(body).hexdigest()[:32]}"',
+            "modified_at": modified_at,
+            "last_modified": formatdate(modified_at, usegmt=True),
         }
+        ANALYTICS_CACHE.set(key, entry)
+
+    headers = {
+        "ETag": entry["etag"],
+        "Last-Modified": entry["last_modified"],
+        "Cache-Control": "no-cache",
+        "X-Cache": cache_status,
     }
+    if _not_modified(request, entry):
+        ANALYTICS_NOT_MODIFIED["count"] += 1
+        return Response(status_code=304, headers=headers)
+    return Response(content=entry["body"], media_type=entry["media_type"], headers=headers)
+
+@app.get("/analytics/cache-stats")
+def get_analytics_cache_stats():
+    return {**ANALYTICS_CACHE.stats(), "not_modified_responses": ANALYTICS_NOT_MODIFIED["count"]}
+
+@app.get("/analytics/overview")
+def get_analytics_overview():
+    bounds = window_bounds()
+    recent = APPLICATION_ANALYTICS.window_stats(bounds["thirty_days_ago"])
+    previous = APPLICATION_ANALYTICS.window_stats(bounds["sixty_days_ago"], bounds["thirty_days_ago"])
+    return build_overview(recent, previous)
 
 @app.get("/analytics/pipeline")
 def get_pipeline_data():
-    thirty_days_ago = datetime.now() - timedelta(days=30)
-    recent_apps = [app for app in MOCK_APPLICATIONS if datetime.fromisoformat(app["application_date"]) >= thirty_days_ago]
-    
-    pipeline = {}
-    for app in recent_apps:
-        status = app["status"]
-        pipeline[status] = pipeline.get(status, 0) + 1
-    
-    stages = ["Applied", "Screening", "Interview", "Offer", "Hired"]
-    funnel_data = [{"stage": stage, "count": pipeline.get(stage, 0)} for stage in stages]
-    return {"pipeline": funnel_data}
+    bounds = window_bounds()
+    return build_pipeline(APPLICATION_ANALYTICS.window_stats(bounds["thirty_days_ago"]))
 
 @app.get("/analytics/time-to-hire")
 def get_time_to_hire():
-    ninety_days_ago = datetime.now() - timedelta(days=90)
-    weekly_data = {}
-    for app in MOCK_APPLICATIONS:
-        if app["status"] == "Hired" and app["time_to_hire_days"]:
-            app_date = datetime.fromisoformat(app["application_date"])
-            if app_date >= ninety_days_ago:
-                week_key = app_date.strftime("%Y-W%U")
-                if week_key not in weekly_data: weekly_data[week_key] = []
-                weekly_data[week_key].append(app["time_to_hire_days"])
-    
-    time_series = []
-    for week, times in sorted(weekly_data.items()):
-        avg_time = sum(times) / len(times)
-        time_series.append({"week": week, "avg_days": round(avg_time, 1)})
-    return {"time_series": time_series}
+    bounds = window_bounds()
+    return build_time_to_hire(APPLICATION_ANALYTICS.hired_weekly(bounds["ninety_days_ago"]))
 
 @app.get("/analytics/source-effectiveness")
 def get_source_effectiveness():
-    thirty_days_ago = datetime.now() - timedelta(days=30)
-    recent_apps = [app for app in MOCK_APPLICATIONS if datetime.fromisoformat(app["application_date"]) >= thirty_days_ago]
-    
-    source_stats = {}
-    for app in recent_apps:
-        source = app["source"]
-        if source not in source_stats:
-            source_stats[source] = {"source": source, "applications": 0, "hired": 0, "avg_quality": []}
-        source_stats[source]["applications"] += 1
-        if app["status"] == "Hired": source_stats[source]["hired"] += 1
-        source_stats[source]["avg_quality"].append(app["quality_score"])
-    
-    sources = []
-    for source, stats in source_stats.items():
-        avg_quality = sum(stats["avg_quality"]) / len(stats["avg_quality"])
-        conversion_rate = (stats["hired"] / stats["applications"]) * 100 if stats["applications"] > 0 else 0
-        sources.append({
-            "source": source, "applications": stats["applications"], "hired": stats["hired"],
-            "conversion_rate": round(conversion_rate, 1), "avg_quality_score": round(avg_quality, 1)
-        })
-    return {"sources": sorted(sources, key=lambda x: x["applications"], reverse=True)}
+    bounds = window_bounds()
+    return build_source_effectiveness(APPLICATION_ANALYTICS.window_stats(bounds["thirty_days_ago"]))
 
 @app.get("/analytics/candidate-quality")
 def get_candidate_quality():
-    thirty_days_ago = datetime.now() - timedelta(days=30)
-    recent_apps = [app for app in MOCK_APPLICATIONS if datetime.fromisoformat(app["application_date"]) >= thirty_days_ago]
-    
-    buckets = {"40-50": 0, "51-60": 0, "61-70": 0, "71-80": 0, "81-90": 0, "91-100": 0}
-    for app in recent_apps:
-        score = app["quality_score"]
-        if 40 <= score <= 50: buckets["40-50"] += 1
-        elif 51 <= score <= 60: buckets["51-60"] += 1
-        elif 61 <= score <= 70: buckets["61-70"] += 1
-        elif 71 <= score <= 80: buckets["71-80"] += 1
-        elif 81 <= score <= 90: buckets["81-90"] += 1
-        elif 91 <= score <= 100: buckets["91-100"] += 1
-    
-    return {"distribution": [{"range": k, "count": v} for k, v in buckets.items()]}
+    bounds = window_bounds()
+    return build_candidate_quality(APPLICATION_ANALYTICS.window_stats(bounds["thirty_days_ago"]))
 
 @app.get("/analytics/jobs/{job_id}")
 def get_job_analytics(job_id: int):
-    job_apps = [app for app in MOCK_APPLICATIONS if app["job_id"] == job_id]
-    if not job_apps: return {"error": "Job not found"}
-    
-    status_counts = {}
-    for app in job_apps:
-        status = app["status"]
-        status_counts[status] = status_counts.get(status, 0) + 1
-    
-    hired_apps = [app for app in job_apps if app["status"] == "Hired" and app["time_to_hire_days"]]
-    avg_time_to_hire = int(sum(app["time_to_hire_days"] for app in hired_apps) / len(hired_apps)) if hired_apps else 0
-    avg_quality = sum(app["quality_score"] for app in job_apps) / len(job_apps)
-    
-    return {
-        "job_id": job_id, "total_applications": len(job_apps), "status_breakdown": status_counts,
-        "avg_time_to_hire_days": avg_time_to_hire, "avg_quality_score": round(avg_quality, 1), "hired_count": len(hired_apps)
-    }
+    return APPLICATION_ANALYTICS.job(job_id)
 
 @app.get("/analytics/recent-applications")
 def get_recent_applications():
-    thirty_days_ago = datetime.now() - timedelta(days=30)
-    recent_apps = [app for app in MOCK_APPLICATIONS if datetime.fromisoformat(app["application_date"]) >= thirty_days_ago]
-    sorted_apps = sorted(recent_apps, key=lambda x: x["application_date"], reverse=True)[:20]
-    
-    formatted = []
-    for app in sorted_apps:
-        formatted.append({
-            "id": app["id"], "candidate": app["candidate_name"], "job_id": app["job_id"],
-            "source": app["source"], "status": app["status"], "quality_score": app["quality_score"],
-            "date": datetime.fromisoformat(app["application_date"]).strftime("%Y-%m-%d")
-        })
-    return {"applications": formatted}
+    bounds = window_bounds()
+    return build_recent_applications(APPLICATION_ANALYTICS.recent(bounds["thirty_days_ago"]))
+
+@app.get("/analytics/dashboard")
+def get_analytics_dashboard(panels: Optional[str] = None):
+    """All dashboard panels in one response; `panels` is an optional comma-separated subset."""
+    selected = [p.strip() for p in panels.split(",") if p.strip()] if panels else DASHBOARD_PANELS
+    unknown = [p for p in selected if p not in DASHBOARD_PANELS]
+    if unknown:
+        raise HTTPException(status_code=400, detail=f"Unknown panels: {', '.join(unknown)}. Choose from: {', '.join(DASHBOARD_PANELS)}")
+    return APPLICATION_ANALYTICS.dashboard(selected)
+
+@app.post("/analytics/applications")
+def ingest_applications(payload: List[Dict[str, Any]]):
+    """Append or update application events; rollups are updated per event."""
+    # Validated here (not by FastAPI) so a bad event is a 400 before any of the batch is applied
+    events = []
+    for i, item in enumerate(payload):
+        try:
+            events.append(ApplicationEvent.model_validate(item))
+        except ValidationError as e:
+            raise HTTPException(status_code=400, detail={"index": i, "errors": e.errors(include_url=False, include_context=False)})
+    try:
+        # All or nothing: an event rejected by the store (e.g. a new id missing fields) undoes the batch
+        ingested = APPLICATION_ANALYTICS.ingest_many([event.model_dump(exclude_unset=True) for event in events])
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    ANALYTICS_CACHE.clear()
+    results = [{"id": row["id"], "action": "created" if created else "updated"} for row, created in ingested]
+    return {"success": True, "ingested": len(results), "applications": results}
 
 # --- JOB GENERATOR ---
 @app.post("/api/generate-job")
@@ -649,7 +671,11 @@ async def generate_job(request: JobRequest):
     try:
         system_prompt = "You are an expert HR AI. Generate a structured job description."
         user_prompt = f"Role: {request.jobTitle}, Skills: {request.skills}"
-        completion = groq_client.chat.completions.create(
+        if not await RATE_LIMITER.acquire("groq", "llama-3.3-70b-versatile", tokens=estimate_tokens(system_prompt, user_prompt)):
+            return JSONResponse(status_code=429, content={"success": False, "error": "Job generator is busy, try again shortly."},
+                                headers={"Retry-After": "10"})
+        completion = await GROQ_POOL.run(
+            groq_client.chat.completions.create,
             messages=[{"role": "system", "content": system_prompt}, {"role": "user", "content": user_prompt}],
             model="llama-3.3-70b-versatile",
         )
@@ -657,41 +683,135 @@ async def generate_job(request: JobRequest):
     except Exception as e:
         return JSONResponse(status_code=500, content={"success": False, "error": str(e)})
 
+def _sse(event: str, data: Dict[str, Any]) -> str:
+    return f"event: {event}\ndata: {json.dumps(data)}\n\n"
+
+@app.post("/api/generate-job/stream")
+async def generate_job_stream(request: JobRequest):
+    """
+    Streams the job description as Server-Sent Events: one `token` event per
+    chunk from Groq, then a `done` event with the full text and timings.
+    If the client disconnects, the generator is cancelled and the upstream
+    Groq stream is closed so no further tokens are produced.
+    """
+    system_prompt = "You are an expert HR AI. Generate a structured job description."
+    user_prompt = f"Role: {request.jobTitle}, Skills: {request.skills}"
+    model_name = "llama-3.3-70b-versatile"
+    if not await RATE_LIMITER.acquire("groq", model_name, tokens=estimate_tokens(system_prompt, user_prompt)):
+        return JSONResponse(status_code=429, content={"success": False, "error": "Job generator is busy, try again shortly."},
+                            headers={"Retry-After": "10"})
+
+    async def events():
+        started = time.perf_counter()
+        first_token_ms = None
+        parts = []
+        finish_reason = None
+        stream = None
+        try:
+            async with GROQ_POOL.slot():
+                stream = await async_groq_client.chat.completions.create(
+                    messages=[{"role": "system", "content": system_prompt}, {"role": "user", "content": user_prompt}],
+                    model=model_name,
+                    stream=True,
+                )
+                async for chunk in stream:
+                    if not chunk.choices:
+                        continue
+                    choice = chunk.choices[0]
+                    finish_reason = choice.finish_reason or finish_reason
+                    text = choice.delta.content
+                    if text:
+                        if first_token_ms is None:
+                            first_token_ms = int((time.perf_counter() - started) * 1000)
+                        parts.append(text)
+                        yield _sse("token", {"text": text})
+            yield _sse("done", {
+                "success": True,
+                "description": "".join(parts),
+                "model": model_name,
+                "finish_reason": finish_reason,
+                "time_to_first_token_ms": first_token_ms,
+                "duration_ms": int((time.perf_counter() - started) * 1000),
+            })
+        except Exception as e:
+            yield _sse("error", {"success": False, "error": str(e)})
+        finally:
+            if stream is not None:
+                # Runs on client disconnect too; shield so the close isn't itself cancelled
+                with anyio.CancelScope(shield=True):
+                    await stream.close()
+
+    return StreamingResponse(
+        events(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
+
 # --- RESUME PARSER (VISION ENHANCED) ---
-@app.post("/api/parse-resume")
-async def parse_resume(file: UploadFile = File(...), job_description: str = Form("")):
-    try:
-        # Read file bytes
-        content = await file.read()
-        # Force correct MIME type based on extension to satisfy Gemini
-        filename_lower = file.filename.lower()
-        if filename_lower.endswith(".pdf"):
-            file_mime = "application/pdf"
-        elif filename_lower.endswith((".jpg", ".jpeg")):
-            file_mime = "image/jpeg"
-        elif filename_lower.endswith(".png"):
-            file_mime = "image/png"
-        elif filename_lower.endswith(".webp"):
-            file_mime = "image/webp"
-        else:
-            # Fallback to browser's content type or default
-            file_mime = file.content_type or "application/pdf"
-            
-        print(f"📄 Processing File: {file.filename} as {file_mime}") # Debug print
-        
-        parsed_data = {}
-        scores = {}
-        raw_text_for_relevancy = ""
 
-        # --- STRATEGY: GEMINI Vision for PDFs/Images, Rule-based for DOCX or when AI unavailable ---
-        use_gemini = gemini_key and file_mime in ["application/pdf", "image/jpeg", "image/png", "image/webp"]
-        if use_gemini:
+# Parse results keyed by SHA-256 of the file bytes: LRU in memory, JSON files on disk.
+# Entries hold the resume's raw text, so both tiers expire and the disk tier is capped.
+PARSE_CACHE_TTL = float(os.environ.get("PARSE_CACHE_TTL", str(24 * 3600)))
+PARSE_CACHE = TieredCache(
+    TTLCache(maxsize=int(os.environ.get("PARSE_CACHE_SIZE", "512")), ttl=PARSE_CACHE_TTL, name="parse-resume"),
+    DiskCache(
+        os.environ.get("PARSE_CACHE_DIR") or BASE_DIR / ".cache" / "parse-resume",
+        ttl=PARSE_CACHE_TTL,
+        name="parse-resume",
+        max_entries=int(os.environ.get("PARSE_CACHE_DISK_ENTRIES", "5000")),
+        max_bytes=int(os.environ.get("PARSE_CACHE_DISK_BYTES", str(256 * 1024 * 1024))),
+    ),
+)
+
+@app.get("/api/parse-resume/cache-stats")
+def get_parse_cache_stats():
+    return PARSE_CACHE.stats()
+
+async def process_resume(content: bytes, filename: str, content_type: Optional[str], job_description: str,
+                         index_for_ranking: bool = False) -> Dict[str, Any]:
+    """Parses one resume file and scores it against job_description (shared by single and batch upload)."""
+    # Force correct MIME type based on extension to satisfy Gemini
+    filename_lower = filename.lower()
+    if filename_lower.endswith(".pdf"):
+        file_mime = "application/pdf"
+    elif filename_lower.endswith((".jpg", ".jpeg")):
+        file_mime = "image/jpeg"
+    elif filename_lower.endswith(".png"):
+        file_mime = "image/png"
+    elif filename_lower.endswith(".webp"):
+        file_mime = "image/webp"
+    else:
+        # Fallback to browser's content type or default
+        file_mime = content_type or "application/pdf"
+
+    parsed_data = {}
+    scores = {}
+    raw_text_for_relevancy = ""
+
+    # --- STRATEGY: GEMINI Vision for PDFs/Images, Rule-based for DOCX or when AI unavailable ---
+    use_gemini = gemini_key and file_mime in ["application/pdf", "image/jpeg", "image/png", "image/webp"]
+
+    # Same bytes + same strategy => same parse, whatever the job description
+    content_hash = hashlib.sha256(content).hexdigest()
+    cache_key = f"{content_hash}-{'gemini' if use_gemini else 'rules'}"
+    cached = PARSE_CACHE.get(cache_key)
+    cacheable = True
+    if not cached:
+        # One extraction per upload, started now so it overlaps the Gemini call;
+        # the backfill, fallback and relevancy steps all reuse its result.
+        text_task = asyncio.ensure_future(DOCUMENT_POOL.run(extract_text_fallback, content, filename_lower))
+    try:
+        if cached:
+            parsed_data = cached["extracted_data"]
+            scores = cached["confidence_scores"]
+            raw_text_for_relevancy = cached["raw_text"]
+        elif use_gemini:
             try:
                 # Prepare content for Gemini
                 extraction_prompt = """
                 You are a highly accurate Resume Parser. 
                 Look at the provided document image/pdf and extract the following details precisely.
-                
+
                 CRITICAL INSTRUCTIONS:
                 1. **Name:** Look at the top of the first page. It is usually the largest text or bolded. Extract the full name.
                 2. **Phone:** Extract phone number in any format (e.g., +91..., (123)...).
@@ -699,7 +819,7 @@ async def parse_resume(file: UploadFile = File(...), job_description: str = Form
                 4. **Skills:** List all technical and soft skills found.
                 5. **Experience:** List company names and roles.
                 6. **Education:** List degree and university.
-                
+
                 Return ONLY valid JSON. No markdown formatting.
                 {
                     "name": "string",
@@ -712,27 +832,30 @@ async def parse_resume(file: UploadFile = File(...), job_description: str = Form
                 }
                 """
 
+                if not await RATE_LIMITER.acquire("gemini", "gemini-2.0-flash", tokens=estimate_tokens(extraction_prompt)):
+                    raise RateLimited("gemini-2.0-flash is out of quota")
+
                 # FIX: Use genai.GenerativeModel which works with genai.configure()
                 model = genai.GenerativeModel('gemini-2.0-flash')
                 file_data = {
                     "mime_type": file_mime,
                     "data": base64.standard_b64encode(content).decode("utf-8")
                 }
-                response = model.generate_content([
+                response = await GEMINI_POOL.run(model.generate_content, [
                     extraction_prompt,
                     file_data
                 ])
-                
+
                 # Parse JSON
                 clean_json = response.text.strip().replace("```json", "").replace("```", "")
                 parsed_data = json.loads(clean_json)
-                
+
                 # Assign high confidence because Gemini Vision is reading it
                 # If a field is present, we assume it's correct (95%)
                 scores = {k: 95 if v else 0 for k,v in parsed_data.items()}
-                
-                # Also extract raw text from file for better keyword matching and to fill missing fields
-                raw_text_for_relevancy = extract_text_fallback(content, filename_lower)
+
+                # Also use raw text from file for better keyword matching and to fill missing fields
+                raw_text_for_relevancy = await text_task
                 if raw_text_for_relevancy:
                     text_parsed = parse_resume_text(raw_text_for_relevancy)
                     # Backfill missing arrays
@@ -748,41 +871,272 @@ async def parse_resume(file: UploadFile = File(...), job_description: str = Form
                             scores[key] = min(scores.get(key, 50), 80)
 
             except Exception as e:
-                print(f"\n❌ GEMINI CRITICAL ERROR: {e}") 
-                print(f"   (This triggered the Regex Fallback)\n")
-                
+                if isinstance(e, RateLimited):
+                    print(f"⚠️ {e}: using the rule-based parser")
+                else:
+                    print(f"\n❌ GEMINI CRITICAL ERROR: {e}") 
+                    print(f"   (This triggered the Regex Fallback)\n")
+                # Transient AI failure: don't pin the degraded result in the cache
+                cacheable = False
+
                 # Fallback: robust text parsing
-                raw_text_for_relevancy = extract_text_fallback(content, filename_lower)
+                raw_text_for_relevancy = await text_task
                 parsed_data = parse_resume_text(raw_text_for_relevancy)
                 scores = {k: 60 if parsed_data.get(k) else 0 for k in ["name","email","phone","education","skills","experience","projects"]}
         else:
             # Rule-based parsing for DOCX or when Gemini isn't applicable
-            raw_text_for_relevancy = extract_text_fallback(content, filename_lower)
+            raw_text_for_relevancy = await text_task
             parsed_data = parse_resume_text(raw_text_for_relevancy)
             scores = {k: 60 if parsed_data.get(k) else 0 for k in ["name","email","phone","education","skills","experience","projects"]}
+    finally:
+        # Cancelled (e.g. the batch request went away) or failed before using it: stop the extraction
+        if not cached and not text_task.done():
+            text_task.cancel()
 
-        # Calculate Relevancy
-        # Use raw text if available, otherwise stringify the parsed JSON to check keywords
-        text_for_relevancy = raw_text_for_relevancy if len(raw_text_for_relevancy) > 100 else str(parsed_data)
-        relevancy_score = calculate_job_relevancy(text_for_relevancy, job_description)
-
-        return {
+    if not cached and cacheable:
+        PARSE_CACHE.set(cache_key, {
             "extracted_data": parsed_data,
             "confidence_scores": scores,
-            "relevancy_score": relevancy_score,
-            "raw_text_snippet": text_for_relevancy[:500]
-        }
+            "raw_text": raw_text_for_relevancy,
+        })
+
+    # Calculate Relevancy (always against the request's job_description, never cached)
+    # Use raw text if available, otherwise stringify the parsed JSON to check keywords
+    text_for_relevancy = raw_text_for_relevancy if len(raw_text_for_relevancy) > 100 else str(parsed_data)
+    relevancy_score = calculate_job_relevancy(text_for_relevancy, job_description)
+    if index_for_ranking:
+        # Caller opted in: keep the text tokenized for /api/rank-candidates (id = content_hash)
+        await DOCUMENT_POOL.run(RESUME_CORPUS.add, content_hash, text_for_relevancy, parsed_data.get("name"))
+
+    return {
+        "extracted_data": parsed_data,
+        "confidence_scores": scores,
+        "relevancy_score": relevancy_score,
+        "raw_text_snippet": text_for_relevancy[:500],
+        "content_hash": content_hash,
+        "cached": bool(cached)
+    }
+
+@app.post("/api/parse-resume")
+async def parse_resume(file: UploadFile = File(...), job_description: str = Form(""), index_for_ranking: bool = Form(False)):
+    try:
+        # Read file bytes
+        content = await file.read()
+        return await process_resume(content, file.filename, file.content_type, job_description, index_for_ranking)
 
     except Exception as e:
         print(f"Parse Error: {e}")
         return JSONResponse(status_code=500, content={"error": str(e)})
 
+# --- BULK RESUME PARSING ---
+BATCH_MAX_FILES = int(os.environ.get("BATCH_MAX_FILES", "1000"))
+BATCH_MAX_FILE_BYTES = int(os.environ.get("BATCH_MAX_FILE_BYTES", str(10 * 1024 * 1024)))
+# Bytes held in memory per batch (uploads plus unzipped members)
+BATCH_MAX_TOTAL_BYTES = int(os.environ.get("BATCH_MAX_TOTAL_BYTES", str(200 * 1024 * 1024)))
+# Files in flight per batch; the Gemini / document pools still bound the actual work
+BATCH_PARSE_CONCURRENCY = int(os.environ.get("BATCH_PARSE_CONCURRENCY", "16"))
+RESUME_EXTENSIONS = (".pdf", ".docx", ".jpg", ".jpeg", ".png", ".webp")
+
+def unzip_resumes(data: bytes, budget: int) -> List[tuple]:
+    """Returns [(filename, bytes)] for resume files inside a zip archive, reading at most `budget` bytes."""
+    items = []
+    with zipfile.ZipFile(io.BytesIO(data)) as archive:
+        for info in archive.infolist():
+            name = info.filename
+            if info.is_dir() or name.startswith("__MACOSX/") or not name.lower().endswith(RESUME_EXTENSIONS):
+                continue
+            if info.file_size > BATCH_MAX_FILE_BYTES:
+                items.append((name, None))
+                continue
+            budget -= info.file_size
+            if budget < 0:
+                raise ValueError("unzipped size")
+            try:
+                items.append((name, archive.read(info)))
+            except (RuntimeError, NotImplementedError, zipfile.BadZipFile, zlib.error):
+                # Encrypted, unsupported compression method or corrupt: reported as that file's error
+                budget += info.file_size
+                items.append((name, None))
+            if len(items) >= BATCH_MAX_FILES:
+                break
+    return items
+
+@app.post("/api/parse-resumes/batch")
+async def parse_resumes_batch(files: List[UploadFile] = File(...), job_description: str = Form(""),
+                              index_for_ranking: bool = Form(False)):
+    """
+    Parses many resumes (individual files and/or .zip archives) against one job
+    description. Streams NDJSON: one `result` line per file as it finishes,
+    then a `summary` line with the files ranked by relevancy.
+    """
+    too_large = HTTPException(status_code=413, detail=f"Batch is limited to {BATCH_MAX_TOTAL_BYTES} bytes in total")
+    items = []
+    budget = BATCH_MAX_TOTAL_BYTES
+    for upload in files:
+        is_zip = upload.filename.lower().endswith(".zip")
+        if not is_zip and upload.size is not None and upload.size > BATCH_MAX_FILE_BYTES:
+            # Left on the spooled temp file, never read into memory
+            items.append((upload.filename, None, upload.content_type))
+            continue
+        data = await upload.read()
+        budget -= len(data)
+        if budget < 0:
+            raise too_large
+        if is_zip:
+            try:
+                members = await DOCUMENT_POOL.run(unzip_resumes, data, budget)
+            except (zipfile.BadZipFile, RuntimeError, NotImplementedError):
+                items.append((upload.filename, None, None))
+                continue
+            except ValueError:
+                raise too_large
+            # The archive itself is dropped once its members are out
+            budget += len(data) - sum(len(payload) for _, payload in members if payload)
+            del data
+            items.extend((name, payload, None) for name, payload in members)
+        else:
+            items.append((upload.filename, data if len(data) <= BATCH_MAX_FILE_BYTES else None, upload.content_type))
+    if not items:
+        raise HTTPException(status_code=400, detail="No resume files found in upload")
+    if len(items) > BATCH_MAX_FILES:
+        raise HTTPException(status_code=413, detail=f"Batch is limited to {BATCH_MAX_FILES} files")
+
+    async def results():
+        started = time.perf_counter()
+        limit = asyncio.Semaphore(BATCH_PARSE_CONCURRENCY)
+
+        async def parse_one(index, filename, content, content_type):
+            if content is None:
+                return {"index": index, "filename": filename, "status": "error",
+                        "error": "Unreadable archive or file exceeds size limit"}
+            async with limit:
+                try:
+                    result = await process_resume(content, filename, content_type, job_description, index_for_ranking)
+                    return {"index": index, "filename": filename, "status": "ok", **result}
+                except Exception as e:
+                    return {"index": index, "filename": filename, "status": "error", "error": str(e)}
+
+        tasks = [asyncio.create_task(parse_one(i, *item)) for i, item in enumerate(items)]
+        ranking = []
+        failed = 0
+        try:
+            for next_done in asyncio.as_completed(tasks):
+                result = await next_done
+                if result["status"] == "ok":
+                    ranking.append({
+                        "index": result["index"],
+                        "filename": result["filename"],
+                        "name": result["extracted_data"].get("name", ""),
+                        "relevancy_score": result["relevancy_score"],
+                    })
+                else:
+                    failed += 1
+                yield json.dumps({"type": "result", **result}) + "\n"
+
+            ranking.sort(key=lambda r: (-r["relevancy_score"], r["index"]))
+            duration = time.perf_counter() - started
+            yield json.dumps({
+                "type": "summary",
+                "total": len(items),
+                "succeeded": len(ranking),
+                "failed": failed,
+                "duration_ms": int(duration * 1000),
+                "files_per_second": round(len(items) / duration, 2) if duration else None,
+                "ranking": ranking,
+            }) + "\n"
+        finally:
+            # Client went away: stop parsing what's left
+            for task in tasks:
+                task.cancel()
+
+    return StreamingResponse(results(), media_type="application/x-ndjson")
+
+# --- CANDIDATE RANKING ---
+RANK_CORPUS_SIZE = int(os.environ.get("RANK_CORPUS_SIZE", "50000"))
+RANK_MAX_TOP_K = 500
+# Tokenized resumes (texts sent to /api/rank-candidates + uploads parsed with index_for_ranking)
+RESUME_CORPUS = ResumeCorpus(maxsize=RANK_CORPUS_SIZE)
+
+@app.post("/api/rank-candidates")
+async def rank_candidates(request: RankCandidatesRequest):
+    """
+    Ranks resume texts against a JD by BM25, with the keyword-overlap relevancy score alongside.
+    `resumes` are indexed (unchanged texts are not re-tokenized); `candidate_ids` restricts
+    the ranking to those ids, otherwise only the resumes sent are ranked. Uploads parsed with
+    `index_for_ranking` are indexed under their `content_hash`.
+    """
+    if len(request.job_description.strip()) < 10:
+        raise HTTPException(status_code=400, detail="job_description is too short")
+    if not 1 <= request.top_k <= RANK_MAX_TOP_K:
+        raise HTTPException(status_code=400, detail=f"top_k must be between 1 and {RANK_MAX_TOP_K}")
+    if len(request.resumes) > RANK_CORPUS_SIZE:
+        raise HTTPException(status_code=400, detail=f"At most {RANK_CORPUS_SIZE} resumes per request")
+    if not request.resumes and not request.candidate_ids:
+        # Never rank (and return names from) the whole corpus
+        raise HTTPException(status_code=400, detail="Send resumes or candidate_ids to rank")
+    try:
+        started = time.perf_counter()
+        tokenized = 0
+        if request.resumes:
+            tokenized = await DOCUMENT_POOL.run(
+                RESUME_CORPUS.add_many, [(r.id, r.text, r.name) for r in request.resumes]
+            )
+        doc_ids = request.candidate_ids
+        if doc_ids is None and request.resumes:
+            doc_ids = [r.id for r in request.resumes]
+        result = await DOCUMENT_POOL.run(RESUME_CORPUS.rank, request.job_description, doc_ids, request.top_k)
+        return {
+            **result,
+            "missing_ids": [d for d in doc_ids if d not in RESUME_CORPUS],
+            "tokenized": tokenized,
+            "reused": len(request.resumes) - tokenized,
+            "duration_ms": int((time.perf_counter() - started) * 1000),
+        }
+    except Exception as e:
+        print(f"Rank Candidates Error: {e}")
+        return JSONResponse(status_code=500, content={"error": str(e)})
+
+@app.get("/api/rank-candidates/stats")
+async def rank_candidates_stats():
+    return RESUME_CORPUS.stats()
+
+# --- JOB SEARCH ---
+@app.get("/api/jobs/search")
+async def search_jobs(
+    q: str = "",
+    locations: List[str] = Query([]),
+    job_types: List[str] = Query([], alias="types"),
+    skills: List[str] = Query([]),
+    max_experience: Optional[float] = None,
+    min_salary: Optional[float] = None,
+    posted_after: Optional[datetime] = None,
+    sort: str = "relevance",
+    user_skills: List[str] = Query([]),
+    limit: int = 12,
+    cursor: Optional[str] = None,
+):
+    """
+    Filters and sorts the indexed job catalog; returns one page, the total match count and
+    `next_cursor` (pass it back unchanged with the same filters for the next page).
+    `user_skills` (e.g. from a parsed resume) adds matchScore / missingSkills and enables sort=match.
+    """
+    try:
+        return await DOCUMENT_POOL.run(
+            JOB_CATALOG.search, q=q, locations=locations, types=job_types, skills=skills,
+            max_experience=max_experience, min_salary=min_salary, posted_after=posted_after,
+            sort=sort, user_skills=user_skills, limit=limit, cursor=cursor,
+        )
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    except Exception as e:
+        print(f"Job Search Error: {e}")
+        return JSONResponse(status_code=500, content={"error": str(e)})
+
 @app.post("/api/save-profile")
 async def save_profile(profile: ProfileSaveRequest):
-    if not supabase: return JSONResponse(status_code=500, content={"error": "Database error"})
+    if not db: return JSONResponse(status_code=500, content={"error": "Database error"})
     try:
-        data = profile.model_dump()
-        response = supabase.table("resumes").insert(data).execute()
+        await db.insert_resume(profile.model_dump())
         return {"success": True, "message": "Saved"}
     except Exception as e:
         return JSONResponse(status_code=500, content={"success": False, "error": str(e)})
@@ -790,12 +1144,57 @@ async def save_profile(profile: ProfileSaveRequest):
 
 # --- NEW: SKILL GAP & RESUME COACHING V2 ---
 
+# Gemini results reused across requests: JD skills by normalized JD, analyses by the
+# normalized candidate/gap tuple. LRU + TTL in memory, JSON files on disk (each
+# directory capped, oldest files deleted first).
+GAP_CACHE_TTL = float(os.environ.get("GAP_CACHE_TTL", str(24 * 3600)))
+GAP_CACHE_SIZE = int(os.environ.get("GAP_CACHE_SIZE", "1024"))
+GAP_CACHE_DIR = Path(os.environ.get("GAP_CACHE_DIR") or BASE_DIR / ".cache" / "analyze-gap")
+GAP_CACHE_DISK_ENTRIES = int(os.environ.get("GAP_CACHE_DISK_ENTRIES", "10000"))
+GAP_CACHE_DISK_BYTES = int(os.environ.get("GAP_CACHE_DISK_BYTES", str(64 * 1024 * 1024)))
+JD_SKILLS_CACHE = TieredCache(
+    TTLCache(maxsize=GAP_CACHE_SIZE, ttl=GAP_CACHE_TTL, name="jd-skills"),
+    DiskCache(GAP_CACHE_DIR / "jd-skills", ttl=GAP_CACHE_TTL, name="jd-skills",
+              max_entries=GAP_CACHE_DISK_ENTRIES, max_bytes=GAP_CACHE_DISK_BYTES),
+)
+GAP_ANALYSIS_CACHE = TieredCache(
+    TTLCache(maxsize=GAP_CACHE_SIZE, ttl=GAP_CACHE_TTL, name="gap-analysis"),
+    DiskCache(GAP_CACHE_DIR / "analysis", ttl=GAP_CACHE_TTL, name="gap-analysis",
+              max_entries=GAP_CACHE_DISK_ENTRIES, max_bytes=GAP_CACHE_DISK_BYTES),
+)
+
+# Share of the Gemini budget the JD skill extraction may use before the analysis call
+GAP_EXTRACTION_SHARE = 0.4
+
+def _normalize_text(text: str) -> str:
+    return " ".join((text or "").split()).lower()
+
+def jd_cache_key(job_description: str) -> str:
+    return hashlib.sha256(_normalize_text(job_description).encode("utf-8")).hexdigest()
+
+def gap_analysis_cache_key(request: GapAnalysisRequest, current_skills_norm, missing_skills_norm) -> str:
+    key = [
+        _normalize_text(request.target_role),
+        _normalize_text(request.current_role),
+        sorted(current_skills_norm),
+        request.experience_years,
+        sorted(missing_skills_norm),
+    ]
+    return hashlib.sha256(json.dumps(key).encode("utf-8")).hexdigest()
+
+@app.get("/api/analyze-gap/cache-stats")
+def get_gap_cache_stats():
+    return {"jd_skills": JD_SKILLS_CACHE.stats(), "analysis": GAP_ANALYSIS_CACHE.stats()}
+
 @app.post("/api/analyze-gap")
 async def analyze_gap(request: GapAnalysisRequest):
     if not gemini_key:
         return JSONResponse(status_code=500, content={"error": "Gemini API Key not configured"})
 
     try:
+        # One latency budget for both Gemini calls
+        deadline = GEMINI_CHAIN.deadline()
+
         # A. EXTRACT TARGET SKILLS
         extraction_prompt = f"""
         Analyze this Job Description and extract the top 15 essential technical skills.
@@ -805,31 +1204,49 @@ async def analyze_gap(request: GapAnalysisRequest):
         
         # Fallback extraction first (works without AI)
         target_skills = extract_skills_from_jd_simple(request.job_description)
-        try:
-            # Try AI refinement on top of fallback
-            model = genai.GenerativeModel('gemini-2.5-flash')
-            skill_response = model.generate_content(extraction_prompt)
-            target_skills = json.loads(skill_response.text.strip().replace("```json", "").replace("```", ""))
-        except Exception:
-            # Keep fallback list
-            pass
+        known_skills = SKILL_INDEX.extract(request.job_description, limit=15)
+        skip_ai_extraction = len(known_skills) >= SKILL_MATCH_SKIP_AI_MIN
+        jd_key = jd_cache_key(request.job_description)
+        cached_skills = None if skip_ai_extraction else JD_SKILLS_CACHE.get(jd_key)
+        if skip_ai_extraction:
+            # The JD names enough taxonomy skills; no need to ask Gemini
+            target_skills = known_skills
+        elif cached_skills is not None:
+            target_skills = cached_skills
+        else:
+            try:
+                # Try AI refinement on top of fallback, leaving most of the budget for the analysis
+                target_skills, _ = await GEMINI_CHAIN.generate(
+                    extraction_prompt, parse=parse_gemini_json,
+                    deadline=min(deadline, GEMINI_CHAIN.deadline(GEMINI_CHAIN.budget * GAP_EXTRACTION_SHARE)),
+                )
+                JD_SKILLS_CACHE.set(jd_key, target_skills)
+            except ModelChainExhausted:
+                # Keep fallback list (not cached, so the next request retries Gemini)
+                pass
 
         # B. CALCULATE GAPS & LOOKUP HOURS (Taxonomy Integration)
-        current_skills_norm = set(normalize_skill(s) for s in request.current_skills)
+        # Taxonomy skills compare by canonical name ("NodeJS" == "Node.js"), others by normalize_skill
+        def skill_id(skill):
+            return SKILL_INDEX.resolve(skill) or normalize_skill(skill)
+
+        current_skills_norm = set(skill_id(s) for s in request.current_skills)
         missing_skills = []
         matching_skills = []
         missing_skills_context = [] 
-        
-        # Load Taxonomy for Learning Hours
-        taxonomy_skills = SKILL_TAXONOMY.get("skills", {})
+        seen_skills = set()
 
         for raw_skill in target_skills:
-            if normalize_skill(raw_skill) in current_skills_norm:
+            raw_id = skill_id(raw_skill)
+            if raw_id in seen_skills:
+                continue
+            seen_skills.add(raw_id)
+            if raw_id in current_skills_norm:
                 matching_skills.append(raw_skill)
             else:
                 missing_skills.append(raw_skill)
                 # Lookup Hours
-                tax_data = taxonomy_skills.get(raw_skill, {})
+                tax_data = SKILL_INDEX.get(raw_skill)
                 hours = tax_data.get("avg_learning_hours", "unknown")
                 missing_skills_context.append(f"{raw_skill} ({hours} hours)")
 
@@ -881,28 +1298,21 @@ async def analyze_gap(request: GapAnalysisRequest):
         }}
         """
         
-        ai_data = {}
-        try:
-            model = genai.GenerativeModel('gemini-2.5-flash')
-            ai_response = model.generate_content(analysis_prompt)
-            ai_data = json.loads(ai_response.text.strip().replace("```json", "").replace("```", ""))
-        except Exception as e:
-            if "429" in str(e):
-                # Respect retry hint but still be resilient if quota remains 0
-                time.sleep(6)
-                try:
-                    model = genai.GenerativeModel('gemini-flash-latest')
-                    ai_response = model.generate_content(analysis_prompt)
-                    ai_data = json.loads(ai_response.text.strip().replace("```json", "").replace("```", ""))
-                except Exception:
-                    ai_data = build_ai_data_fallback(missing_skills_context)
-            else:
+        analysis_key = gap_analysis_cache_key(request, current_skills_norm, [skill_id(s) for s in missing_skills])
+        ai_data = GAP_ANALYSIS_CACHE.get(analysis_key)
+        cached_analysis = ai_data is not None
+        if not cached_analysis:
+            try:
+                ai_data, _ = await GEMINI_CHAIN.generate(analysis_prompt, parse=parse_gemini_json, deadline=deadline)
+                GAP_ANALYSIS_CACHE.set(analysis_key, ai_data)
+            except ModelChainExhausted as e:
+                print(f"⚠️ Gap analysis using rule-based fallback: {e}")
                 ai_data = build_ai_data_fallback(missing_skills_context)
 
         # D. ENRICHMENT
         enriched_missing = []
         for skill in missing_skills:
-            tax_data = taxonomy_skills.get(skill, {}) 
+            tax_data = SKILL_INDEX.get(skill)
             enriched_missing.append({
                 "name": skill,
                 "difficulty": tax_data.get("difficulty", "Unknown"),
@@ -923,7 +1333,8 @@ async def analyze_gap(request: GapAnalysisRequest):
             "alternative_paths": ai_data.get("alternative_paths", []),
             "salary_growth": ai_data.get("salary_growth", {}),
             "visualization_data": ai_data.get("visualization_data", {}),
-            "ats_tips": ai_data.get("industry_keywords", [])
+            "ats_tips": ai_data.get("industry_keywords", []),
+            "cached": {"jd_skills": cached_skills is not None, "analysis": cached_analysis}
         }
 
     except Exception as e:
@@ -931,71 +1342,99 @@ async def analyze_gap(request: GapAnalysisRequest):
         return JSONResponse(status_code=500, content={"error": str(e)})
 
 # --- PDF GENERATION ENDPOINT ---
+
+# Rendered roadmap PDFs keyed by SHA-256 of (candidate_name, roadmap_data)
+ROADMAP_PDF_CACHE = TTLCache(
+    maxsize=int(os.environ.get("ROADMAP_PDF_CACHE_SIZE", "256")),
+    ttl=float(os.environ.get("ROADMAP_PDF_CACHE_TTL", "3600")),
+    name="roadmap-pdf",
+)
+ROADMAP_BATCH_MAX = int(os.environ.get("ROADMAP_BATCH_MAX", "500"))
+
+async def get_roadmap_pdf(request: PDFRequest) -> bytes:
+    key = roadmap_key(request.candidate_name, request.roadmap_data)
+    pdf = ROADMAP_PDF_CACHE.get(key)
+    if pdf is None:
+        pdf = await DOCUMENT_POOL.run(render_roadmap_pdf, request.candidate_name, request.roadmap_data)
+        ROADMAP_PDF_CACHE.set(key, pdf)
+    return pdf
+
+def _download(data: bytes, media_type: str, filename: str) -> StreamingResponse:
+    return StreamingResponse(
+        iter_chunks(data),
+        media_type=media_type,
+        headers={"Content-Disposition": content_disposition(filename), "Content-Length": str(len(data))},
+    )
+
 @app.post("/api/download-roadmap")
 async def download_roadmap(request: PDFRequest):
     """Generates a downloadable PDF report"""
     try:
-        buffer = io.BytesIO()
-        doc = SimpleDocTemplate(buffer, pagesize=letter)
-        styles = getSampleStyleSheet()
-        story = []
-
-        story.append(Paragraph(f"Career Roadmap: {request.candidate_name}", styles['Title']))
-        story.append(Spacer(1, 12))
-
-        data = request.roadmap_data
-        
-        story.append(Paragraph(f"Readiness Score: {data['analysis']['readiness_score']}%", styles['Heading2']))
-        story.append(Paragraph(data['analysis']['readiness_reasoning'], styles['Normal']))
-        story.append(Spacer(1, 12))
-
-        story.append(Paragraph("Action Plan:", styles['Heading2']))
-        for step in data['learning_roadmap']:
-            text = f"<b>Phase {step['phase']}: {step['focus']}</b><br/>Duration: {step['duration']}<br/>{step['reasoning']}"
-            story.append(Paragraph(text, styles['Normal']))
-            story.append(Spacer(1, 10))
-            
-        doc.build(story)
-        buffer.seek(0)
-        
-        return StreamingResponse(
-            buffer, 
-            media_type="application/pdf", 
-            headers={"Content-Disposition": f"attachment; filename=Career_Roadmap_{request.candidate_name}.pdf"}
-        )
+        pdf = await get_roadmap_pdf(request)
+        return _download(pdf, "application/pdf", roadmap_filename(request.candidate_name))
+    except Exception as e:
+        return JSONResponse(status_code=500, content={"error": str(e)})
 
+@app.post("/api/download-roadmaps")
+async def download_roadmaps(request: PDFBatchRequest):
+    """Renders a cohort of roadmaps (identical ones once) and returns them as one zip."""
+    if not request.roadmaps:
+        raise HTTPException(status_code=400, detail="No roadmaps provided")
+    if len(request.roadmaps) > ROADMAP_BATCH_MAX:
+        raise HTTPException(status_code=400, detail=f"Too many roadmaps (max {ROADMAP_BATCH_MAX})")
+    keys = [roadmap_key(r.candidate_name, r.roadmap_data) for r in request.roadmaps]
+    unique = dict(zip(keys, request.roadmaps))
+    rendered = await asyncio.gather(*(get_roadmap_pdf(r) for r in unique.values()), return_exceptions=True)
+    pdfs = dict(zip(unique, rendered))
+    failed = [
+        {"index": i, "candidate_name": r.candidate_name, "error": str(pdfs[key])}
+        for i, (key, r) in enumerate(zip(keys, request.roadmaps))
+        if isinstance(pdfs[key], Exception)
+    ]
+    if failed:
+        return JSONResponse(status_code=400, content={"error": "Some roadmaps could not be rendered", "failed": failed})
+    try:
+        files = [(roadmap_filename(r.candidate_name), pdfs[key]) for key, r in zip(keys, request.roadmaps)]
+        archive = await DOCUMENT_POOL.run(zip_roadmaps, files)
+        return _download(archive, "application/zip", f"Career_Roadmaps_{len(files)}.zip")
     except Exception as e:
         return JSONResponse(status_code=500, content={"error": str(e)})
 
+@app.get("/api/download-roadmap/cache-stats")
+def get_roadmap_cache_stats():
+    return ROADMAP_PDF_CACHE.stats()
+
 # --- TEMPLATE ENGINE ---
+NOTIFICATION_TEMPLATES = {
+    NotificationType.JOB_MATCH: {
+        "title": "New Job Match Found! 🎯",
+        "message": "We found a {match_score}% match for {job_title} at {company}."
+    },
+    NotificationType.APPLICATION_STATUS: {
+        "title": "Application Update 📄",
+        "message": "Your application for {job_title} has moved to {status}."
+    },
+    NotificationType.EMPLOYER_MESSAGE: {
+        "title": "New Message from Employer 💬",
+        "message": "{company} sent you a message regarding {job_title}."
+    },
+    NotificationType.SKILL_RECOMMENDATION: {
+        "title": "Skill Boost Recommended 🚀",
+        "message": "Learn {skill} to increase your match score for {target_role} roles."
+    },
+    NotificationType.INTERVIEW_REMINDER: {
+        "title": "Interview Reminder ⏰",
+        "message": "You have an interview for {job_title} tomorrow at {time}."
+    }
+}
+
+DEFAULT_NOTIFICATION_PREFS = {"email_enabled": True, "push_enabled": True, "inapp_enabled": True, "frequency": "immediate"}
+
 def generate_notification_content(type: NotificationType, data: dict):
     """
     Simple template engine to generate Title and Message based on type.
     """
-    templates = {
-        NotificationType.JOB_MATCH: {
-            "title": "New Job Match Found! 🎯",
-            "message": "We found a {match_score}% match for {job_title} at {company}."
-        },
-        NotificationType.APPLICATION_STATUS: {
-            "title": "Application Update 📄",
-            "message": "Your application for {job_title} has moved to {status}."
-        },
-        NotificationType.EMPLOYER_MESSAGE: {
-            "title": "New Message from Employer 💬",
-            "message": "{company} sent you a message regarding {job_title}."
-        },
-        NotificationType.SKILL_RECOMMENDATION: {
-            "title": "Skill Boost Recommended 🚀",
-            "message": "Learn {skill} to increase your match score for {target_role} roles."
-        },
-        NotificationType.INTERVIEW_REMINDER: {
-            "title": "Interview Reminder ⏰",
-            "message": "You have an interview for {job_title} tomorrow at {time}."
-        }
-    }
-    
-    tmpl = templates.get(type, {"title": "New Notification", "message": "You have a new update."})
+    tmpl = NOTIFICATION_TEMPLATES.get(type, {"title": "New Notification", "message": "You have a new update."})
     
     # Safe formatting using .format()
     try:
@@ -1007,32 +1446,169 @@ def generate_notification_content(type: NotificationType, data: dict):
         
     return title, message
 
-class ConnectionManager:
-    def __init__(self):
-        # Stores active connections: {user_id: WebSocket}
-        self.active_connections: Dict[str, WebSocket] = {}
-
-    async def connect(self, websocket: WebSocket, user_id: str):
-        await websocket.accept()
-        self.active_connections[user_id] = websocket
-        print(f"✅ User {user_id} connected via WebSocket")
+def notification_row(notification: NotificationCreate) -> Dict[str, Any]:
+    """The notifications-table row for one notification (content rendered from its template)."""
+    title, message = generate_notification_content(notification.type, notification.data)
+    return {
+        "user_id": notification.user_id,
+        "type": notification.type.value,
+        "title": title,
+        "message": message,
+        "data": notification.data,
+        "priority": notification.priority.value,
+        "read": False
+    }
 
-    def disconnect(self, user_id: str):
-        if user_id in self.active_connections:
-            del self.active_connections[user_id]
-            print(f"❌ User {user_id} disconnected")
+# --- NOTIFICATION PREFERENCES CACHE ---
 
-    async def send_personal_message(self, message: dict, user_id: str):
-        if user_id in self.active_connections:
-            try:
-                await self.active_connections[user_id].send_json(message)
-                return True
-            except Exception as e:
-                print(f"⚠️ WebSocket Send Error: {e}")
-                self.disconnect(user_id)
+# Preferences are read on every send and page view but almost never change: keep
+# them in memory, written through by update_preferences. Users without a row cache
+# the defaults. Other workers drop their copy when the change reaches them over
+# NOTIFY_BUS (an on_preferences_changed hook); the TTL covers a lost message.
+NOTIFICATION_PREFS_CACHE = TTLCache(
+    maxsize=int(os.environ.get("NOTIFICATION_PREFS_CACHE_SIZE", "10000")),
+    ttl=float(os.environ.get("NOTIFICATION_PREFS_TTL", "300")),
+    name="notification-prefs",
+)
+NOTIFY_PREFS_CHUNK = int(os.environ.get("NOTIFY_PREFS_CHUNK", "200"))
+PREFERENCES_CHANGED_HOOKS: List[Callable[[str], Any]] = []
+
+def on_preferences_changed(hook: Callable[[str], Any]) -> Callable[[str], Any]:
+    """Registers hook(user_id) (sync or async), called after this worker changes a user's preferences."""
+    PREFERENCES_CHANGED_HOOKS.append(hook)
+    return hook
+
+def invalidate_preferences(user_id: str):
+    NOTIFICATION_PREFS_CACHE.pop(user_id)
+
+def _chunks(items: List[Any], size: int) -> List[List[Any]]:
+    return [items[i:i + size] for i in range(0, len(items), size)]
+
+async def fetch_preferences_bulk(user_ids: List[str]) -> Dict[str, Dict[str, Any]]:
+    """Preferences for many users ({user_id: prefs}); cache misses are fetched in chunked queries."""
+    found = {}
+    missing = []
+    for user_id in user_ids:
+        prefs = NOTIFICATION_PREFS_CACHE.get(user_id)
+        if prefs is None:
+            missing.append(user_id)
+        else:
+            found[user_id] = prefs
+    if missing:
+        pages = await asyncio.gather(*(db.select_preferences(chunk) for chunk in _chunks(missing, NOTIFY_PREFS_CHUNK)))
+        rows = {row["user_id"]: row for page in pages for row in page}
+        for user_id in missing:
+            found[user_id] = rows.get(user_id) or dict(DEFAULT_NOTIFICATION_PREFS)
+            NOTIFICATION_PREFS_CACHE.set(user_id, found[user_id])
+    return found
+
+async def get_notification_prefs(user_id: str) -> Dict[str, Any]:
+    return (await fetch_preferences_bulk([user_id]))[user_id]
+
+# --- UNREAD COUNTERS ---
+
+# Maintained by send / mark-read instead of a COUNT query per poll, and pushed in
+# every WebSocket event. Each loaded count is re-read from the database every
+# NOTIFY_UNREAD_RECONCILE_SECONDS to pick up other workers' writes.
+UNREAD_COUNTS = UnreadCounters(
+    maxsize=int(os.environ.get("NOTIFY_UNREAD_CACHE_SIZE", "100000")),
+    reconcile_after=float(os.environ.get("NOTIFY_UNREAD_RECONCILE_SECONDS", "300")),
+)
+UNREAD_RECONCILE_BATCH = 200
+
+async def unread_count(user_id: str) -> int:
+    count = UNREAD_COUNTS.get(user_id)
+    if count is None:
+        count = await db.count_unread(user_id)
+        UNREAD_COUNTS.set(user_id, count)
+    return count
+
+@background_task
+async def reconcile_unread_counts():
+    while True:
+        await asyncio.sleep(min(60.0, UNREAD_COUNTS.reconcile_after))
+        if not db:
+            continue
+        for chunk in _chunks(UNREAD_COUNTS.due(UNREAD_RECONCILE_BATCH * 5), UNREAD_RECONCILE_BATCH):
+            counts = await asyncio.gather(*(db.count_unread(user_id) for user_id in chunk), return_exceptions=True)
+            for user_id, count in zip(chunk, counts):
+                if isinstance(count, Exception):
+                    print(f"⚠️ Unread count reconcile failed for {user_id}: {count}")
+                    continue
+                before = UNREAD_COUNTS.get(user_id)
+                UNREAD_COUNTS.set(user_id, count, reconciled=True)
+                if before != count:
+                    manager.send(user_id, {"type": "UNREAD_COUNT", "unread_count": count})
+
+# --- REAL-TIME DELIVERY ---
+
+# Each worker holds its own WebSockets (several per user); pushes and unread-count
+# changes are published on NOTIFY_BUS so whichever worker holds a user's sockets
+# delivers them, and every worker's counters see every change.
+# A message is {"user_id", "unread_delta", "events": [WebSocket payloads]}, or has
+# "recount": True instead of a delta when the change to the count isn't known.
+manager = hub_from_env()
+NOTIFY_BUS = bus_from_env()
+
+async def _deliver_here(message: Dict[str, Any]) -> bool:
+    """Applies one message on this worker; True if one of its sockets took the events."""
+    user_id = message["user_id"]
+    if message.get("recount"):
+        # Dropped so the next read (the push below, or the next poll) loads it again
+        UNREAD_COUNTS.forget(user_id)
+        count = None
+    else:
+        count = UNREAD_COUNTS.add(user_id, message.get("unread_delta", 0))
+    events = message.get("events") or []
+    if not events or not manager.is_connected(user_id):
         return False
+    if count is None:
+        # A freshly loaded count already includes the new rows; the push still goes
+        # out without it if the COUNT fails (the next reconcile corrects the badge)
+        try:
+            count = await unread_count(user_id)
+        except Exception as e:
+            print(f"⚠️ Unread count for push failed for {user_id}: {e}")
+    # Queued on each of the user's sockets; their writer tasks do the sending
+    sent = [manager.send(user_id, {**event, "unread_count": count} if count is not None else event)
+            for event in events]
+    return any(sent)
 
-manager = ConnectionManager()
+async def deliver(messages: List[Dict[str, Any]]) -> List[bool]:
+    """Publishes to the other workers and delivers here; returns per-message delivery on this worker.
+
+    Best-effort: callers have already committed their rows, so a failed publish or
+    push is logged and reported as not delivered instead of failing the request.
+    """
+    try:
+        await NOTIFY_BUS.publish("notify", messages)
+    except Exception as e:
+        print(f"⚠️ Notification bus publish failed: {e}")
+    outcomes = await asyncio.gather(*(_deliver_here(message) for message in messages), return_exceptions=True)
+    for outcome in outcomes:
+        if isinstance(outcome, Exception):
+            print(f"⚠️ Real-time delivery failed: {outcome}")
+    return [outcome is True for outcome in outcomes]
+
+async def _invalidate_from_peer(message: Dict[str, Any]):
+    invalidate_preferences(message["user_id"])
+    await _reschedule_digest(message["user_id"])
+
+NOTIFY_BUS.subscribe("notify", _deliver_here)
+NOTIFY_BUS.subscribe("prefs", _invalidate_from_peer)
+
+@on_preferences_changed
+async def _broadcast_preferences_change(user_id: str):
+    await NOTIFY_BUS.publish("prefs", [{"user_id": user_id}])
+
+@background_task
+async def run_notify_bus():
+    await NOTIFY_BUS.run()
+
+@app.get("/health/realtime")
+def health_realtime():
+    """This worker's WebSocket connections and notification-bus traffic."""
+    return {"connections": manager.stats(), "bus": NOTIFY_BUS.stats()}
 
 # --- ENDPOINTS ---
 
@@ -1041,15 +1617,16 @@ manager = ConnectionManager()
 # 1. WEBSOCKET ENDPOINT
 @app.websocket("/ws/{user_id}")
 async def websocket_endpoint(websocket: WebSocket, user_id: str):
-    await manager.connect(websocket, user_id)
+    connection = await manager.connect(websocket, user_id)
     try:
         while True:
-            # Keep connection alive, listen for any client messages (optional heartbeat)
-            data = await websocket.receive_text()
-            # We mostly push FROM server, but we can log client pings
-            print(f"📩 Msg from {user_id}: {data}")
-    except WebSocketDisconnect:
-        manager.disconnect(user_id)
+            # Pushes go out from the connection's own writer task (which also sends
+            # PING heartbeats); this loop only notices the client going away.
+            await websocket.receive_text()
+    except (WebSocketDisconnect, RuntimeError):
+        pass
+    finally:
+        manager.disconnect(connection)
 
 # 2. UPDATE EXISTING 'send_notification' to Broadcast Real-Time
 @app.post("/notifications/send")
@@ -1057,42 +1634,37 @@ async def send_notification(notification: NotificationCreate):
     """
     Creates a notification, persists to DB, and PUSHES via WebSocket.
     """
-    if not supabase:
+    if not db:
         raise HTTPException(status_code=503, detail="Database not available")
 
     try:
-        # A. Logic to Check Preferences & Generate Content (Same as before)
-        prefs_query = supabase.table("notification_preferences").select("*").eq("user_id", notification.user_id).execute()
-        prefs = prefs_query.data[0] if prefs_query.data else {
-            "email_enabled": True, "push_enabled": True, "inapp_enabled": True
-        }
-
-        title, message = generate_notification_content(notification.type, notification.data)
+        # A. Logic to Check Preferences & Generate Content (cached, see NOTIFICATION_PREFS_CACHE)
+        prefs = await get_notification_prefs(notification.user_id)
 
         # B. Persist to Database (System of Record)
-        notif_data = {
-            "user_id": notification.user_id,
-            "type": notification.type.value,
-            "title": title,
-            "message": message,
-            "data": notification.data,
-            "priority": notification.priority.value,
-            "read": False
-        }
+        notif_data = notification_row(notification)
+
+        # Hourly/daily/weekly users get it in their next digest instead
+        frequency = digest_frequency(notification, prefs)
+        if frequency:
+            due = DIGESTS.add(notification.user_id, frequency, notif_data)
+            return {
+                "success": True,
+                "notification_id": None,
+                "real_time_delivery": False,
+                "digest": frequency,
+                "digest_at": iso_timestamp(due),
+            }
         
-        insert_res = supabase.table("notifications").insert(notif_data).execute()
-        new_notif = insert_res.data[0]
+        [new_notif] = await db.insert_notifications([notif_data])
         
         # C. --- REAL-TIME PUSH (THE NEW PART) ---
         # If In-App is enabled, push instantly via WebSocket
-        ws_sent = False
+        # (delivered by whichever worker holds the user's sockets; ws_sent is this worker's)
+        events = []
         if prefs.get("inapp_enabled", True):
-            ws_payload = {
-                "type": "NEW_NOTIFICATION",
-                "notification": new_notif,
-                "unread_count": 1 # You might want to fetch actual count here
-            }
-            ws_sent = await manager.send_personal_message(ws_payload, notification.user_id)
+            events.append({"type": "NEW_NOTIFICATION", "notification": new_notif})
+        [ws_sent] = await deliver([{"user_id": notification.user_id, "unread_delta": 1, "events": events}])
 
         # D. Mock Email/Push (Same as before)
         # ... (Your existing email logic)
@@ -1107,41 +1679,255 @@ async def send_notification(notification: NotificationCreate):
         print(f"Notification Error: {e}")
         return JSONResponse(status_code=500, content={"error": str(e)})
 
+# Bulk sends: one multi-row INSERT per NOTIFY_INSERT_CHUNK notifications, sent concurrently
+# over the data store's connection pool
+NOTIFY_BATCH_MAX = int(os.environ.get("NOTIFY_BATCH_MAX", "50000"))
+NOTIFY_INSERT_CHUNK = int(os.environ.get("NOTIFY_INSERT_CHUNK", "500"))
+
+@app.post("/notifications/send-batch")
+async def send_notification_batch(request: NotificationBatchRequest):
+    """
+    Creates many notifications at once: bulk preference lookup, chunked multi-row
+    inserts, then concurrent WebSocket pushes. Reports a status per item
+    ("delivered" = pushed live, "stored" = saved only, "digested" = held for
+    the user's next digest, "failed") and throughput.
+    """
+    if not db:
+        raise HTTPException(status_code=503, detail="Database not available")
+    items = request.notifications
+    if not items:
+        raise HTTPException(status_code=400, detail="No notifications provided")
+    if len(items) > NOTIFY_BATCH_MAX:
+        raise HTTPException(status_code=400, detail=f"Too many notifications (max {NOTIFY_BATCH_MAX})")
+
+    started = time.perf_counter()
+    try:
+        prefs = await fetch_preferences_bulk(list(dict.fromkeys(item.user_id for item in items)))
+    except Exception as e:
+        print(f"Notification Batch Error: {e}")
+        return JSONResponse(status_code=500, content={"error": str(e)})
+
+    rows = [notification_row(item) for item in items]
+    results: List[Dict[str, Any]] = [{"index": i, "user_id": item.user_id} for i, item in enumerate(items)]
+    immediate = []
+    for i, item in enumerate(items):
+        frequency = digest_frequency(item, prefs.get(item.user_id, DEFAULT_NOTIFICATION_PREFS))
+        if frequency:
+            DIGESTS.add(item.user_id, frequency, rows[i])
+            results[i].update(status="digested", digest=frequency)
+        else:
+            immediate.append(i)
+    chunks = _chunks(immediate, NOTIFY_INSERT_CHUNK)
+    inserted = await asyncio.gather(*(db.insert_notifications([rows[i] for i in chunk]) for chunk in chunks),
+                                    return_exceptions=True)
+    messages: Dict[str, Dict[str, Any]] = {}
+    for chunk, outcome in zip(chunks, inserted):
+        if not isinstance(outcome, Exception) and len(outcome) != len(chunk):
+            outcome = RuntimeError(f"insert returned {len(outcome)} rows for {len(chunk)}")
+        if isinstance(outcome, Exception):
+            print(f"⚠️ Notification batch insert failed for {len(chunk)} rows: {outcome}")
+            for i in chunk:
+                results[i].update(status="failed", error=str(outcome))
+            continue
+        # PostgREST returns the inserted rows in request order
+        for i, new_notif in zip(chunk, outcome):
+            results[i].update(status="stored", notification_id=new_notif["id"])
+            user_id = items[i].user_id
+            message = messages.setdefault(user_id, {"user_id": user_id, "unread_delta": 0, "events": [], "indexes": []})
+            message["unread_delta"] += 1
+            if prefs.get(user_id, DEFAULT_NOTIFICATION_PREFS).get("inapp_enabled", True):
+                message["events"].append({"type": "NEW_NOTIFICATION", "notification": new_notif})
+                message["indexes"].append(i)
+
+    # One bus message per user (all their new rows and one counter change)
+    indexes = [message.pop("indexes") for message in messages.values()]
+    sent = await deliver(list(messages.values()))
+    for pushed, ok in zip(indexes, sent):
+        for i in pushed if ok else ():
+            results[i]["status"] = "delivered"
+
+    elapsed = time.perf_counter() - started
+    counts = Counter(r["status"] for r in results)
+    return {
+        "success": counts["failed"] == 0,
+        "total": len(items),
+        "stored": counts["stored"] + counts["delivered"],
+        "delivered": counts["delivered"],
+        "digested": counts["digested"],
+        "failed": counts["failed"],
+        "duration_ms": int(elapsed * 1000),
+        "per_second": round(len(items) / elapsed, 1) if elapsed > 0 else None,
+        "results": results,
+    }
+
+# --- DIGESTS ---
+
+# Users on hourly/daily/weekly frequency get one DIGEST notification per window
+# instead of a row and a push per notification; high-priority ones still go out
+# immediately. Buffers are per worker (a user may get one digest per worker per
+# window) and are flushed, not lost, when the worker shuts down.
+DIGESTS = DigestScheduler(max_items=int(os.environ.get("NOTIFY_DIGEST_MAX_ITEMS", "50")))
+DIGEST_TICK_SECONDS = float(os.environ.get("NOTIFY_DIGEST_TICK_SECONDS", "30"))
+DIGEST_RETRY_SECONDS = 300
+DIGEST_FLUSH_BATCH = 5000
+
+def digest_frequency(notification: NotificationCreate, prefs: Dict[str, Any]) -> Optional[str]:
+    """The digest window this notification waits for, or None to send it now."""
+    frequency = prefs.get("frequency")
+    if frequency not in DIGEST_WINDOWS or notification.priority == NotificationPriority.HIGH:
+        return None
+    return frequency
+
+async def _reschedule_digest(user_id: str):
+    if user_id in DIGESTS:
+        prefs = await get_notification_prefs(user_id)
+        DIGESTS.reschedule(user_id, prefs.get("frequency"))
+
+on_preferences_changed(_reschedule_digest)
+
+async def flush_digests(batch: List[Any]) -> int:
+    """Stores one digest row per user (chunked inserts) and pushes them; returns how many were stored."""
+    if not batch:
+        return 0
+    rows = [digest_row(user_id, digest) for user_id, digest in batch]
+    chunks = _chunks(list(range(len(rows))), NOTIFY_INSERT_CHUNK)
+    inserted = await asyncio.gather(*(db.insert_notifications([rows[i] for i in chunk]) for chunk in chunks),
+                                    return_exceptions=True)
+    try:
+        prefs = await fetch_preferences_bulk([user_id for user_id, _ in batch])
+    except Exception:
+        prefs = {}
+    messages, stored = [], []
+    for chunk, outcome in zip(chunks, inserted):
+        if isinstance(outcome, Exception) or len(outcome) != len(chunk):
+            print(f"⚠️ Digest insert failed for {len(chunk)} users: {outcome if isinstance(outcome, Exception) else 'row count mismatch'}")
+            for i in chunk:
+                user_id, digest = batch[i]
+                DIGESTS.requeue(user_id, digest, time.time() + DIGEST_RETRY_SECONDS)
+            continue
+        for i, new_notif in zip(chunk, outcome):
+            user_id, digest = batch[i]
+            stored.append(digest)
+            events = []
+            if prefs.get(user_id, DEFAULT_NOTIFICATION_PREFS).get("inapp_enabled", True):
+                events.append({"type": "NEW_NOTIFICATION", "notification": new_notif})
+            messages.append({"user_id": user_id, "unread_delta": 1, "events": events})
+    DIGESTS.mark_flushed(stored)
+    await deliver(messages)
+    return len(stored)
+
+@background_task
+async def run_digests():
+    try:
+        while True:
+            await asyncio.sleep(DIGEST_TICK_SECONDS)
+            if not db:
+                continue
+            while True:
+                batch = DIGESTS.due(DIGEST_FLUSH_BATCH)
+                if not batch:
+                    break
+                try:
+                    await flush_digests(batch)
+                except Exception as e:
+                    print(f"⚠️ Digest flush failed: {e}")
+    except asyncio.CancelledError:
+        # Shutting down: send what's buffered early rather than dropping it
+        if db and len(DIGESTS):
+            await flush_digests(DIGESTS.drain())
+        raise
+
+@app.get("/notifications/digests/stats")
+def get_digest_stats():
+    return {**DIGESTS.stats(), "tick_seconds": DIGEST_TICK_SECONDS}
+
+# Keyset pagination over (created_at, id): each page starts strictly after the
+# last row the client saw, so it costs the same at any depth and new arrivals
+# don't shift pages. Cursors are opaque base64 of [created_at, id].
+NOTIFY_PAGE_MAX = 100
+
+def encode_notification_cursor(row: Dict[str, Any]) -> str:
+    raw = json.dumps([row["created_at"], row["id"]], separators=(",", ":")).encode()
+    return base64.urlsafe_b64encode(raw).decode().rstrip("=")
+
+def decode_notification_cursor(cursor: str) -> List[Any]:
+    try:
+        created_at, row_id = json.loads(base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4)))
+    except (ValueError, TypeError):
+        raise HTTPException(status_code=400, detail="Invalid cursor")
+    return [created_at, row_id]
+
+def _keyset(op: str, cursor: str) -> Tuple[str, str, str]:
+    """Rows before ("lt") / after ("gt") the cursor in (created_at, id) order."""
+    created_at, row_id = decode_notification_cursor(cursor)
+    return (op, str(created_at), str(row_id))
+
 @app.get("/notifications/user/{user_id}")
-async def get_user_notifications(user_id: str, page: int = 1, limit: int = 20):
-    if not supabase: return []
+async def get_user_notifications(user_id: str, limit: int = 20, cursor: Optional[str] = None, since: Optional[str] = None):
+    """
+    Newest-first page of a user's notifications. Pass the previous response's
+    `next_cursor` as `cursor` for older ones, or its `latest_cursor` as `since`
+    to get only what arrived after it (`has_more` means call again with the new
+    `latest_cursor`).
+    """
+    empty = {"notifications": [], "next_cursor": None, "latest_cursor": since, "has_more": False}
+    if not db: return empty
+    limit = max(1, min(limit, NOTIFY_PAGE_MAX))
+    if since:
+        # Oldest-first from the cursor, so repeated `since` calls walk forward without gaps
+        keyset = _keyset("gt", since)
+    else:
+        keyset = _keyset("lt", cursor) if cursor else None
     try:
-        offset = (page - 1) * limit
-        # Get notifications ordered by created_at desc
-        response = supabase.table("notifications")\
-            .select("*")\
-            .eq("user_id", user_id)\
-            .order("created_at", desc=True)\
-            .range(offset, offset + limit - 1)\
-            .execute()
-        return response.data
+        rows = await db.notification_page(user_id, limit + 1, keyset, ascending=bool(since))
     except Exception as e:
         return JSONResponse(status_code=500, content={"error": str(e)})
+    has_more = len(rows) > limit
+    rows = rows[:limit]
+    if since:
+        latest = encode_notification_cursor(rows[-1]) if rows else since
+        return {"notifications": rows[::-1], "next_cursor": None, "latest_cursor": latest, "has_more": has_more}
+    return {
+        "notifications": rows,
+        "next_cursor": encode_notification_cursor(rows[-1]) if has_more else None,
+        # Only the first page's newest row is the newest overall
+        "latest_cursor": encode_notification_cursor(rows[0]) if rows and not cursor else None,
+        "has_more": has_more,
+    }
 
 @app.get("/notifications/user/{user_id}/unread-count")
 async def get_unread_count(user_id: str):
-    if not supabase: return {"count": 0}
+    if not db: return {"count": 0}
     try:
-        # Supabase count requires head=True or separate query
-        response = supabase.table("notifications")\
-            .select("*", count="exact")\
-            .eq("user_id", user_id)\
-            .eq("read", False)\
-            .execute()
-        return {"count": response.count}
+        # Maintained counter; only the first request per user runs a COUNT query
+        return {"count": await unread_count(user_id)}
     except Exception as e:
         return {"count": 0}
 
+@app.get("/notifications/unread-counts/stats")
+def get_unread_counts_stats():
+    return UNREAD_COUNTS.stats()
+
+async def _mark_read(result: Tuple[List[Dict[str, Any]], List[str]]):
+    """Updates the counters (on every worker) after db.mark_read.
+
+    Rows that were just flipped to read decrement their owner's count; owners the
+    store couldn't confirm (a retried PATCH) have their count re-read instead.
+    """
+    rows, unconfirmed = result
+    messages = [{"user_id": user_id, "recount": True, "events": [{"type": "UNREAD_COUNT"}]}
+                for user_id in unconfirmed]
+    messages += [{"user_id": user_id, "unread_delta": -n, "events": [{"type": "UNREAD_COUNT"}]}
+                 for user_id, n in Counter(row["user_id"] for row in rows).items() if user_id not in unconfirmed]
+    await deliver(messages)
+
 @app.patch("/notifications/{notification_id}/read")
 async def mark_notification_read(notification_id: str):
-    if not supabase: return {"success": False}
+    if not db: return {"success": False}
     try:
-        supabase.table("notifications").update({"read": True}).eq("id", notification_id).execute()
+        # Only unread rows come back, so the counters drop once per notification
+        # (or are re-read when a retry makes that unknowable)
+        await _mark_read(await db.mark_read([notification_id]))
         return {"success": True}
     except Exception as e:
         return JSONResponse(status_code=500, content={"error": str(e)})
@@ -1150,39 +1936,52 @@ async def mark_notification_read(notification_id: str):
 async def mark_bulk_read(payload: Dict[str, Any]):
     # payload: { "notification_ids": ["id1", "id2"] }
     ids = payload.get("notification_ids", [])
-    if not supabase or not ids: return {"success": False}
+    if not db or not ids: return {"success": False}
     try:
-        supabase.table("notifications").update({"read": True}).in_("id", ids).execute()
+        await _mark_read(await db.mark_read(ids))
         return {"success": True}
     except Exception as e:
         return JSONResponse(status_code=500, content={"error": str(e)})
 
 @app.get("/notifications/user/{user_id}/preferences")
 async def get_preferences(user_id: str):
-    if not supabase: return {}
+    if not db: return {}
     try:
-        res = supabase.table("notification_preferences").select("*").eq("user_id", user_id).single().execute()
-        if not res.data:
-            # Return defaults if no record exists
-            return {"email_enabled": True, "push_enabled": True, "inapp_enabled": True, "frequency": "immediate"}
-        return res.data
+        return await get_notification_prefs(user_id)
     except Exception as e:
-        # single() raises error if not found, handle gracefully
-        return {"email_enabled": True, "push_enabled": True, "inapp_enabled": True, "frequency": "immediate"}
+        # Return defaults if the lookup fails
+        return dict(DEFAULT_NOTIFICATION_PREFS)
 
 @app.put("/notifications/user/{user_id}/preferences")
 async def update_preferences(user_id: str, prefs: PreferencesUpdate):
-    if not supabase: return {"success": False}
+    if not db: return {"success": False}
     try:
         # Check if exists, if not insert, else update (upsert)
         data = prefs.model_dump(exclude_unset=True)
         data["user_id"] = user_id
         
-        supabase.table("notification_preferences").upsert(data).execute()
+        stored = await db.upsert_preferences(data)
+        # Write-through: cache the stored row (refetch next time if it wasn't returned)
+        if stored:
+            NOTIFICATION_PREFS_CACHE.set(user_id, stored)
+        else:
+            invalidate_preferences(user_id)
+        for hook in PREFERENCES_CHANGED_HOOKS:
+            try:
+                result = hook(user_id)
+                if inspect.isawaitable(result):
+                    await result
+            except Exception as e:
+                print(f"⚠️ Preferences hook failed: {e}")
         return {"success": True}
     except Exception as e:
+        invalidate_preferences(user_id)
         return JSONResponse(status_code=500, content={"error": str(e)})
 
+@app.get("/notifications/preferences/cache-stats")
+def get_preferences_cache_stats():
+    return NOTIFICATION_PREFS_CACHE.stats()
+
 if __name__ == "__main__":
     import uvicorn
     uvicorn.run(app, host="127.0.0.1", port=5000)
\ No newline at end of file
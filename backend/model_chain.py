@@ -0,0 +1,238 @@
+# backend/model_chain.py
+"""Ordered model fallback under a latency budget.
+
+A ModelChain tries its models in order (e.g. gemini-2.5-flash, then
+gemini-flash-latest) until one answers, never past the caller's deadline; the
+caller falls back to its deterministic path when the chain raises
+ModelChainExhausted. Each model has a CircuitBreaker: a quota / availability
+error opens it for a cooldown, during which the model is skipped instead of
+being retried (and slept on) by every request. Optionally, a slow call is
+hedged with a second identical request and the first answer wins. With a
+RateLimiter, a model whose quota can't cover the call within the remaining
+budget is skipped as "rate limited" rather than called into a 429.
+
+The blocking SDK call is injected (`call(model, prompt)`), so tests can run the
+chain offline against a fake provider.
+"""
+import asyncio
+import re
+import time
+from threading import Lock
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+from providers import ProviderPool
+from rate_limit import estimate_tokens
+
+# HTTP statuses / exception class names (google.api_core, groq) that mean "this model is unavailable right now"
+UNAVAILABLE_STATUSES = {429, 500, 502, 503, 504}
+UNAVAILABLE_ERRORS = {"ResourceExhausted", "TooManyRequests", "ServiceUnavailable", "InternalServerError"}
+# Status phrases for SDK errors that carry neither; bare digits would match e.g. "(char 429)"
+UNAVAILABLE_RE = re.compile(
+    r"\b(?:429 too many requests|503 service unavailable|resource (?:has been )?exhausted"
+    r"|exceeded your current quota|rate limit exceeded|model is overloaded)\b",
+    re.IGNORECASE,
+)
+
+
+class ModelOutputError(ValueError):
+    """The model answered, but `parse` rejected the response."""
+
+
+def is_unavailable(error: BaseException) -> bool:
+    """True for quota / availability errors (trip the breaker), False for e.g. bad output."""
+    if isinstance(error, ValueError):
+        return False
+    if type(error).__name__ in UNAVAILABLE_ERRORS:
+        return True
+    for attribute in ("code", "status_code"):
+        status = getattr(error, attribute, None)
+        if isinstance(status, int):
+            return status in UNAVAILABLE_STATUSES
+    return UNAVAILABLE_RE.search(str(error)) is not None
+
+
+class ModelChainExhausted(Exception):
+    """No model in the chain produced an answer within the budget."""
+
+    def __init__(self, errors: Dict[str, str]):
+        self.errors = errors
+        super().__init__("; ".join(f"{model}: {error}" for model, error in errors.items()) or "no model available")
+
+
+class CircuitBreaker:
+    """Closed -> open on an unavailability error -> half-open (one probe) after `cooldown` seconds."""
+
+    def __init__(self, cooldown: float = 60.0, clock: Callable[[], float] = time.monotonic):
+        self.cooldown = cooldown
+        self.clock = clock
+        self._lock = Lock()
+        self.opened_at: Optional[float] = None
+        self._probing = False
+        self.trips = 0
+
+    @property
+    def state(self) -> str:
+        if self.opened_at is None:
+            return "closed"
+        return "open" if self.clock() - self.opened_at < self.cooldown else "half-open"
+
+    def allow(self) -> bool:
+        with self._lock:
+            state = self.state
+            if state == "closed":
+                return True
+            if state == "half-open" and not self._probing:
+                self._probing = True
+                return True
+            return False
+
+    def record_success(self):
+        with self._lock:
+            self.opened_at = None
+            self._probing = False
+
+    def record_failure(self):
+        with self._lock:
+            self.opened_at = self.clock()
+            self._probing = False
+            self.trips += 1
+
+    def release(self):
+        """End a half-open probe that neither succeeded nor tripped (e.g. bad output)."""
+        with self._lock:
+            self._probing = False
+
+    def stats(self) -> Dict[str, Any]:
+        remaining = None
+        if self.state == "open":
+            remaining = round(self.cooldown - (self.clock() - self.opened_at), 1)
+        return {"state": self.state, "trips": self.trips, "cooldown_remaining": remaining}
+
+
+class ModelChain:
+    """Tries `models` in order on `pool`, within a deadline, skipping models whose breaker is open."""
+
+    def __init__(self, name: str, models: List[str], call: Callable[[str, str], Any], pool: ProviderPool,
+                 budget: float = 20.0, cooldown: float = 60.0, hedge_after: Optional[float] = None,
+                 clock: Callable[[], float] = time.monotonic, limiter=None):
+        self.name = name
+        self.models = list(models)
+        self.call = call
+        self.pool = pool
+        self.budget = budget
+        self.hedge_after = hedge_after
+        self.limiter = limiter
+        self.breakers = {model: CircuitBreaker(cooldown, clock) for model in self.models}
+        self.counters = {model: {"calls": 0, "ok": 0, "errors": 0, "timeouts": 0, "skipped": 0,
+                                 "throttled": 0, "hedges": 0, "hedge_wins": 0} for model in self.models}
+        self.exhausted = 0
+
+    def deadline(self, budget: Optional[float] = None) -> float:
+        """Absolute event-loop deadline `budget` seconds (default: the chain's budget) from now."""
+        return asyncio.get_running_loop().time() + (self.budget if budget is None else budget)
+
+    async def generate(self, prompt: str, parse: Optional[Callable[[Any], Any]] = None,
+                       deadline: Optional[float] = None) -> Tuple[Any, str]:
+        """Returns (parse(response), model). Raises ModelChainExhausted when every model
+        failed, was skipped, or the deadline passed."""
+        loop = asyncio.get_running_loop()
+        deadline = self.deadline() if deadline is None else deadline
+        errors: Dict[str, str] = {}
+        for model in self.models:
+            breaker, counters = self.breakers[model], self.counters[model]
+            remaining = deadline - loop.time()
+            if remaining <= 0:
+                errors[model] = "budget exhausted"
+                break
+            if not breaker.allow():
+                counters["skipped"] += 1
+                errors[model] = "circuit open"
+                continue
+            if self.limiter is not None and not await self.limiter.acquire(
+                    self.name, model, tokens=estimate_tokens(prompt), max_wait=remaining):
+                # Out of quota is not down: leave the breaker alone and try the next model
+                counters["throttled"] += 1
+                breaker.release()
+                errors[model] = "rate limited"
+                continue
+            remaining = deadline - loop.time()
+            if remaining <= 0:
+                breaker.release()
+                errors[model] = "budget exhausted"
+                break
+            try:
+                result = await asyncio.wait_for(self._attempt(model, prompt, parse, deadline), remaining)
+            except asyncio.TimeoutError:
+                # Slow, not necessarily down: don't trip the breaker
+                counters["timeouts"] += 1
+                breaker.release()
+                errors[model] = "timed out"
+                continue
+            except Exception as e:
+                counters["errors"] += 1
+                if is_unavailable(e):
+                    breaker.record_failure()
+                    print(f"⚠️ {self.name}/{model} unavailable, skipping it for {breaker.cooldown:.0f}s: {e}")
+                else:
+                    breaker.release()
+                errors[model] = f"{type(e).__name__}: {e}"
+                continue
+            except BaseException:
+                # Caller cancelled: free a half-open probe slot
+                breaker.release()
+                raise
+            breaker.record_success()
+            counters["ok"] += 1
+            return result, model
+        self.exhausted += 1
+        raise ModelChainExhausted(errors)
+
+    async def _attempt(self, model: str, prompt: str, parse, deadline: float) -> Any:
+        async def once():
+            self.counters[model]["calls"] += 1
+            response = await self.pool.run(self.call, model, prompt)
+            if parse is None:
+                return response
+            try:
+                return parse(response)
+            except Exception as e:
+                raise ModelOutputError(f"{type(e).__name__}: {e}") from e
+
+        first = asyncio.ensure_future(once())
+        tasks = [first]
+        try:
+            if self.hedge_after is None:
+                return await first
+            loop = asyncio.get_running_loop()
+            done, _ = await asyncio.wait({first}, timeout=self.hedge_after)
+            # Hedge only a slow call, and only if there is budget and quota left for a second one
+            if done or deadline - loop.time() <= 0:
+                return await first
+            if self.limiter is not None and not await self.limiter.acquire(
+                    self.name, model, tokens=estimate_tokens(prompt), max_wait=0):
+                return await first
+            self.counters[model]["hedges"] += 1
+            second = asyncio.ensure_future(once())
+            tasks.append(second)
+            pending = {first, second}
+            while pending:
+                done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+                for task in done:
+                    if task.exception() is None:
+                        if task is second:
+                            self.counters[model]["hedge_wins"] += 1
+                        return task.result()
+            # Both failed: surface the original request's error
+            return first.result()
+        finally:
+            for task in tasks:
+                if not task.done():
+                    task.cancel()
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "models": {model: {**self.counters[model], "breaker": self.breakers[model].stats()} for model in self.models},
+            "budget_seconds": self.budget,
+            "hedge_after_seconds": self.hedge_after,
+            "exhausted": self.exhausted,
+        }
@@ -0,0 +1,369 @@
+# backend/notify_bus.py
+"""WebSocket delivery across uvicorn workers.
+
+A ConnectionHub holds this worker's open sockets, any number per user (tabs,
+devices), each with its own bounded send queue and writer task. Pushes are published on a bus so every worker can deliver to the
+sockets it holds; each worker only ever writes to its own connections, so
+delivery capacity grows with the number of workers.
+
+Buses share one interface: `subscribe(channel, handler)`, `await
+publish(channel, messages)` (to every *other* worker; the caller handles its
+own), and `await run()` to receive until cancelled.
+
+- InProcessBus: instances sharing a `peers` list talk to each other in one
+  process (a single worker, or simulated workers in tests).
+- LocalSocketBus: one Unix datagram socket per worker in a shared directory;
+  a publish is one datagram per peer worker, however many users it carries.
+  Every process using the directory is a peer, so each deployment needs its
+  own (NOTIFY_BUS_DIR); there is no host-wide default.
+"""
+import asyncio
+import json
+import os
+import secrets
+import socket
+import time
+from collections import Counter, deque
+from pathlib import Path
+from typing import Any, Awaitable, Callable, Deque, Dict, List, Optional, Set
+
+from fastapi import WebSocket
+
+Handler = Callable[[Dict[str, Any]], Awaitable[Any]]
+
+
+def coalesce(events: List[Dict[str, Any]]) -> Dict[str, Any]:
+    """One frame for a burst of events. UNREAD_COUNT events are dropped when a later
+    event already carries a newer count; more than one event goes out as a BATCH."""
+    kept, later_count = [], False
+    for event in reversed(events):
+        if event.get("type") == "UNREAD_COUNT" and later_count:
+            continue
+        later_count = later_count or "unread_count" in event
+        kept.append(event)
+    kept.reverse()
+    return kept[0] if len(kept) == 1 else {"type": "BATCH", "events": kept}
+
+
+class Connection:
+    """One WebSocket and its bounded outbound queue, drained by its own writer task.
+
+    push() never waits on the client: a slow or stalled client only fills its own
+    queue. When the queue is full the oldest event is dropped ("drop_oldest") or
+    the socket is closed so the client reconnects and refetches ("disconnect").
+    Whatever has queued up by the time the writer gets to it is sent as one frame;
+    an idle connection gets a PING every `heartbeat` seconds.
+    """
+
+    def __init__(self, websocket: WebSocket, user_id: str, counters: Counter, max_queue: int = 256,
+                 batch_max: int = 50, heartbeat: float = 25.0, send_timeout: float = 10.0,
+                 slow_policy: str = "drop_oldest", on_close: Optional[Callable[["Connection"], Any]] = None):
+        self.websocket = websocket
+        self.user_id = user_id
+        self.counters = counters
+        self.max_queue = max_queue
+        self.batch_max = batch_max
+        self.heartbeat = heartbeat
+        self.send_timeout = send_timeout
+        self.slow_policy = slow_policy
+        self.on_close = on_close
+        self.queue: Deque[Dict[str, Any]] = deque()
+        self.closed = False
+        self._ready = asyncio.Event()
+        self._task: Optional[asyncio.Task] = None
+
+    def start(self):
+        self._task = asyncio.create_task(self._write_loop())
+
+    def push(self, event: Dict[str, Any]) -> bool:
+        if self.closed:
+            return False
+        if len(self.queue) >= self.max_queue:
+            if self.slow_policy == "disconnect":
+                self.counters["slow_disconnects"] += 1
+                print(f"⚠️ Closing slow WebSocket for {self.user_id} ({len(self.queue)} events queued)")
+                self.close(1013, "client too slow")
+                return False
+            self.queue.popleft()
+            self.counters["dropped"] += 1
+        self.queue.append(event)
+        self._ready.set()
+        return True
+
+    async def _write_loop(self):
+        try:
+            while True:
+                if not self.queue:
+                    self._ready.clear()
+                    try:
+                        await asyncio.wait_for(self._ready.wait(), self.heartbeat)
+                    except asyncio.TimeoutError:
+                        await self._send({"type": "PING", "ts": int(time.time())})
+                        self.counters["heartbeats"] += 1
+                        continue
+                batch = [self.queue.popleft() for _ in range(min(len(self.queue), self.batch_max))]
+                await self._send(coalesce(batch))
+                self.counters["frames"] += 1
+                self.counters["events"] += len(batch)
+        except asyncio.CancelledError:
+            raise
+        except Exception as e:
+            # Includes a send that stalled past send_timeout
+            print(f"⚠️ WebSocket Send Error ({self.user_id}): {e!r}")
+            self.counters["send_errors"] += 1
+            self.close(1011, "send failed")
+
+    async def _send(self, frame: Dict[str, Any]):
+        await asyncio.wait_for(self.websocket.send_json(frame), self.send_timeout)
+
+    def close(self, code: int = 1000, reason: str = ""):
+        if self.closed:
+            return
+        self.closed = True
+        self.queue.clear()
+        if self._task is not None and self._task is not asyncio.current_task():
+            self._task.cancel()
+        if code != 1000:
+            asyncio.ensure_future(self._close_socket(code, reason))
+        if self.on_close is not None:
+            self.on_close(self)
+
+    async def _close_socket(self, code: int, reason: str):
+        try:
+            await self.websocket.close(code=code, reason=reason)
+        except Exception:
+            pass
+
+
+class ConnectionHub:
+    """Every open WebSocket on this worker, grouped by user."""
+
+    def __init__(self, max_queue: int = 256, batch_max: int = 50, heartbeat: float = 25.0,
+                 send_timeout: float = 10.0, slow_policy: str = "drop_oldest"):
+        self.options = {"max_queue": max_queue, "batch_max": batch_max, "heartbeat": heartbeat,
+                        "send_timeout": send_timeout, "slow_policy": slow_policy}
+        self.connections: Dict[str, Set[Connection]] = {}
+        self.counters: Counter = Counter()
+
+    async def connect(self, websocket: WebSocket, user_id: str) -> Connection:
+        await websocket.accept()
+        connection = Connection(websocket, user_id, self.counters, on_close=self._remove, **self.options)
+        self.connections.setdefault(user_id, set()).add(connection)
+        connection.start()
+        print(f"✅ User {user_id} connected via WebSocket ({len(self.connections[user_id])} open)")
+        return connection
+
+    def disconnect(self, connection: Connection):
+        connection.close()
+
+    def _remove(self, connection: Connection):
+        connections = self.connections.get(connection.user_id)
+        if connections is None or connection not in connections:
+            return
+        connections.discard(connection)
+        if not connections:
+            del self.connections[connection.user_id]
+        print(f"❌ User {connection.user_id} disconnected")
+
+    def is_connected(self, user_id: str) -> bool:
+        return user_id in self.connections
+
+    def send(self, user_id: str, message: Dict[str, Any]) -> int:
+        """Queues message on each of the user's sockets on this worker; returns how many took it."""
+        return sum(connection.push(message) for connection in list(self.connections.get(user_id, ())))
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "users": len(self.connections),
+            "connections": sum(len(c) for c in self.connections.values()),
+            "queued": sum(len(conn.queue) for c in self.connections.values() for conn in c),
+            **self.options,
+            **self.counters,
+        }
+
+
+class InProcessBus:
+    """Delivers to the other buses sharing `peers`."""
+
+    name = "in-process"
+
+    def __init__(self, peers: Optional[List["InProcessBus"]] = None):
+        self.peers = peers if peers is not None else []
+        self.peers.append(self)
+        self._handlers: Dict[str, Handler] = {}
+        self.published = 0
+        self.received = 0
+
+    def subscribe(self, channel: str, handler: Handler):
+        self._handlers[channel] = handler
+
+    async def publish(self, channel: str, messages: List[Dict[str, Any]]):
+        if not messages:
+            return
+        self.published += len(messages)
+        for peer in self.peers:
+            if peer is not self:
+                await peer.dispatch(channel, messages)
+
+    async def dispatch(self, channel: str, messages: List[Dict[str, Any]]):
+        handler = self._handlers.get(channel)
+        if handler is None:
+            return
+        self.received += len(messages)
+        results = await asyncio.gather(*(handler(message) for message in messages), return_exceptions=True)
+        for result in results:
+            if isinstance(result, Exception):
+                print(f"⚠️ Bus handler error on {channel}: {result}")
+
+    async def run(self):
+        """Nothing to read: peers call dispatch directly."""
+
+    def close(self):
+        if self in self.peers:
+            self.peers.remove(self)
+
+    def stats(self) -> Dict[str, Any]:
+        return {"backend": self.name, "peers": len(self.peers) - 1,
+                "published": self.published, "received": self.received}
+
+
+class LocalSocketBus(InProcessBus):
+    """One Unix datagram socket per worker under `directory`; publishes go to every other socket there."""
+
+    name = "local-socket"
+    MAX_DATAGRAM = 60_000
+    PEER_REFRESH_SECONDS = 1.0
+
+    def __init__(self, directory):
+        super().__init__()
+        self.directory = Path(directory)
+        self.directory.mkdir(parents=True, exist_ok=True)
+        self.path = self.directory / f"{os.getpid()}-{secrets.token_hex(3)}.sock"
+        self._sender = socket.socket(socket.AF_UNIX, socket.SOCK_DGRAM)
+        self._sender.setblocking(False)
+        _set_buffer(self._sender, socket.SO_SNDBUF)
+        self._peers: List[str] = []
+        self._peers_at = 0.0
+        self.dropped = 0
+
+    def _peer_paths(self) -> List[str]:
+        now = time.monotonic()
+        if now - self._peers_at > self.PEER_REFRESH_SECONDS:
+            own = str(self.path)
+            self._peers = [str(p) for p in self.directory.glob("*.sock") if str(p) != own]
+            self._peers_at = now
+        return self._peers
+
+    def _prune_stale(self):
+        """Removes sockets nobody is bound to (workers that exited without cleaning up)."""
+        for peer in self.directory.glob("*.sock"):
+            probe = socket.socket(socket.AF_UNIX, socket.SOCK_DGRAM)
+            try:
+                probe.connect(str(peer))
+            except ConnectionRefusedError:
+                peer.unlink(missing_ok=True)
+            except OSError:
+                pass
+            finally:
+                probe.close()
+
+    def _datagrams(self, channel: str, messages: List[Dict[str, Any]]) -> List[bytes]:
+        """Packs messages into as few datagrams as fit under MAX_DATAGRAM."""
+        head, tail = f'{{"c":{json.dumps(channel)},"m":['.encode(), b"]}"
+        datagrams, parts, size = [], [], len(head) + len(tail)
+        for message in messages:
+            part = json.dumps(message, separators=(",", ":"), default=str).encode()
+            if len(head) + len(part) + len(tail) > self.MAX_DATAGRAM:
+                print(f"⚠️ Bus message on {channel} too large ({len(part)} bytes), dropped")
+                self.dropped += 1
+                continue
+            if parts and size + len(part) + 1 > self.MAX_DATAGRAM:
+                datagrams.append(head + b",".join(parts) + tail)
+                parts, size = [], len(head) + len(tail)
+            parts.append(part)
+            size += len(part) + 1
+        if parts:
+            datagrams.append(head + b",".join(parts) + tail)
+        return datagrams
+
+    async def publish(self, channel: str, messages: List[Dict[str, Any]]):
+        peers = self._peer_paths()
+        if not messages or not peers:
+            return
+        self.published += len(messages)
+        for datagram in self._datagrams(channel, messages):
+            for peer in peers:
+                try:
+                    self._sender.sendto(datagram, peer)
+                except (ConnectionRefusedError, FileNotFoundError):
+                    # Worker exited without cleaning up its socket
+                    Path(peer).unlink(missing_ok=True)
+                    self._peers_at = 0.0
+                except OSError as e:
+                    # Peer's receive buffer is full (or similar): it misses this push
+                    self.dropped += 1
+                    print(f"⚠️ Bus publish to {Path(peer).name} failed: {e}")
+
+    async def run(self):
+        receiver = socket.socket(socket.AF_UNIX, socket.SOCK_DGRAM)
+        receiver.setblocking(False)
+        _set_buffer(receiver, socket.SO_RCVBUF)
+        self._prune_stale()
+        receiver.bind(str(self.path))
+        self._peers_at = 0.0
+        loop = asyncio.get_running_loop()
+        try:
+            while True:
+                data = await loop.sock_recv(receiver, self.MAX_DATAGRAM + 1024)
+                try:
+                    envelope = json.loads(data)
+                    channel, messages = envelope["c"], envelope["m"]
+                except (ValueError, KeyError, TypeError):
+                    continue
+                await self.dispatch(channel, messages)
+        finally:
+            receiver.close()
+            self.path.unlink(missing_ok=True)
+
+    def close(self):
+        """Removes this worker's socket (on shutdown, in case run() never got to)."""
+        self._sender.close()
+        self.path.unlink(missing_ok=True)
+
+    def stats(self) -> Dict[str, Any]:
+        return {"backend": self.name, "socket": str(self.path), "peers": len(self._peer_paths()),
+                "published": self.published, "received": self.received, "dropped": self.dropped}
+
+
+def _set_buffer(sock: socket.socket, option: int, size: int = 4 * 1024 * 1024):
+    # Best effort: the kernel caps it (and macOS needs it raised for datagrams > 2 KB)
+    try:
+        sock.setsockopt(socket.SOL_SOCKET, option, size)
+    except OSError:
+        pass
+
+
+def hub_from_env() -> ConnectionHub:
+    """Per-connection queue size, burst size per frame, heartbeat / send timeout, slow-consumer policy."""
+    policy = os.environ.get("NOTIFY_WS_SLOW_POLICY", "drop_oldest").lower()
+    return ConnectionHub(
+        max_queue=int(os.environ.get("NOTIFY_WS_QUEUE_SIZE", "256")),
+        batch_max=int(os.environ.get("NOTIFY_WS_BATCH_MAX", "50")),
+        heartbeat=float(os.environ.get("NOTIFY_WS_HEARTBEAT_SECONDS", "25")),
+        send_timeout=float(os.environ.get("NOTIFY_WS_SEND_TIMEOUT", "10")),
+        slow_policy=policy if policy in ("drop_oldest", "disconnect") else "drop_oldest",
+    )
+
+
+def bus_from_env() -> InProcessBus:
+    """NOTIFY_BUS = local (Unix sockets under NOTIFY_BUS_DIR; the default once that is set) | memory (this process only)."""
+    directory = os.environ.get("NOTIFY_BUS_DIR")
+    kind = os.environ.get("NOTIFY_BUS", "local" if directory else "memory").lower()
+    if kind == "local" and not directory:
+        print("⚠️ Notification bus is per-process: NOTIFY_BUS=local needs NOTIFY_BUS_DIR (one directory per deployment)")
+    elif kind == "local" and hasattr(socket, "AF_UNIX"):
+        try:
+            return LocalSocketBus(directory)
+        except OSError as e:
+            print(f"⚠️ Notification bus is per-process: {e}")
+    return InProcessBus()
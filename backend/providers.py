@@ -0,0 +1,126 @@
+# backend/providers.py
+"""Bounded executors for blocking provider SDK and document-parsing calls.
+
+The Groq, google.generativeai, pdfplumber and python-docx APIs are synchronous.
+Calling them inside an `async def` handler stalls the whole event loop (and every
+WebSocket on the worker), so handlers hand them to a ProviderPool instead. Each
+provider gets its own thread pool, which doubles as its concurrency limit;
+native-async calls (streaming) take a slot from the same-sized semaphore.
+"""
+import asyncio
+import os
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import asynccontextmanager
+from threading import Lock
+from typing import Any, Callable, Dict, Optional
+
+
+class ProviderPool:
+    """Runs blocking calls for one provider on a dedicated, size-limited thread pool."""
+
+    def __init__(self, name: str, max_concurrency: int):
+        self.name = name
+        self.max_concurrency = max(1, max_concurrency)
+        self._executor = ThreadPoolExecutor(max_workers=self.max_concurrency, thread_name_prefix=f"{name}-pool")
+        self._lock = Lock()
+        # Caps native-async calls (e.g. streaming clients) that never touch the thread pool;
+        # created inside the running loop on first use (see _loop_slots)
+        self._slots: Optional[asyncio.Semaphore] = None
+        self._slots_loop: Optional[asyncio.AbstractEventLoop] = None
+        self.in_flight = 0
+        self.waiting = 0
+        self.completed = 0
+        self.failed = 0
+
+    async def run(self, fn: Callable[..., Any], *args, **kwargs) -> Any:
+        """Await fn(*args, **kwargs) on this pool without blocking the event loop."""
+        loop = asyncio.get_running_loop()
+        with self._lock:
+            self.waiting += 1
+        queued = True
+
+        def dequeue():
+            # Whichever of the worker thread and a cancelled caller gets here first; caller holds the lock
+            nonlocal queued
+            if queued:
+                queued = False
+                self.waiting -= 1
+
+        def call():
+            with self._lock:
+                dequeue()
+                self.in_flight += 1
+            try:
+                return fn(*args, **kwargs)
+            finally:
+                with self._lock:
+                    self.in_flight -= 1
+
+        try:
+            result = await loop.run_in_executor(self._executor, call)
+            self.completed += 1
+            return result
+        except BaseException:
+            self.failed += 1
+            raise
+        finally:
+            with self._lock:
+                dequeue()
+
+    def _loop_slots(self) -> asyncio.Semaphore:
+        loop = asyncio.get_running_loop()
+        if self._slots is None or self._slots_loop is not loop:
+            self._slots = asyncio.Semaphore(self.max_concurrency)
+            self._slots_loop = loop
+        return self._slots
+
+    @asynccontextmanager
+    async def slot(self):
+        """Hold one of this provider's concurrency slots around a native-async call."""
+        slots = self._loop_slots()
+        with self._lock:
+            self.waiting += 1
+        try:
+            await slots.acquire()
+        finally:
+            with self._lock:
+                self.waiting -= 1
+        with self._lock:
+            self.in_flight += 1
+        try:
+            yield
+        finally:
+            with self._lock:
+                self.in_flight -= 1
+            slots.release()
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "max_concurrency": self.max_concurrency,
+            "in_flight": self.in_flight,
+            "waiting": self.waiting,
+            "completed": self.completed,
+            "failed": self.failed,
+        }
+
+    def shutdown(self):
+        self._executor.shutdown(wait=False, cancel_futures=True)
+
+
+def _env_int(name: str, default: int) -> int:
+    try:
+        return int(os.environ.get(name, default))
+    except ValueError:
+        return default
+
+
+GEMINI_POOL = ProviderPool("gemini", _env_int("GEMINI_MAX_CONCURRENCY", 4))
+GROQ_POOL = ProviderPool("groq", _env_int("GROQ_MAX_CONCURRENCY", 4))
+# pdfplumber / python-docx extraction is CPU-bound; keep it to roughly one thread per core
+DOCUMENT_POOL = ProviderPool("documents", _env_int("DOCUMENT_MAX_WORKERS", os.cpu_count() or 2))
+
+POOLS = {pool.name: pool for pool in (GEMINI_POOL, GROQ_POOL, DOCUMENT_POOL)}
+
+
+def pool_stats() -> Dict[str, Dict[str, Any]]:
+    return {name: pool.stats() for name, pool in POOLS.items()}
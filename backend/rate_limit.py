@@ -0,0 +1,219 @@
+# backend/rate_limit.py
+"""Token-bucket rate limits per provider and model, shared by all workers.
+
+Each (provider, model) gets a requests-per-minute bucket and, if configured, a
+tokens-per-minute bucket. A caller reserves from every bucket at once: if the
+buckets can cover the call within `max_wait` seconds the tokens are taken
+(possibly going into debt, which queues later callers behind it) and the
+caller sleeps until its turn; otherwise nothing is taken and the caller should
+degrade to its rule-based path instead of making a call that would 429.
+
+State lives in a backend. FileBackend keeps every bucket in one JSON file
+guarded by flock, so all uvicorn workers on the host share it (point
+RATE_LIMIT_PATH at /dev/shm to keep it in memory). MemoryBackend is
+per-process. Anything with the same `reserve` method can be plugged in; a
+backend whose `blocking` attribute is true (the default, FileBackend's flock
+and file I/O) is called on a small dedicated thread pool, never on the event loop.
+"""
+import asyncio
+import json
+import os
+import time
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+from threading import Lock
+from typing import Any, Dict, List, Optional, Tuple
+
+try:
+    import fcntl
+except ImportError:  # Windows
+    fcntl = None
+
+# (bucket name, cost, refill per second, capacity)
+Bucket = Tuple[str, float, float, float]
+
+
+class RateLimited(Exception):
+    """Raised by callers that degrade to their rule-based path when quota is unavailable."""
+
+
+def estimate_tokens(*texts: Any) -> int:
+    """Rough prompt size (~4 characters per token)."""
+    return sum(len(str(t)) for t in texts) // 4
+
+
+def reserve_in(state: Dict[str, List[float]], buckets: List[Bucket], max_wait: float,
+               now: float) -> Tuple[bool, float]:
+    """Reserve `cost` from every bucket in `state` if the slowest one is ready within max_wait.
+
+    Returns (granted, wait_seconds); state is only modified when granted.
+    """
+    wait = 0.0
+    updated = []
+    for name, cost, rate, capacity in buckets:
+        tokens, stamp = state.get(name, (capacity, now))
+        tokens = min(capacity, tokens + max(0.0, now - stamp) * rate)
+        # A single call bigger than the bucket would otherwise never fit
+        after = tokens - min(cost, capacity)
+        if after < 0:
+            wait = max(wait, -after / rate)
+        updated.append((name, after))
+    if wait > max_wait:
+        return False, wait
+    for name, after in updated:
+        state[name] = [after, now]
+    return True, wait
+
+
+class MemoryBackend:
+    """Buckets in this process only."""
+
+    name = "memory"
+    blocking = False
+
+    def __init__(self):
+        self._state: Dict[str, List[float]] = {}
+        self._lock = Lock()
+
+    def reserve(self, buckets: List[Bucket], max_wait: float) -> Tuple[bool, float]:
+        with self._lock:
+            return reserve_in(self._state, buckets, max_wait, time.time())
+
+    def snapshot(self) -> Dict[str, List[float]]:
+        with self._lock:
+            return dict(self._state)
+
+
+class FileBackend:
+    """Buckets in one JSON file, updated under an exclusive flock (shared across processes)."""
+
+    name = "file"
+    blocking = True
+
+    def __init__(self, path):
+        if fcntl is None:
+            raise RuntimeError("FileBackend needs fcntl (POSIX)")
+        self.path = Path(path)
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+
+    def _locked(self, update):
+        fd = os.open(self.path, os.O_RDWR | os.O_CREAT, 0o644)
+        try:
+            fcntl.flock(fd, fcntl.LOCK_EX)
+            raw = b""
+            while True:
+                chunk = os.read(fd, 65536)
+                if not chunk:
+                    break
+                raw += chunk
+            try:
+                state = json.loads(raw) if raw else {}
+            except ValueError:
+                state = {}
+            result, changed = update(state)
+            if changed:
+                data = json.dumps(state, separators=(",", ":")).encode()
+                os.lseek(fd, 0, os.SEEK_SET)
+                os.ftruncate(fd, 0)
+                os.write(fd, data)
+            return result
+        finally:
+            os.close(fd)  # also releases the lock
+
+    def reserve(self, buckets: List[Bucket], max_wait: float) -> Tuple[bool, float]:
+        def update(state):
+            granted, wait = reserve_in(state, buckets, max_wait, time.time())
+            return (granted, wait), granted
+        return self._locked(update)
+
+    def snapshot(self) -> Dict[str, List[float]]:
+        return self._locked(lambda state: (state, False))
+
+
+class RateLimiter:
+    """Reserves provider quota before a call; `limits` maps provider -> {"rpm": n, "tpm": n}
+    (applied per model; 0 or missing means unlimited)."""
+
+    def __init__(self, backend, limits: Dict[str, Dict[str, float]], max_wait: float = 5.0):
+        self.backend = backend
+        self.limits = limits
+        self.max_wait = max_wait
+        self._counters: Dict[str, Dict[str, float]] = {}
+        self._executor: Optional[ThreadPoolExecutor] = None
+
+    def _buckets(self, provider: str, model: str, tokens: int) -> List[Bucket]:
+        limits = self.limits.get(provider, {})
+        buckets = []
+        if limits.get("rpm"):
+            buckets.append((f"{provider}:{model}:rpm", 1, limits["rpm"] / 60, limits["rpm"]))
+        if limits.get("tpm") and tokens:
+            buckets.append((f"{provider}:{model}:tpm", tokens, limits["tpm"] / 60, limits["tpm"]))
+        return buckets
+
+    async def _reserve(self, buckets: List[Bucket], max_wait: float) -> Tuple[bool, float]:
+        if not getattr(self.backend, "blocking", True):
+            return self.backend.reserve(buckets, max_wait)
+        if self._executor is None:
+            # Calls serialize on the file lock anyway; a couple of threads keep a slow disk off the loop
+            self._executor = ThreadPoolExecutor(max_workers=2, thread_name_prefix="rate-limit")
+        return await asyncio.get_running_loop().run_in_executor(self._executor, self.backend.reserve, buckets, max_wait)
+
+    async def acquire(self, provider: str, model: str, tokens: int = 0, max_wait: Optional[float] = None) -> bool:
+        """Waits (at most max_wait, default self.max_wait) for quota; False means don't call."""
+        buckets = self._buckets(provider, model, tokens)
+        if not buckets:
+            return True
+        max_wait = self.max_wait if max_wait is None else max(0.0, min(max_wait, self.max_wait))
+        counters = self._counters.setdefault(f"{provider}:{model}", {"granted": 0, "throttled": 0, "waited_seconds": 0.0})
+        try:
+            granted, wait = await self._reserve(buckets, max_wait)
+        except OSError as e:
+            # A broken store must not take the API down with it
+            print(f"⚠️ Rate limit store unavailable ({self.backend.name}): {e}")
+            return True
+        if not granted:
+            counters["throttled"] += 1
+            return False
+        counters["granted"] += 1
+        if wait > 0:
+            counters["waited_seconds"] += wait
+            await asyncio.sleep(wait)
+        return True
+
+    def stats(self) -> Dict[str, Any]:
+        try:
+            buckets = {name: round(tokens, 2) for name, (tokens, _) in self.backend.snapshot().items()}
+        except OSError:
+            buckets = None
+        return {
+            "backend": self.backend.name,
+            "limits": self.limits,
+            "max_wait_seconds": self.max_wait,
+            "calls": {key: {**c, "waited_seconds": round(c["waited_seconds"], 2)} for key, c in self._counters.items()},
+            "buckets": buckets,
+        }
+
+
+def _env_float(name: str, default: float) -> float:
+    try:
+        return float(os.environ.get(name, default))
+    except ValueError:
+        return default
+
+
+def limiter_from_env(default_path) -> RateLimiter:
+    """RATE_LIMIT_BACKEND = file (default) | memory | off, plus per-provider RPM/TPM limits."""
+    kind = os.environ.get("RATE_LIMIT_BACKEND", "file").lower()
+    limits = {
+        "gemini": {"rpm": _env_float("GEMINI_RPM", 10), "tpm": _env_float("GEMINI_TPM", 250000)},
+        "groq": {"rpm": _env_float("GROQ_RPM", 30), "tpm": _env_float("GROQ_TPM", 12000)},
+    }
+    if kind == "off":
+        limits = {}
+    backend = MemoryBackend()
+    if kind == "file":
+        try:
+            backend = FileBackend(os.environ.get("RATE_LIMIT_PATH") or default_path)
+        except (RuntimeError, OSError) as e:
+            print(f"⚠️ Rate limits are per-process: {e}")
+    return RateLimiter(backend, limits, max_wait=_env_float("RATE_LIMIT_MAX_WAIT", 5))
@@ -0,0 +1,165 @@
+# backend/resume_parser.py
+"""Rule-based resume text parsing (used when Gemini is unavailable or as backfill).
+
+parse_resume_text walks the lines once: each line is classified as a section
+header through a prefix lookup table, otherwise it is parsed straight into the
+current section. Patterns are compiled at import time.
+"""
+import re
+from typing import Any, Dict, List, Optional
+
+# Section headers recognised by parse_resume_text (also used to stop extraction early)
+RESUME_SECTION_HEADERS = [
+    ("skills", ["skills", "technical skills", "skills & tools"]),
+    ("experience", ["experience", "work experience", "professional experience", "employment history"]),
+    ("education", ["education", "academic background"]),
+    ("projects", ["projects", "key projects", "personal projects"])
+]
+
+# Header prefix -> section key. No variant is a prefix of another section's
+# variant, so whichever prefix length hits first gives the same key as trying
+# the sections in order.
+_HEADER_LOOKUP = {variant: key for key, variants in RESUME_SECTION_HEADERS for variant in variants}
+_HEADER_LENGTHS = sorted({len(variant) for variant in _HEADER_LOOKUP})
+
+EMAIL_RE = re.compile(r'[A-Za-z0-9._%+-]+@[A-Za-z0-9.-]+\.[A-Za-z]{2,}')
+PHONE_RE = re.compile(r'(\+?\d{1,3}[\s.-]?)?\(?\d{3}\)?[\s.-]?\d{3}[\s.-]?\d{4}')
+NAME_SKIP_RE = re.compile(r'resume|curriculum|cv|page')
+SKILL_SPLIT_RE = re.compile(r"[,;]\s*")
+# Role @ Company, company suffixes, or a year
+EXPERIENCE_MARKER_RE = re.compile(r"@|\b(Inc\.|LLC|Ltd\.|Pvt\.|Technologies|Solutions)\b|\b(\d{4})\b")
+BULLETS = ('-', '*', '•')
+
+
+def section_key(line: str) -> Optional[str]:
+    """Section a header line opens ("skills", "experience", ...), or None."""
+    low = line.lower().strip(':').strip()
+    lookup = _HEADER_LOOKUP
+    for n in _HEADER_LENGTHS:
+        key = lookup.get(low[:n])
+        if key is not None:
+            return key
+    return None
+
+
+def _guess_name(lines: List[str], max_len: int) -> Optional[str]:
+    # Name: first non-header reasonable line among the first five
+    for line in lines[:5]:
+        if NAME_SKIP_RE.search(line.lower()):
+            continue
+        if 3 < len(line) < max_len and not any(c.isdigit() for c in line):
+            return line
+    return None
+
+
+def regex_fallback(text):
+    """Last resort regex extraction if AI fails completely"""
+    print("⚠️ Using Regex Fallback")
+    data = {
+        "name": "Candidate", "email": "", "phone": "",
+        "skills": [], "experience": [], "projects": []
+    }
+
+    lines = [l for l in (l.strip() for l in text.split('\n')) if l]
+    data["name"] = _guess_name(lines, 50) or data["name"]
+
+    email_match = EMAIL_RE.search(text)
+    if email_match: data["email"] = email_match.group(0)
+
+    # Phone (Handles +91, spaces, dashes, brackets)
+    phone_match = PHONE_RE.search(text)
+    if phone_match: data["phone"] = phone_match.group(0).strip()
+
+    return data
+
+
+def parse_resume_text(text: str) -> Dict[str, Any]:
+    """Parse resume text to extract name/email/phone and sections.
+    Returns dict with keys: name, email, phone, education, skills, experience, projects.
+    """
+    data = {
+        "name": "Candidate",
+        "email": "",
+        "phone": "",
+        "education": "",
+        "skills": [],
+        "experience": [],
+        "projects": []
+    }
+
+    if not text:
+        return data
+
+    lines = [l for l in (l.strip() for l in text.splitlines()) if l]
+    data["name"] = _guess_name(lines, 60) or data["name"]
+
+    # The phone pattern may span a line break, so both run over the whole text
+    email_match = EMAIL_RE.search(text)
+    if email_match:
+        data["email"] = email_match.group(0)
+    phone_match = PHONE_RE.search(text)
+    if phone_match:
+        data["phone"] = phone_match.group(0).strip()
+
+    # One pass over the lines. A repeated header restarts its section,
+    # so the last occurrence wins.
+    skills: List[str] = []
+    seen_skills = set()
+    experience: List[str] = []
+    education: List[str] = []
+    projects: List[str] = []
+    current = None
+    lookup, lengths = _HEADER_LOOKUP, _HEADER_LENGTHS
+    skill_split, experience_marker = SKILL_SPLIT_RE.split, EXPERIENCE_MARKER_RE.search
+
+    for l in lines:
+        low = l.lower().strip(':').strip()
+        key = None
+        for n in lengths:
+            key = lookup.get(low[:n])
+            if key is not None:
+                break
+        if key is not None:
+            current = key
+            if key == "skills":
+                skills, seen_skills = [], set()
+            elif key == "experience":
+                experience = []
+            elif key == "education":
+                education = []
+            else:
+                projects = []
+            continue
+
+        if current == "skills":
+            # bullets, then comma/semicolon separated
+            if l.startswith(BULLETS):
+                l = l.lstrip('-*•').strip()
+            for p in skill_split(l):
+                p = p.strip().strip('.')
+                if p and len(p) > 1:
+                    p_low = p.lower()
+                    if not p_low.startswith("experience") and p_low not in seen_skills:
+                        seen_skills.add(p_low)
+                        skills.append(p)
+        elif current == "experience":
+            if l.startswith(BULLETS):
+                item = l.lstrip('-*•').strip()
+                if item:
+                    experience.append(item)
+            elif len(l) > 20 or experience_marker(l):
+                experience.append(l)
+        elif current == "education":
+            education.append(l)
+        elif current == "projects":
+            if l.startswith(BULLETS):
+                projects.append(l.lstrip('-*•').strip())
+            elif len(l) > 10:
+                projects.append(l)
+
+    data["skills"] = skills
+    data["experience"] = experience
+    if education:
+        data["education"] = "; ".join(education)
+    data["projects"] = projects
+    return data
@@ -0,0 +1,90 @@
+# backend/roadmap_pdf.py
+"""Career-roadmap PDF rendering (blocking; run it on a worker pool).
+
+The sample stylesheet is built once at import instead of per request, and
+documents are rendered with reportlab's `invariant` flag so the same roadmap
+always produces the same bytes (safe to cache and to hash for ETags).
+"""
+import hashlib
+import io
+import json
+import re
+import unicodedata
+import zipfile
+from typing import Any, Dict, Iterator, List, Tuple
+from urllib.parse import quote
+
+from reportlab.lib.pagesizes import letter
+from reportlab.lib.styles import getSampleStyleSheet
+from reportlab.platypus import SimpleDocTemplate, Paragraph, Spacer
+
+STYLES = getSampleStyleSheet()
+CHUNK_SIZE = 64 * 1024
+# Path separators, characters Windows forbids, header delimiters and whitespace; any script's letters
+# (combining marks included) stay, content_disposition() adds the ASCII fallback
+_UNSAFE_FILENAME_RE = re.compile(r'[\s\\/:*?"<>|;,\x00-\x1f\x7f]+')
+_NON_ASCII_FILENAME_RE = re.compile(r"[^\w.-]+", re.ASCII)
+
+
+def roadmap_key(candidate_name: str, roadmap_data: Dict[str, Any]) -> str:
+    """SHA-256 of the canonical (name, roadmap) JSON."""
+    payload = json.dumps([candidate_name, roadmap_data], sort_keys=True, separators=(",", ":"), default=str)
+    return hashlib.sha256(payload.encode()).hexdigest()
+
+
+def roadmap_filename(candidate_name: str) -> str:
+    name = _UNSAFE_FILENAME_RE.sub("_", candidate_name).strip("_") or "Candidate"
+    return f"Career_Roadmap_{name}.pdf"
+
+
+def content_disposition(filename: str) -> str:
+    """`attachment` header for any filename: an ASCII fallback, plus the UTF-8 name (RFC 6266) when they differ."""
+    ascii_name = unicodedata.normalize("NFKD", filename).encode("ascii", "ignore").decode()
+    fallback = _NON_ASCII_FILENAME_RE.sub("_", ascii_name).strip("_") or "download"
+    if fallback == filename:
+        return f'attachment; filename="{filename}"'
+    return f"attachment; filename=\"{fallback}\"; filename*=UTF-8''{quote(filename, safe='')}"
+
+
+def render_roadmap_pdf(candidate_name: str, data: Dict[str, Any]) -> bytes:
+    buffer = io.BytesIO()
+    doc = SimpleDocTemplate(buffer, pagesize=letter, invariant=1)
+    story = []
+
+    story.append(Paragraph(f"Career Roadmap: {candidate_name}", STYLES['Title']))
+    story.append(Spacer(1, 12))
+
+    story.append(Paragraph(f"Readiness Score: {data['analysis']['readiness_score']}%", STYLES['Heading2']))
+    story.append(Paragraph(data['analysis']['readiness_reasoning'], STYLES['Normal']))
+    story.append(Spacer(1, 12))
+
+    story.append(Paragraph("Action Plan:", STYLES['Heading2']))
+    for step in data['learning_roadmap']:
+        text = f"<b>Phase {step['phase']}: {step['focus']}</b><br/>Duration: {step['duration']}<br/>{step['reasoning']}"
+        story.append(Paragraph(text, STYLES['Normal']))
+        story.append(Spacer(1, 10))
+
+    doc.build(story)
+    return buffer.getvalue()
+
+
+def zip_roadmaps(files: List[Tuple[str, bytes]]) -> bytes:
+    """Zips (filename, pdf) pairs, suffixing repeated names (`_2`, `_3`, ...)."""
+    buffer = io.BytesIO()
+    used = set()
+    with zipfile.ZipFile(buffer, "w", zipfile.ZIP_DEFLATED) as archive:
+        for filename, pdf in files:
+            stem, ext = filename.rsplit(".", 1)
+            count = 1
+            while filename in used:
+                count += 1
+                filename = f"{stem}_{count}.{ext}"
+            used.add(filename)
+            archive.writestr(filename, pdf)
+    return buffer.getvalue()
+
+
+def iter_chunks(data: bytes, size: int = CHUNK_SIZE) -> Iterator[bytes]:
+    view = memoryview(data)
+    for start in range(0, len(view), size):
+        yield bytes(view[start:start + size])
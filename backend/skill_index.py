@@ -0,0 +1,102 @@
+# backend/skill_index.py
+"""Normalized skill lookup and in-text skill matching over the skill taxonomy.
+
+Built once at startup from skill_taxonomy.json. Every skill name and alias is
+reduced to a key ("Node.js", "NodeJS" and "node js" all become "nodejs") for
+direct lookups, and tokenized into a trie so a single left-to-right walk over a
+JD or resume finds every known skill (leftmost-longest, non-overlapping).
+"""
+import re
+from collections import Counter
+from typing import Any, Dict, Iterator, List, Optional, Tuple
+
+# Words plus trailing +/# so "C++" and "C#" survive; ".", "/", "-" and spaces split
+TOKEN_RE = re.compile(r"[A-Za-z0-9]+[+#]*")
+
+_END = "__skill__"
+_CASED = "__cased__"
+
+
+def skill_key(name: str) -> str:
+    """Punctuation- and case-insensitive key: "Node.js" -> "nodejs", "CI/CD" -> "cicd"."""
+    return "".join(TOKEN_RE.findall(name)).lower()
+
+
+class SkillIndex:
+    """Taxonomy skills keyed by normalized name/alias, plus a token trie for scanning text."""
+
+    def __init__(self, skills: Dict[str, Dict[str, Any]]):
+        self.skills = skills
+        self._by_key: Dict[str, str] = {}
+        self._trie: Dict[str, Any] = {}
+        for name, entry in skills.items():
+            for variant in [name] + list(entry.get("aliases", [])):
+                self._add(variant, name)
+
+    def _add(self, variant: str, name: str):
+        tokens = [t.lower() for t in TOKEN_RE.findall(variant)]
+        if not tokens:
+            return
+        self._by_key.setdefault("".join(tokens), name)
+        # "Node.js" is also written "NodeJS": register the joined spelling as one token
+        sequences = [tokens, ["".join(tokens)]] if len(tokens) > 1 else [tokens]
+        for seq in sequences:
+            node = self._trie
+            for token in seq:
+                node = node.setdefault(token, {})
+            node.setdefault(_END, name)
+            # Two-letter names ("Go", "ML", "TS") are ordinary words in lower case
+            if len(seq) == 1 and len(seq[0]) <= 2:
+                node[_CASED] = True
+
+    def __len__(self):
+        return len(self.skills)
+
+    def lookup(self, name: str) -> Optional[str]:
+        """Canonical taxonomy name for an exact name or alias, ignoring case and punctuation."""
+        return self._by_key.get(skill_key(name)) if name else None
+
+    def resolve(self, name: str) -> Optional[str]:
+        """lookup(), falling back to the first known skill mentioned in `name` ("Python 3" -> "Python")."""
+        found = self.lookup(name)
+        if found is None and name:
+            found = next((skill for skill, _, _ in self.scan(name)), None)
+        return found
+
+    def get(self, name: str) -> Dict[str, Any]:
+        """Taxonomy entry for `name` (any spelling or alias), or {}."""
+        found = self.resolve(name)
+        return self.skills.get(found, {}) if found else {}
+
+    def scan(self, text: str) -> Iterator[Tuple[str, int, int]]:
+        """Yield (skill, start, end) for every skill mention in text, left to right."""
+        if not text:
+            return
+        tokens = list(TOKEN_RE.finditer(text))
+        trie, n, i = self._trie, len(tokens), 0
+        while i < n:
+            node, j, best = trie, i, None
+            while j < n:
+                raw = tokens[j].group()
+                node = node.get(raw.lower())
+                if node is None:
+                    break
+                j += 1
+                if _END in node and not (node.get(_CASED) and j - i == 1 and raw.islower()):
+                    best = (node[_END], j)
+            if best is None:
+                i += 1
+                continue
+            skill, j = best
+            yield skill, tokens[i].start(), tokens[j - 1].end()
+            i = j
+
+    def counts(self, text: str) -> Counter:
+        """Mentions per skill, in order of first appearance."""
+        return Counter(skill for skill, _, _ in self.scan(text))
+
+    def extract(self, text: str, limit: Optional[int] = None) -> List[str]:
+        """Known skills in text, most mentioned first (ties keep document order)."""
+        counts = self.counts(text)
+        ranked = sorted(counts, key=lambda skill: -counts[skill])
+        return ranked[:limit] if limit is not None else ranked
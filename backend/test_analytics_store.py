@@ -0,0 +1,44 @@
+# backend/test_analytics_store.py
+"""Checks for the columnar application store: a rejected ingest batch leaves
+the rows and daily rollups exactly as they were.
+
+Run with `python test_analytics_store.py` (or pytest).
+"""
+from datetime import datetime
+
+from analytics_store import ApplicationAnalytics
+
+ROWS = [
+    {"id": i, "job_id": 1, "candidate_name": f"C{i}", "application_date": f"2024-05-0{i}T10:00:00",
+     "status": "Applied", "source": "LinkedIn", "quality_score": 60, "time_to_hire_days": None}
+    for i in range(1, 4)
+]
+
+
+def test_rejected_batch_changes_nothing():
+    analytics = ApplicationAnalytics(ROWS)
+    since = datetime(2024, 4, 1)
+    before = analytics.window_stats(since).total
+
+    batch = [
+        {"job_id": 1, "source": "Referral", "status": "Applied", "quality_score": 50},
+        {"id": 2, "status": "Hired", "time_to_hire_days": 12},
+        {"job_id": 2},  # a new application without source / status / quality_score
+    ]
+    try:
+        analytics.ingest_many(batch)
+        raise AssertionError("expected ValueError")
+    except ValueError as e:
+        assert "missing fields" in str(e)
+    assert len(analytics.store) == 3 and analytics.window_stats(since).total == before
+    assert analytics.store.row(analytics.store.position_of(2))["status"] == "Applied"
+    assert analytics.store.max_id() == 3
+
+    ingested = analytics.ingest_many(batch[:2])
+    assert [created for _, created in ingested] == [True, False]
+    assert len(analytics.store) == 4 and ingested[0][0]["id"] == 4
+
+
+if __name__ == "__main__":
+    test_rejected_batch_changes_nothing()
+    print("✅ Analytics ingest is all or nothing")
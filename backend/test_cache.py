@@ -0,0 +1,41 @@
+# backend/test_cache.py
+"""Checks for the on-disk cache tier: entry and byte caps evict the oldest files,
+including ones written by an earlier process, and expired files are dropped.
+
+Run with `python test_cache.py` (or pytest).
+"""
+import os
+import shutil
+import tempfile
+import time
+
+from cache import DiskCache
+
+
+def test_disk_cache_evicts_oldest_past_caps():
+    directory = tempfile.mkdtemp(prefix="wai-wai-tests-")
+    try:
+        earlier = DiskCache(directory)
+        for i in range(3):
+            earlier.set(f"{i:02d}aa", {"text": "x" * 100})
+            os.utime(earlier._path(f"{i:02d}aa"), (time.time() - 30 + i, time.time() - 30 + i))
+
+        cache = DiskCache(directory, max_entries=3, max_bytes=400)
+        cache.set("03aa", {"text": "y" * 100})
+        assert cache.get("00aa") is None and cache.get("01aa") is not None
+        cache.set("04aa", {"text": "z" * 300})
+        stats = cache.stats()
+        assert stats["entries"] == 1 and stats["bytes"] <= 400 and stats["evictions"] == 4
+        assert cache.get("04aa") == {"text": "z" * 300}
+
+        expiring = DiskCache(directory, ttl=10, max_entries=3)
+        os.utime(expiring._path("04aa"), (time.time() - 60, time.time() - 60))
+        expiring.set("05aa", {"text": "w"})
+        assert expiring.get("04aa") is None and expiring.stats()["entries"] == 1
+    finally:
+        shutil.rmtree(directory, ignore_errors=True)
+
+
+if __name__ == "__main__":
+    test_disk_cache_evicts_oldest_past_caps()
+    print("✅ Disk cache stays within its caps")
@@ -0,0 +1,164 @@
+# backend/test_concurrency.py
+"""Checks that slow provider calls run off the event loop.
+
+Stubs Groq / Gemini with fakes that block for PROVIDER_DELAY seconds, fires
+concurrent requests at the app in-process, and measures /health latency while
+they are in flight.  Run with `python test_concurrency.py` (or pytest).
+"""
+import asyncio
+import atexit
+import os
+import shutil
+import tempfile
+import threading
+import time
+from types import SimpleNamespace
+
+import httpx
+
+# Provider quotas and the notification bus have their own tests; keep shared
+# bucket state and other workers' sockets out of these runs
+os.environ.setdefault("RATE_LIMIT_BACKEND", "off")
+os.environ.setdefault("NOTIFY_BUS", "memory")
+# Disk caches and rate-limit state go to a throwaway directory, never the checkout's backend/.cache
+STATE_DIR = tempfile.mkdtemp(prefix="wai-wai-tests-")
+atexit.register(shutil.rmtree, STATE_DIR, ignore_errors=True)
+os.environ["GAP_CACHE_DIR"] = os.path.join(STATE_DIR, "analyze-gap")
+os.environ["PARSE_CACHE_DIR"] = os.path.join(STATE_DIR, "parse-resume")
+os.environ["RATE_LIMIT_PATH"] = os.path.join(STATE_DIR, "rate-limits.json")
+
+import main
+from providers import GROQ_POOL, ProviderPool
+
+PROVIDER_DELAY = 0.5
+CONCURRENT_REQUESTS = 8
+
+
+class SlowCall:
+    """Blocking fake that records how many calls overlap."""
+
+    def __init__(self, respond):
+        self.respond = respond
+        self.active = 0
+        self.peak = 0
+        self._lock = threading.Lock()
+
+    def __call__(self, *args, **kwargs):
+        with self._lock:
+            self.active += 1
+            self.peak = max(self.peak, self.active)
+        time.sleep(PROVIDER_DELAY)  # deliberately blocking, like the real SDKs
+        with self._lock:
+            self.active -= 1
+        return self.respond(*args, **kwargs)
+
+
+async def _fire(path, payload):
+    transport = httpx.ASGITransport(app=main.app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://test") as client:
+        async def health_latency():
+            await asyncio.sleep(PROVIDER_DELAY / 5)
+            t0 = time.perf_counter()
+            await client.get("/health")
+            return time.perf_counter() - t0
+
+        t0 = time.perf_counter()
+        results = await asyncio.gather(
+            health_latency(),
+            *[client.post(path, json=payload) for _ in range(CONCURRENT_REQUESTS)],
+        )
+        return time.perf_counter() - t0, results[0], results[1:]
+
+
+def test_generate_job_does_not_block_loop():
+    fake = SlowCall(lambda **kw: SimpleNamespace(choices=[SimpleNamespace(message=SimpleNamespace(content="JD"))]))
+    original = main.groq_client
+    main.groq_client = SimpleNamespace(chat=SimpleNamespace(completions=SimpleNamespace(create=fake)))
+    try:
+        elapsed, health, responses = asyncio.run(_fire("/api/generate-job", {"jobTitle": "Dev", "skills": "Python"}))
+    finally:
+        main.groq_client = original
+
+    assert all(r.status_code == 200 for r in responses)
+    # /health answers while the Groq calls are still sleeping
+    assert health < PROVIDER_DELAY / 2, health
+    # The per-provider limit is honoured, and requests overlap up to it
+    assert fake.peak == min(GROQ_POOL.max_concurrency, CONCURRENT_REQUESTS)
+    rounds = -(-CONCURRENT_REQUESTS // GROQ_POOL.max_concurrency)
+    assert elapsed < PROVIDER_DELAY * (rounds + 1), elapsed
+    print(f"generate-job: {CONCURRENT_REQUESTS} requests in {elapsed:.2f}s, "
+          f"/health {health * 1000:.1f}ms, peak Groq concurrency {fake.peak}")
+
+
+def test_analyze_gap_does_not_block_loop():
+    def respond(prompt):
+        if "Career Strategist" in prompt:
+            return SimpleNamespace(text='{"readiness_score": 82}')
+        return SimpleNamespace(text='["Python", "Docker"]')
+
+    fake = SlowCall(respond)
+    original_model, original_key = main.genai.GenerativeModel, main.gemini_key
+    main.genai.GenerativeModel = lambda name: SimpleNamespace(generate_content=fake)
+    main.gemini_key = "test-key"
+    payload = {"current_role": "Dev", "current_skills": ["Python"], "target_role": "SRE",
+               "job_description": "Python Docker Kubernetes"}
+    # Cached results would skip the slow provider and make the timing meaningless
+    main.JD_SKILLS_CACHE.clear()
+    main.GAP_ANALYSIS_CACHE.clear()
+    try:
+        elapsed, health, responses = asyncio.run(_fire("/api/analyze-gap", payload))
+    finally:
+        main.genai.GenerativeModel, main.gemini_key = original_model, original_key
+
+    assert all(r.status_code == 200 for r in responses)
+    assert fake.peak > 1, "the fake provider was never called concurrently"
+    assert health < PROVIDER_DELAY / 2, health
+    print(f"analyze-gap: {CONCURRENT_REQUESTS} requests in {elapsed:.2f}s, "
+          f"/health {health * 1000:.1f}ms, peak Gemini concurrency {fake.peak}")
+
+
+class SlowWorkerLock:
+    """A lock the pool's worker threads are slow to take, widening the start-up race."""
+
+    def __init__(self, prefix):
+        self.prefix = prefix
+        self._lock = threading.Lock()
+
+    def __enter__(self):
+        if threading.current_thread().name.startswith(self.prefix):
+            time.sleep(0.05)
+        self._lock.acquire()
+
+    def __exit__(self, *exc):
+        self._lock.release()
+
+
+def test_pool_counters_survive_cancellation():
+    pool = ProviderPool("test", 2)
+    pool._lock = SlowWorkerLock("test-pool")
+
+    async def run():
+        # Cancelled after a worker picked the call up but before it counted it as started
+        task = asyncio.ensure_future(pool.run(time.sleep, 0.01))
+        await asyncio.sleep(0.01)
+        task.cancel()
+        await asyncio.gather(task, return_exceptions=True)
+        # Let the worker finish the call it had already picked up
+        await asyncio.get_running_loop().run_in_executor(None, pool._executor.shutdown, True)
+        return pool.stats()
+
+    stats = asyncio.run(run())
+    assert stats["waiting"] == 0 and stats["in_flight"] == 0, stats
+
+    async def slot():
+        # The slot semaphore is made in the loop using it, so each asyncio.run gets a working one
+        async with pool.slot():
+            return pool.stats()["in_flight"]
+
+    assert asyncio.run(slot()) == 1 and asyncio.run(slot()) == 1
+
+if __name__ == "__main__":
+    test_generate_job_does_not_block_loop()
+    test_analyze_gap_does_not_block_loop()
+    test_pool_counters_survive_cancellation()
+    print("✅ Event loop stayed responsive")
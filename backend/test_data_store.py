@@ -0,0 +1,162 @@
+# backend/test_data_store.py
+"""Checks for the async data-access layer: PostgREST requests against a scripted
+transport (filters, counts, retry rules for reads vs. inserts, one pooled client)
+and keyset paging on the in-memory store.
+
+Run with `python test_data_store.py` (or pytest).
+"""
+import asyncio
+
+import httpx
+
+from data_store import DataStoreError, MemoryStore, PostgrestStore
+
+
+class ScriptedPostgrest:
+    """Answers requests with the queued (status, json, headers) responses, recording each request."""
+
+    def __init__(self, *responses):
+        self.responses = list(responses)
+        self.requests = []
+
+    def __call__(self, request: httpx.Request) -> httpx.Response:
+        self.requests.append(request)
+        status, body, headers = self.responses.pop(0)
+        if isinstance(body, Exception):
+            raise body
+        return httpx.Response(status, json=body, headers=headers)
+
+
+def _store(script, retries=2):
+    return PostgrestStore("https://project.supabase.co", "key", retries=retries, backoff=0.001,
+                          transport=httpx.MockTransport(script))
+
+
+def test_requests_carry_postgrest_filters():
+    script = ScriptedPostgrest(
+        (200, [{"user_id": "a@x.com"}], {}),
+        (200, None, {"content-range": "*/42"}),
+        (200, [], {}),
+    )
+    store = _store(script)
+
+    async def run():
+        prefs = await store.select_preferences(["a@x.com", 'b"c'])
+        count = await store.count_unread("a@x.com")
+        await store.notification_page("a@x.com", 21, ("lt", "2024-05-01T10:00:00+00:00", "id-9"))
+        await store.aclose()
+        return prefs, count
+
+    prefs, count = asyncio.run(run())
+    assert prefs == [{"user_id": "a@x.com"}] and count == 42
+    select, head, page = script.requests
+    assert select.url.path == "/rest/v1/notification_preferences"
+    assert select.url.params["user_id"] == 'in.("a@x.com","b\\"c")'
+    assert select.headers["apikey"] == "key" and select.headers["authorization"] == "Bearer key"
+    assert head.method == "HEAD" and head.headers["prefer"] == "count=exact"
+    assert head.url.params["read"] == "eq.false"
+    assert page.url.params["order"] == "created_at.desc,id.desc" and page.url.params["limit"] == "21"
+    assert page.url.params["or"] == ('(created_at.lt."2024-05-01T10:00:00+00:00",'
+                                     'and(created_at.eq."2024-05-01T10:00:00+00:00",id.lt."id-9"))')
+
+
+def test_reads_retry_but_inserts_only_when_safe():
+    reads = ScriptedPostgrest((502, {"message": "bad gateway"}, {}),
+                              (0, httpx.ReadTimeout("slow"), {}),
+                              (200, [{"user_id": "u"}], {}))
+    inserts = ScriptedPostgrest((500, {"message": "boom"}, {}))
+    throttled = ScriptedPostgrest((503, {}, {}), (201, [{"id": "n1"}], {}))
+    exhausted = ScriptedPostgrest(*[(503, {"message": "down"}, {})] * 3)
+
+    async def run():
+        rows = await _store(reads).select_preferences(["u"])
+        try:
+            await _store(inserts).insert_notifications([{"user_id": "u"}])
+            raise AssertionError("a 500 on INSERT must not be retried")
+        except DataStoreError as e:
+            assert e.status == 500 and "boom" in str(e)
+        inserted = await _store(throttled).insert_notifications([{"user_id": "u"}])
+        store = _store(exhausted)
+        try:
+            await store.select_preferences(["u"])
+            raise AssertionError("expected DataStoreError")
+        except DataStoreError as e:
+            assert e.status == 503
+        return rows, inserted, store.stats()["operations"]["select_preferences"]
+
+    rows, inserted, metrics = asyncio.run(run())
+    assert rows == [{"user_id": "u"}] and len(reads.requests) == 3
+    assert len(inserts.requests) == 1
+    assert inserted == [{"id": "n1"}] and len(throttled.requests) == 2
+    assert metrics["calls"] == 1 and metrics["errors"] == 1 and metrics["retries"] == 2
+
+
+def test_retried_mark_read_reports_unconfirmed_owners():
+    # The first PATCH applied but its response was lost; the retry matches nothing
+    retried = ScriptedPostgrest((0, httpx.ReadTimeout("slow"), {}),
+                                (200, [{"id": "n1", "user_id": "u"}], {}),
+                                (200, [{"user_id": "v"}], {}))
+    clean = ScriptedPostgrest((200, [], {}))
+
+    async def run():
+        return await _store(retried).mark_read(["n1", "n2"]), await _store(clean).mark_read(["n3"])
+
+    (rows, unconfirmed), (_, none) = asyncio.run(run())
+    assert [row["id"] for row in rows] == ["n1"] and unconfirmed == ["v"] and none == []
+    owners = retried.requests[-1]
+    assert owners.method == "GET" and owners.url.params["id"] == 'in.("n2")'
+    assert len(clean.requests) == 1
+
+
+def test_client_is_pooled_per_event_loop():
+    store = _store(ScriptedPostgrest(*[(200, [], {})] * 3))
+
+    async def run():
+        await store.select_preferences(["u"])
+        first = store._http()
+        await store.select_preferences(["v"])
+        return first is store._http()
+
+    assert asyncio.run(run())
+    [first] = store._clients.values()
+    # A new loop (e.g. a test client) gets its own client instead of reusing dead connections,
+    # and the closed loop's client is closed rather than leaked
+    assert asyncio.run(store.select_preferences(["w"])) == []
+    assert first.is_closed and len(store._clients) == 1
+
+    async def shutdown():
+        await store.aclose()
+
+    asyncio.run(shutdown())
+    assert store._clients == {}
+
+
+def test_memory_store_pages_by_keyset():
+    store = MemoryStore()
+
+    async def run():
+        rows = await store.insert_notifications([{"user_id": "u", "read": False, "n": i} for i in range(5)])
+        for i, row in enumerate(rows):
+            # Two rows share a timestamp; id breaks the tie
+            store.notifications[row["id"]]["created_at"] = f"2024-05-01T10:00:0{min(i, 3)}+00:00"
+        newest = await store.notification_page("u", 2)
+        last = newest[-1]
+        older = await store.notification_page("u", 10, ("lt", last["created_at"], last["id"]))
+        newer = await store.notification_page("u", 10, ("gt", older[0]["created_at"], older[0]["id"]), ascending=True)
+        changed, unconfirmed = await store.mark_read([rows[0]["id"], rows[0]["id"], "missing"])
+        assert unconfirmed == []
+        return newest, older, newer, changed, await store.count_unread("u")
+
+    newest, older, newer, changed, unread = asyncio.run(run())
+    assert sorted(r["n"] for r in newest + older) == [0, 1, 2, 3, 4]
+    assert [r["n"] for r in newer] == [r["n"] for r in newest][::-1]
+    assert len(changed) == 1 and unread == 4
+
+
+if __name__ == "__main__":
+    test_requests_carry_postgrest_filters()
+    test_reads_retry_but_inserts_only_when_safe()
+    test_retried_mark_read_reports_unconfirmed_owners()
+    test_client_is_pooled_per_event_loop()
+    test_memory_store_pages_by_keyset()
+    print("✅ Data store behaves")
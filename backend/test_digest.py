@@ -0,0 +1,79 @@
+# backend/test_digest.py
+"""Checks for the digest scheduler: window boundaries, one digest per user per
+window, rescheduling on a frequency change, and requeueing after a failed write.
+
+Run with `python test_digest.py` (or pytest).
+"""
+from datetime import datetime, timezone
+
+from digest import DigestScheduler, digest_row, window_end
+
+
+def _ts(text):
+    return datetime.fromisoformat(text).replace(tzinfo=timezone.utc).timestamp()
+
+
+class Clock:
+    def __init__(self, now):
+        self.now = now
+
+    def __call__(self):
+        return self.now
+
+
+def _item(title, priority="medium"):
+    return {"type": "JOB_MATCH", "title": title, "message": "m", "data": {}, "priority": priority}
+
+
+def test_windows_close_on_utc_boundaries():
+    now = _ts("2024-05-15T10:20:00")  # a Wednesday
+    assert window_end("hourly", now) == _ts("2024-05-15T11:00:00")
+    assert window_end("daily", now) == _ts("2024-05-16T00:00:00")
+    assert window_end("weekly", now) == _ts("2024-05-20T00:00:00")
+    # A notification exactly on the boundary starts the next window
+    assert window_end("hourly", _ts("2024-05-15T11:00:00")) == _ts("2024-05-15T12:00:00")
+
+
+def test_one_digest_per_user_per_window():
+    clock = Clock(_ts("2024-05-15T10:20:00"))
+    digests = DigestScheduler(max_items=2, clock=clock)
+    for title in ("A", "A", "B"):
+        digests.add("u", "hourly", _item(title))
+    digests.add("v", "daily", _item("C", "low"))
+    assert digests.due() == []
+
+    clock.now = _ts("2024-05-15T11:00:00")
+    [(user_id, digest)] = digests.due()
+    assert user_id == "u" and digest["count"] == 3 and len(digest["items"]) == 2
+    row = digest_row(user_id, digest)
+    assert row["type"] == "DIGEST" and row["priority"] == "medium"
+    assert row["message"] == "3 new updates: A ×2, 1 more"
+    assert "v" in digests and "u" not in digests
+
+    clock.now = _ts("2024-05-16T00:00:00")
+    assert [user_id for user_id, _ in digests.due()] == ["v"]
+    assert digests.stats()["buffered"] == 4
+
+
+def test_reschedule_and_requeue():
+    clock = Clock(_ts("2024-05-15T10:20:00"))
+    digests = DigestScheduler(clock=clock)
+    digests.add("u", "daily", _item("A"))
+    # Switching to immediate sends what's pending at the next tick
+    digests.reschedule("u", "immediate")
+    [(_, digest)] = digests.due()
+    assert digests.due() == []  # the stale daily heap entry is skipped later
+
+    digests.add("u", "daily", _item("B"))
+    digests.requeue("u", digest, clock.now + 300)
+    assert digests.due() == []
+    clock.now += 300
+    [(_, merged)] = digests.due()
+    assert [item["title"] for item in merged["items"]] == ["A", "B"] and merged["count"] == 2
+
+
+if __name__ == "__main__":
+    test_windows_close_on_utc_boundaries()
+    test_one_digest_per_user_per_window()
+    test_reschedule_and_requeue()
+    print("✅ Digest scheduler behaves")
@@ -0,0 +1,207 @@
+# backend/test_model_chain.py
+"""Offline checks for the Gemini model chain: ordered fallback, circuit breaker,
+latency budget and hedging, against a scripted fake provider.
+
+Run with `python test_model_chain.py` (or pytest).
+"""
+import asyncio
+import atexit
+import json
+import os
+import shutil
+import tempfile
+import threading
+import time
+from collections import Counter
+from types import SimpleNamespace
+
+import httpx
+
+# Provider quotas and the notification bus have their own tests; keep shared
+# bucket state and other workers' sockets out of these runs
+os.environ.setdefault("RATE_LIMIT_BACKEND", "off")
+os.environ.setdefault("NOTIFY_BUS", "memory")
+# Disk caches and rate-limit state go to a throwaway directory, never the checkout's backend/.cache
+STATE_DIR = tempfile.mkdtemp(prefix="wai-wai-tests-")
+atexit.register(shutil.rmtree, STATE_DIR, ignore_errors=True)
+os.environ["GAP_CACHE_DIR"] = os.path.join(STATE_DIR, "analyze-gap")
+os.environ["PARSE_CACHE_DIR"] = os.path.join(STATE_DIR, "parse-resume")
+os.environ["RATE_LIMIT_PATH"] = os.path.join(STATE_DIR, "rate-limits.json")
+
+import main
+from model_chain import ModelChain, ModelChainExhausted, is_unavailable
+from providers import ProviderPool
+
+FAST, PRIMARY, SECONDARY = 0.01, "gemini-2.5-flash", "gemini-flash-latest"
+
+
+class FakeProvider:
+    """Blocking stand-in for `call(model, prompt)`.
+
+    `script` maps a model to the outcomes of its successive calls, each a
+    (delay_seconds, text_or_exception) pair; the last outcome repeats.
+    """
+
+    def __init__(self, script):
+        self.script = {model: list(outcomes) for model, outcomes in script.items()}
+        self.calls = Counter()
+        self._lock = threading.Lock()
+
+    def __call__(self, model, prompt):
+        with self._lock:
+            outcomes = self.script[model]
+            delay, result = outcomes.pop(0) if len(outcomes) > 1 else outcomes[0]
+            self.calls[model] += 1
+        time.sleep(delay)
+        if isinstance(result, BaseException):
+            raise result
+        return SimpleNamespace(text=result)
+
+
+class ResourceExhausted(Exception):
+    """Shaped like google.api_core.exceptions.ResourceExhausted."""
+    code = 429
+
+
+class StatusError(Exception):
+    """An SDK error that only carries an HTTP status."""
+
+    def __init__(self, status_code):
+        super().__init__(f"HTTP {status_code}")
+        self.status_code = status_code
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+
+def _chain(fake, **kwargs):
+    return ModelChain("test", [PRIMARY, SECONDARY], fake, ProviderPool("test", 4), **kwargs)
+
+
+def test_falls_back_and_skips_open_model():
+    clock = FakeClock()
+    fake = FakeProvider({
+        PRIMARY: [(FAST, ResourceExhausted("429 Resource has been exhausted (e.g. check quota).")), (FAST, '["primary"]')],
+        SECONDARY: [(FAST, '["secondary"]')],
+    })
+    chain = _chain(fake, cooldown=60, clock=clock)
+
+    async def run():
+        first = await chain.generate("p", parse=lambda r: json.loads(r.text))
+        second = await chain.generate("p", parse=lambda r: json.loads(r.text))
+        clock.now = 61  # cooldown over: one probe goes back to the primary
+        third = await chain.generate("p", parse=lambda r: json.loads(r.text))
+        return first, second, third
+
+    first, second, third = asyncio.run(run())
+    assert first == (["secondary"], SECONDARY)
+    assert second == (["secondary"], SECONDARY)
+    assert third == (["primary"], PRIMARY)
+    # The open breaker kept the second request off the primary
+    assert fake.calls[PRIMARY] == 2
+    assert chain.counters[PRIMARY]["skipped"] == 1
+    assert chain.breakers[PRIMARY].state == "closed"
+
+
+def test_bad_output_moves_on_without_tripping():
+    # The JSON error for this text reads "... (char 429)", which must not look like a quota error
+    fake = FakeProvider({PRIMARY: [(FAST, " " * 429 + "not json")], SECONDARY: [(FAST, '{"ok": 1}')]})
+    chain = _chain(fake)
+    result = asyncio.run(chain.generate("p", parse=lambda r: json.loads(r.text)))
+    assert result == ({"ok": 1}, SECONDARY)
+    assert chain.breakers[PRIMARY].state == "closed"
+
+
+def test_unavailable_is_classified_by_status():
+    assert is_unavailable(ResourceExhausted("Resource has been exhausted"))
+    assert is_unavailable(StatusError(status_code=503))
+    assert not is_unavailable(StatusError(status_code=400))
+    assert is_unavailable(Exception("503 Service Unavailable"))
+    assert not is_unavailable(Exception("prompt mentions 429 and 503"))
+    assert not is_unavailable(json.JSONDecodeError("Expecting value", " " * 429, 429))
+
+
+def test_budget_bounds_latency():
+    fake = FakeProvider({PRIMARY: [(0.5, "late")], SECONDARY: [(0.5, "late")]})
+    chain = _chain(fake, budget=0.2)
+
+    async def run():
+        t0 = time.perf_counter()
+        try:
+            await chain.generate("p")
+        except ModelChainExhausted as e:
+            return time.perf_counter() - t0, e.errors
+        raise AssertionError("expected ModelChainExhausted")
+
+    elapsed, errors = asyncio.run(run())
+    assert elapsed < 0.35, elapsed
+    assert errors[PRIMARY] == "timed out"
+    # Slow is not down: the breaker stays closed
+    assert chain.breakers[PRIMARY].state == "closed"
+
+
+def test_hedges_only_slow_calls():
+    fake = FakeProvider({PRIMARY: [(0.5, "slow"), (FAST, "hedged"), (FAST, "fast")], SECONDARY: [(FAST, "unused")]})
+    chain = _chain(fake, hedge_after=0.1)
+
+    async def run():
+        t0 = time.perf_counter()
+        hedged = await chain.generate("p", parse=lambda r: r.text)
+        elapsed = time.perf_counter() - t0
+        fast = await chain.generate("p", parse=lambda r: r.text)
+        return hedged, elapsed, fast
+
+    hedged, elapsed, fast = asyncio.run(run())
+    assert hedged == ("hedged", PRIMARY) and elapsed < 0.4, elapsed
+    assert fast == ("fast", PRIMARY)
+    assert chain.counters[PRIMARY]["hedges"] == 1
+    assert chain.counters[PRIMARY]["hedge_wins"] == 1
+    assert fake.calls[PRIMARY] == 3
+
+
+def test_analyze_gap_quota_outage_falls_back_fast():
+    quota = ResourceExhausted("429 You exceeded your current quota")
+    fake = FakeProvider({PRIMARY: [(FAST, quota)], SECONDARY: [(FAST, quota)]})
+    original_call, original_key = main.GEMINI_CHAIN.call, main.gemini_key
+    main.GEMINI_CHAIN.call, main.gemini_key = fake, "test-key"
+    payload = {"current_role": "Dev", "current_skills": ["Python"], "target_role": "SRE",
+               "job_description": "Python Docker Kubernetes"}
+    # Both cache tiers, so every run (and test order) really reaches the provider
+    main.JD_SKILLS_CACHE.clear()
+    main.GAP_ANALYSIS_CACHE.clear()
+
+    async def post():
+        transport = httpx.ASGITransport(app=main.app)
+        async with httpx.AsyncClient(transport=transport, base_url="http://test") as client:
+            t0 = time.perf_counter()
+            response = await client.post("/api/analyze-gap", json=payload)
+            return response, time.perf_counter() - t0
+
+    try:
+        response, elapsed = asyncio.run(post())
+    finally:
+        main.GEMINI_CHAIN.call, main.gemini_key = original_call, original_key
+        for breaker in main.GEMINI_CHAIN.breakers.values():
+            breaker.record_success()
+
+    assert response.status_code == 200
+    assert fake.calls[PRIMARY] >= 1 and fake.calls[SECONDARY] >= 1
+    assert response.json()["learning_roadmap"][0]["reasoning"] == "Prioritized by learning hours and role impact."
+    # No fixed 6 s sleep: the outage costs one fast error per model, then the breakers skip them
+    assert elapsed < 1, elapsed
+    assert fake.calls[PRIMARY] == 1 and fake.calls[SECONDARY] == 1
+
+
+if __name__ == "__main__":
+    test_falls_back_and_skips_open_model()
+    test_bad_output_moves_on_without_tripping()
+    test_unavailable_is_classified_by_status()
+    test_budget_bounds_latency()
+    test_hedges_only_slow_calls()
+    test_analyze_gap_quota_outage_falls_back_fast()
+    print("✅ Model chain behaves")
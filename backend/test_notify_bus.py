@@ -0,0 +1,234 @@
+# backend/test_notify_bus.py
+"""Checks for WebSocket delivery: several sockets per user, per-connection send
+queues (bursts coalesced, slow consumers dropped or disconnected, heartbeats),
+and pushes routed between buses (in-process, and Unix sockets standing in for
+separate uvicorn workers).
+
+Run with `python test_notify_bus.py` (or pytest).
+"""
+import asyncio
+import os
+import socket
+import tempfile
+import time
+from pathlib import Path
+
+from notify_bus import ConnectionHub, InProcessBus, LocalSocketBus, bus_from_env
+
+
+class FakeSocket:
+    def __init__(self, fail=False, delay=0.0):
+        self.sent = []
+        self.fail = fail
+        self.delay = delay
+        self.closed_with = None
+
+    async def accept(self):
+        pass
+
+    async def send_json(self, message):
+        await asyncio.sleep(self.delay)
+        if self.fail:
+            raise RuntimeError("socket closed")
+        self.sent.append(message)
+
+    async def close(self, code=1000, reason=""):
+        self.closed_with = code
+
+
+async def settle(seconds=0.05):
+    """Lets the connections' writer tasks run."""
+    await asyncio.sleep(seconds)
+
+
+def _worker(bus):
+    """A hub whose bus handler pushes to its own sockets, like main._deliver_here."""
+    hub = ConnectionHub()
+
+    async def deliver(message):
+        hub.send(message["user_id"], message["event"])
+
+    bus.subscribe("notify", deliver)
+    return hub
+
+
+def test_hub_sends_to_every_socket_and_drops_dead_ones():
+    hub = ConnectionHub()
+    tab1, tab2, dead = FakeSocket(), FakeSocket(), FakeSocket(fail=True)
+
+    async def run():
+        connections = [await hub.connect(ws, "u") for ws in (tab1, tab2, dead)]
+        first = hub.send("u", {"n": 1})
+        await settle()
+        second = hub.send("u", {"n": 2})
+        await settle()
+        for connection in connections:
+            hub.disconnect(connection)
+        return first, second
+
+    assert asyncio.run(run()) == (3, 2)
+    assert tab1.sent == tab2.sent == [{"n": 1}, {"n": 2}]
+    assert not hub.is_connected("u")
+    assert hub.stats()["send_errors"] == 1
+
+
+def test_bursts_coalesce_into_one_frame():
+    hub = ConnectionHub()
+    ws = FakeSocket()
+
+    async def run():
+        connection = await hub.connect(ws, "u")
+        # Queued while the writer hasn't run yet: goes out as one frame
+        hub.send("u", {"type": "UNREAD_COUNT", "unread_count": 4})
+        hub.send("u", {"type": "NEW_NOTIFICATION", "id": 1, "unread_count": 5})
+        hub.send("u", {"type": "UNREAD_COUNT", "unread_count": 3})
+        await settle()
+        hub.send("u", {"type": "NEW_NOTIFICATION", "id": 2, "unread_count": 4})
+        await settle()
+        hub.disconnect(connection)
+
+    asyncio.run(run())
+    assert ws.sent == [
+        {"type": "BATCH", "events": [{"type": "NEW_NOTIFICATION", "id": 1, "unread_count": 5},
+                                     {"type": "UNREAD_COUNT", "unread_count": 3}]},
+        {"type": "NEW_NOTIFICATION", "id": 2, "unread_count": 4},
+    ]
+    assert hub.stats()["frames"] == 2 and hub.stats()["events"] == 4
+
+
+def test_slow_consumers_never_block_the_sender():
+    slow_drop, slow_close = FakeSocket(delay=0.2), FakeSocket(delay=0.2)
+    dropping = ConnectionHub(max_queue=3, slow_policy="drop_oldest")
+    closing = ConnectionHub(max_queue=3, slow_policy="disconnect")
+
+    async def run():
+        await dropping.connect(slow_drop, "u")
+        await closing.connect(slow_close, "u")
+        await settle(0)
+        dropping.send("u", {"n": 0})
+        closing.send("u", {"n": 0})
+        await settle(0.01)  # both writers are now stuck in a 0.2 s send
+        t0 = time.perf_counter()
+        for n in range(1, 8):
+            dropping.send("u", {"n": n})
+            closing.send("u", {"n": n})
+        elapsed = time.perf_counter() - t0
+        await settle(0.5)
+        return elapsed
+
+    elapsed = asyncio.run(run())
+    assert elapsed < 0.01, elapsed
+    # Kept the newest three behind the frame in flight
+    assert slow_drop.sent == [{"n": 0}, {"type": "BATCH", "events": [{"n": 5}, {"n": 6}, {"n": 7}]}]
+    assert dropping.stats()["dropped"] == 4
+    # Closed with "try again later" once the queue overflowed
+    assert slow_close.closed_with == 1013
+    assert not closing.is_connected("u") and closing.stats()["slow_disconnects"] == 1
+
+
+def test_idle_connections_get_heartbeats():
+    hub = ConnectionHub(heartbeat=0.05)
+    ws = FakeSocket()
+
+    async def run():
+        connection = await hub.connect(ws, "u")
+        await settle(0.18)
+        hub.disconnect(connection)
+
+    asyncio.run(run())
+    assert 2 <= len(ws.sent) <= 4 and all(frame["type"] == "PING" for frame in ws.sent)
+
+
+def test_in_process_bus_reaches_other_workers_only():
+    peers = []
+    bus_a, bus_b = InProcessBus(peers), InProcessBus(peers)
+    hub_a, hub_b = _worker(bus_a), _worker(bus_b)
+    on_a, on_b = FakeSocket(), FakeSocket()
+
+    async def run():
+        await hub_a.connect(on_a, "u")
+        await hub_b.connect(on_b, "u")
+        await bus_a.publish("notify", [{"user_id": "u", "event": {"n": 1}}])
+        await settle()
+
+    asyncio.run(run())
+    # The publisher delivers to its own sockets itself (main.deliver does)
+    assert on_a.sent == [] and on_b.sent == [{"n": 1}]
+
+
+def test_local_socket_bus_between_workers():
+    with tempfile.TemporaryDirectory() as tmp:
+        bus_a, bus_b = LocalSocketBus(tmp), LocalSocketBus(tmp)
+        hub_b = _worker(bus_b)
+        _worker(bus_a)
+        on_b = FakeSocket()
+        # A worker that died without removing its socket
+        stale = socket.socket(socket.AF_UNIX, socket.SOCK_DGRAM)
+        stale.bind(str(Path(tmp) / "dead.sock"))
+        stale.close()
+        messages = [{"user_id": "u", "event": {"n": i, "pad": "x" * 500}} for i in range(300)]
+        received = []
+
+        async def run():
+            readers = [asyncio.create_task(bus.run()) for bus in (bus_a, bus_b)]
+            await asyncio.sleep(0.05)
+            await hub_b.connect(on_b, "u")
+            bus_a._peers_at = 0.0
+            await bus_a.publish("notify", messages)
+            for _ in range(100):
+                received[:] = [e for frame in on_b.sent for e in frame.get("events", [frame])]
+                if len(received) == len(messages):
+                    break
+                await asyncio.sleep(0.01)
+            for task in readers:
+                task.cancel()
+            await asyncio.gather(*readers, return_exceptions=True)
+
+        asyncio.run(run())
+        assert [m["n"] for m in received] == list(range(300))
+        # ~150 KB went out as a handful of datagrams, not one per message
+        assert len(bus_a._datagrams("notify", messages)) <= 4
+        assert bus_a.received == 0
+        assert not (Path(tmp) / "dead.sock").exists()
+        # Sockets are removed when the workers stop
+        assert list(Path(tmp).glob("*.sock")) == []
+
+
+def test_socket_bus_is_opt_in_per_directory():
+    saved = {key: os.environ.pop(key, None) for key in ("NOTIFY_BUS", "NOTIFY_BUS_DIR")}
+    try:
+        # No host-wide default directory for unrelated deployments to share
+        os.environ["NOTIFY_BUS"] = "local"
+        assert type(bus_from_env()) is InProcessBus
+        with tempfile.TemporaryDirectory() as tmp:
+            del os.environ["NOTIFY_BUS"]
+            os.environ["NOTIFY_BUS_DIR"] = tmp
+            bus = bus_from_env()
+            assert isinstance(bus, LocalSocketBus)
+
+            async def run():
+                reader = asyncio.create_task(bus.run())
+                await asyncio.sleep(0.05)
+                assert bus.path.exists()
+                bus.close()
+                reader.cancel()
+                await asyncio.gather(reader, return_exceptions=True)
+
+            asyncio.run(run())
+            assert list(Path(tmp).glob("*.sock")) == []
+    finally:
+        for key, value in saved.items():
+            os.environ.pop(key, None)
+            if value is not None:
+                os.environ[key] = value
+
+
+if __name__ == "__main__":
+    test_hub_sends_to_every_socket_and_drops_dead_ones()
+    test_bursts_coalesce_into_one_frame()
+    test_slow_consumers_never_block_the_sender()
+    test_idle_connections_get_heartbeats()
+    test_in_process_bus_reaches_other_workers_only()
+    test_local_socket_bus_between_workers()
+    test_socket_bus_is_opt_in_per_directory()
+    print("✅ Notification bus behaves")
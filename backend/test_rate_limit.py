@@ -0,0 +1,137 @@
+# backend/test_rate_limit.py
+"""Checks for the provider token buckets: bounded queueing, degrading when the
+wait is too long, one budget shared by several processes, and the model chain
+skipping a throttled model.
+
+Run with `python test_rate_limit.py` (or pytest).
+"""
+import asyncio
+import fcntl
+import json
+import os
+import multiprocessing
+import tempfile
+import time
+from pathlib import Path
+from types import SimpleNamespace
+
+from model_chain import ModelChain, ModelChainExhausted
+from providers import ProviderPool
+from rate_limit import FileBackend, MemoryBackend, RateLimiter
+
+
+def test_queues_then_degrades():
+    # 60 rpm = capacity 60, one token per second
+    limiter = RateLimiter(MemoryBackend(), {"gemini": {"rpm": 60}}, max_wait=1.5)
+
+    async def run():
+        burst = [await limiter.acquire("gemini", "m") for _ in range(60)]
+        t0 = time.perf_counter()
+        # The first waits ~1 s for its token; the next two would wait > max_wait and are refused
+        queued, *refused = await asyncio.gather(*(limiter.acquire("gemini", "m") for _ in range(3)))
+        waited = time.perf_counter() - t0
+        other_model = await limiter.acquire("gemini", "other", max_wait=0)
+        return burst, queued, waited, refused, other_model
+
+    burst, queued, waited, refused, other_model = asyncio.run(run())
+    assert all(burst)
+    assert queued and 0.9 < waited < 1.5, waited
+    assert refused == [False, False]
+    assert other_model  # buckets are per model
+    assert limiter.stats()["calls"]["gemini:m"]["throttled"] == 2
+
+
+def test_token_bucket_and_unlimited_providers():
+    limiter = RateLimiter(MemoryBackend(), {"groq": {"rpm": 100, "tpm": 1000}}, max_wait=0)
+
+    async def run():
+        big = await limiter.acquire("groq", "m", tokens=900)
+        over = await limiter.acquire("groq", "m", tokens=200)
+        small = await limiter.acquire("groq", "m", tokens=50)
+        unlimited = await limiter.acquire("gemini", "m", tokens=10 ** 9)
+        return big, over, small, unlimited
+
+    assert asyncio.run(run()) == (True, False, True, True)
+
+
+def _drain(path, results):
+    limiter = RateLimiter(FileBackend(path), {"gemini": {"rpm": 30}}, max_wait=0)
+
+    async def run():
+        return sum([await limiter.acquire("gemini", "m") for _ in range(25)])
+
+    results.put(asyncio.run(run()))
+
+
+def test_budget_is_shared_across_processes():
+    with tempfile.TemporaryDirectory() as tmp:
+        path = Path(tmp) / "buckets.json"
+        results = multiprocessing.Queue()
+        workers = [multiprocessing.Process(target=_drain, args=(path, results)) for _ in range(4)]
+        for worker in workers:
+            worker.start()
+        for worker in workers:
+            worker.join()
+        granted = sum(results.get() for _ in workers)
+        # 4 workers x 25 attempts against one 30-request bucket (plus refill while they ran)
+        assert 30 <= granted <= 32, granted
+        assert json.loads(path.read_text())["gemini:m:rpm"][0] < 1
+
+
+def test_file_lock_does_not_block_the_loop():
+    with tempfile.TemporaryDirectory() as tmp:
+        path = Path(tmp) / "buckets.json"
+        limiter = RateLimiter(FileBackend(path), {"gemini": {"rpm": 60}}, max_wait=0)
+        # Another worker holding the lock (e.g. on a slow disk)
+        fd = os.open(path, os.O_RDWR | os.O_CREAT)
+        fcntl.flock(fd, fcntl.LOCK_EX)
+
+        async def run():
+            acquire = asyncio.create_task(limiter.acquire("gemini", "m"))
+            ticks = 0
+            for _ in range(10):
+                await asyncio.sleep(0.01)
+                ticks += 1
+            assert not acquire.done()
+            os.close(fd)
+            return ticks, await acquire
+
+        ticks, granted = asyncio.run(run())
+        assert ticks == 10 and granted
+
+
+def test_chain_skips_throttled_model():
+    limiter = RateLimiter(MemoryBackend(), {"test": {"rpm": 1}}, max_wait=0)
+    calls = []
+
+    def call(model, prompt):
+        calls.append(model)
+        return SimpleNamespace(text=model)
+
+    chain = ModelChain("test", ["a", "b"], call, ProviderPool("test", 2), limiter=limiter)
+
+    async def run():
+        first = await chain.generate("p", parse=lambda r: r.text)
+        second = await chain.generate("p", parse=lambda r: r.text)
+        try:
+            await chain.generate("p")
+        except ModelChainExhausted as e:
+            return first, second, e.errors
+        raise AssertionError("expected ModelChainExhausted")
+
+    first, second, errors = asyncio.run(run())
+    assert (first, second) == (("a", "a"), ("b", "b"))
+    assert errors == {"a": "rate limited", "b": "rate limited"}
+    assert calls == ["a", "b"]
+    # Out of quota is not an outage
+    assert chain.breakers["a"].state == "closed"
+    assert chain.counters["a"]["throttled"] == 2
+
+
+if __name__ == "__main__":
+    test_queues_then_degrades()
+    test_token_bucket_and_unlimited_providers()
+    test_budget_is_shared_across_processes()
+    test_file_lock_does_not_block_the_loop()
+    test_chain_skips_throttled_model()
+    print("✅ Rate limits behave")
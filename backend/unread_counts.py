@@ -0,0 +1,86 @@
+# backend/unread_counts.py
+"""Per-user unread-notification counters kept in memory.
+
+A user's count is loaded once from the database (a COUNT query) and then
+maintained by the writes this worker makes: +n when notifications are created,
+-n when they are marked read. Writes made by other workers, or deletes made
+straight in the database, are not seen, so each count is re-read after
+`reconcile_after` seconds by a periodic reconciliation pass. Least recently
+used users are evicted beyond `maxsize`.
+"""
+import time
+from collections import OrderedDict
+from threading import Lock
+from typing import Any, Callable, Dict, List, Optional
+
+
+class UnreadCounters:
+    def __init__(self, maxsize: int = 100_000, reconcile_after: float = 300.0,
+                 clock: Callable[[], float] = time.monotonic):
+        self.maxsize = maxsize
+        self.reconcile_after = reconcile_after
+        self.clock = clock
+        # user_id -> [count, loaded_at]
+        self._counts: "OrderedDict[str, List[float]]" = OrderedDict()
+        self._lock = Lock()
+        self.loads = 0
+        self.reconciled = 0
+        self.corrections = 0
+
+    def __len__(self):
+        return len(self._counts)
+
+    def get(self, user_id: str) -> Optional[int]:
+        """The maintained count, or None if it hasn't been loaded."""
+        with self._lock:
+            entry = self._counts.get(user_id)
+            if entry is None:
+                return None
+            self._counts.move_to_end(user_id)
+            return int(entry[0])
+
+    def set(self, user_id: str, count: int, reconciled: bool = False):
+        """Stores a count read from the database."""
+        with self._lock:
+            entry = self._counts.get(user_id)
+            if reconciled:
+                self.reconciled += 1
+                if entry is not None and entry[0] != count:
+                    self.corrections += 1
+            else:
+                self.loads += 1
+            self._counts[user_id] = [max(0, count), self.clock()]
+            self._counts.move_to_end(user_id)
+            while len(self._counts) > self.maxsize:
+                self._counts.popitem(last=False)
+
+    def add(self, user_id: str, delta: int) -> Optional[int]:
+        """Applies a change to a loaded count; returns it, or None (nothing to update) if not loaded."""
+        with self._lock:
+            entry = self._counts.get(user_id)
+            if entry is None:
+                return None
+            entry[0] = max(0, entry[0] + delta)
+            return int(entry[0])
+
+    def forget(self, user_id: str):
+        with self._lock:
+            self._counts.pop(user_id, None)
+
+    def due(self, limit: int) -> List[str]:
+        """Up to `limit` users whose count was last read from the database longest ago, past reconcile_after."""
+        cutoff = self.clock() - self.reconcile_after
+        with self._lock:
+            stale = [(loaded_at, user_id) for user_id, (_, loaded_at) in self._counts.items() if loaded_at <= cutoff]
+        stale.sort()
+        return [user_id for _, user_id in stale[:limit]]
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "users": len(self._counts),
+            "maxsize": self.maxsize,
+            "reconcile_after_seconds": self.reconcile_after,
+            "loads": self.loads,
+            "reconciled": self.reconciled,
+            "corrections": self.corrections,
+        }